@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+audio_silence.py — NumPy silence detection, trimming and splitting for TTS clips.
+
+Python replacement for the ffmpeg `silencedetect` + scripts/parse_silences.cjs round trip.
+WAV files are memory-mapped straight into int16 arrays (no decode copy), loudness is
+measured as RMS over fixed windows in one vectorized pass, and silences are the runs of
+windows below the threshold. Defaults match the JS cutter (-30 dB, 0.3 s minimum gap).
+
+Used by tts_batch.py to trim every clip and to cut multi-sentence renders into per-sentence
+clips, so a whole passage can be synthesized in one call.
+
+Usage:
+    python3 scripts/genai/audio_silence.py detect <in.wav> [--threshold-db -30] [--min-silence 0.3]
+    python3 scripts/genai/audio_silence.py trim <in.wav> <out.wav> [--pad 0.05]
+    python3 scripts/genai/audio_silence.py split <in.wav> <out_dir> [--expected N] [--pad 0.05]
+
+Example:
+    python3 scripts/genai/audio_silence.py split temp/audio/passage.wav temp/audio/passage-cut --expected 6
+"""
+
+import argparse
+import os
+import struct
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+SAMPLE_RATE = 24000
+DEFAULT_THRESHOLD_DB = -30.0
+DEFAULT_MIN_SILENCE_S = 0.3
+DEFAULT_WINDOW_MS = 10
+DEFAULT_PAD_S = 0.05
+
+# Full-scale reference for 16-bit PCM
+_FULL_SCALE = 32768.0
+
+
+def read_wav(path):
+    """
+    Memory-maps a 16-bit PCM WAV. Returns (samples, sample_rate) where samples is a
+    read-only int16 array of shape (frames,) for mono or (frames, channels) otherwise.
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path}: not a RIFF/WAVE file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    if fmt is None:
+        raise ValueError(f"{path}: no fmt chunk")
+    audio_format, channels, sample_rate, _, _, bits = fmt
+    if audio_format != 1 or bits != 16:
+        raise ValueError(f"{path}: only 16-bit PCM is supported (format={audio_format}, bits={bits})")
+
+    frames = min(size, os.path.getsize(path) - data_offset) // (2 * channels)
+    if frames == 0:
+        return np.zeros(0, dtype="<i2"), sample_rate
+    samples = np.memmap(path, dtype="<i2", mode="r", offset=data_offset, shape=(frames * channels,))
+    if channels > 1:
+        samples = samples.reshape(frames, channels)
+    return samples, sample_rate
+
+
+def pcm_to_array(pcm: bytes):
+    """Raw little-endian 16-bit mono PCM (as returned by the TTS endpoint) as an int16 array view."""
+    return np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+
+
+def write_wav(path, samples, sample_rate=SAMPLE_RATE):
+    """Atomically writes an int16 array (mono or frames x channels) as a WAV."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    samples = np.asarray(samples, dtype="<i2")
+    tmp_path = path.with_name(path.name + ".tmp")
+    with wave.open(str(tmp_path), "wb") as wf:
+        wf.setnchannels(1 if samples.ndim == 1 else samples.shape[1])
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(samples.tobytes())
+    os.replace(tmp_path, path)
+
+
+def rms_db(samples, sample_rate, window_ms=DEFAULT_WINDOW_MS):
+    """
+    RMS level in dBFS of consecutive `window_ms` windows (the last partial window is
+    zero-padded). Multi-channel input is mixed down first. Returns (levels, window_size).
+    """
+    mono = samples if samples.ndim == 1 else samples.mean(axis=1)
+    window = max(1, int(sample_rate * window_ms / 1000))
+    n_windows = -(-len(mono) // window)
+    padded = np.zeros(n_windows * window, dtype=np.float32)
+    padded[:len(mono)] = mono
+    frames = padded.reshape(n_windows, window) / _FULL_SCALE
+    power = np.einsum("ij,ij->i", frames, frames) / window
+    return 10 * np.log10(np.maximum(power, 1e-12)), window
+
+
+def detect_silences(samples, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB,
+                    min_silence_s=DEFAULT_MIN_SILENCE_S, window_ms=DEFAULT_WINDOW_MS):
+    """Returns [(start_sample, end_sample)] for every run below threshold_db lasting >= min_silence_s."""
+    if len(samples) == 0:
+        return []
+    levels, window = rms_db(samples, sample_rate, window_ms)
+    silent = np.concatenate(([False], levels < threshold_db, [False]))
+    edges = np.flatnonzero(np.diff(silent.astype(np.int8)))
+    starts, ends = edges[0::2], edges[1::2]
+    keep = (ends - starts) * window >= min_silence_s * sample_rate
+    total = len(samples)
+    return [(int(s * window), min(int(e * window), total)) for s, e in zip(starts[keep], ends[keep])]
+
+
+def speech_bounds(samples, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB,
+                  window_ms=DEFAULT_WINDOW_MS, pad_s=DEFAULT_PAD_S):
+    """(start, end) sample range of the audible part, widened by pad_s; None when all silent."""
+    if len(samples) == 0:
+        return None
+    levels, window = rms_db(samples, sample_rate, window_ms)
+    loud = np.flatnonzero(levels >= threshold_db)
+    if len(loud) == 0:
+        return None
+    pad = int(pad_s * sample_rate)
+    return max(0, int(loud[0] * window) - pad), min(len(samples), int((loud[-1] + 1) * window) + pad)
+
+
+def trim_silence(samples, sample_rate, threshold_db=DEFAULT_THRESHOLD_DB,
+                 window_ms=DEFAULT_WINDOW_MS, pad_s=DEFAULT_PAD_S):
+    """Strips leading and trailing silence, keeping pad_s either side. Returns a view."""
+    bounds = speech_bounds(samples, sample_rate, threshold_db, window_ms, pad_s)
+    if bounds is None:
+        return samples[:0]
+    return samples[bounds[0]:bounds[1]]
+
+
+def split_at_silences(samples, sample_rate, expected=None, threshold_db=DEFAULT_THRESHOLD_DB,
+                      min_silence_s=DEFAULT_MIN_SILENCE_S, window_ms=DEFAULT_WINDOW_MS, pad_s=DEFAULT_PAD_S):
+    """
+    Cuts a multi-sentence render at its interior silences and returns trimmed segment views.
+
+    With `expected`, the expected-1 longest interior gaps are used as cut points (shorter
+    pauses inside a sentence are kept) and None is returned when there are too few gaps,
+    so callers can fall back to per-sentence synthesis.
+    """
+    gaps = [(s, e) for s, e in detect_silences(samples, sample_rate, threshold_db, min_silence_s, window_ms)
+            if s > 0 and e < len(samples)]
+    if expected is not None:
+        if len(gaps) < expected - 1:
+            return None
+        gaps = sorted(sorted(gaps, key=lambda g: g[1] - g[0], reverse=True)[:expected - 1])
+
+    cuts = [0] + [(s + e) // 2 for s, e in gaps] + [len(samples)]
+    segments = []
+    for a, b in zip(cuts[:-1], cuts[1:]):
+        segment = trim_silence(samples[a:b], sample_rate, threshold_db, window_ms, pad_s)
+        if len(segment):
+            segments.append(segment)
+    if expected is not None and len(segments) != expected:
+        return None
+    return segments
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect, trim and split silences in 16-bit PCM WAV files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ["detect", "trim", "split"]:
+        p = sub.add_parser(name)
+        p.add_argument("input", help="Input WAV")
+        if name == "trim":
+            p.add_argument("output", help="Output WAV")
+        elif name == "split":
+            p.add_argument("output_dir", help="Directory for <stem>-NN.wav segments")
+            p.add_argument("--expected", type=int, help="Number of sentences in the render")
+        p.add_argument("--threshold-db", type=float, default=DEFAULT_THRESHOLD_DB, help="Silence threshold in dBFS")
+        p.add_argument("--min-silence", type=float, default=DEFAULT_MIN_SILENCE_S, help="Minimum silence length (s)")
+        p.add_argument("--pad", type=float, default=DEFAULT_PAD_S, help="Silence kept around speech (s)")
+    args = parser.parse_args(argv)
+
+    samples, rate = read_wav(args.input)
+    if args.command == "detect":
+        silences = detect_silences(samples, rate, args.threshold_db, args.min_silence)
+        print(f"Detected {len(silences)} silence(s) in {args.input} ({len(samples) / rate:.2f}s):")
+        for i, (s, e) in enumerate(silences, 1):
+            print(f"  Silence #{i}: {s / rate:.2f}s to {e / rate:.2f}s (duration: {(e - s) / rate:.2f}s)")
+    elif args.command == "trim":
+        trimmed = trim_silence(samples, rate, args.threshold_db, pad_s=args.pad)
+        write_wav(args.output, trimmed, rate)
+        print(f"Trimmed {len(samples) / rate:.2f}s -> {len(trimmed) / rate:.2f}s: {args.output}")
+    else:
+        segments = split_at_silences(samples, rate, args.expected, args.threshold_db, args.min_silence, pad_s=args.pad)
+        if segments is None:
+            print(f"Error: could not find {args.expected} segment(s) in {args.input}", file=sys.stderr)
+            sys.exit(1)
+        stem = Path(args.input).stem
+        for i, segment in enumerate(segments, 1):
+            write_wav(Path(args.output_dir) / f"{stem}-{i:02d}.wav", segment, rate)
+        print(f"Split {args.input} into {len(segments)} segment(s) in {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,22 +17,40 @@ Supported Issue Types Fixed:
    - Duplicate Options: Cleans duplicate options in chunk distractors.
 4. All JSON Practices (VM, SH, SA):
    - ID Format: Regenerates invalid or duplicate IDs to ensure strict 8-character alphanumeric string format.
+   - ID Collisions (only with --fix-collisions): Reassigns well-formed IDs that another file registered first.
 
 Usage:
-    python3 scripts/genai/audit-scripts/apply_audit_fixes.py <path_to_audit_report.md>
+    python3 scripts/genai/audit-scripts/apply_audit_fixes.py <path_to_audit_report.md> [--fix-collisions]
 """
 
+import argparse
+
 import sys
 import os
 import json
 import re
-import random
-import string
 
-def gen_8char_id(prefix=""):
-    chars = string.ascii_lowercase + string.digits
-    suffix = ''.join(random.choices(chars, k=6))
-    return f"{prefix[:2]}{suffix}" if len(prefix) >= 2 else f"u{suffix[:7]}"
+GENAI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if GENAI_DIR not in sys.path:
+    sys.path.insert(0, GENAI_DIR)
+
+from id_registry import assign_ids, owner_key
+
+def fix_ids(label, items, path, fix_collisions=False):
+    """
+    Replaces malformed and in-file duplicate IDs; with fix_collisions, also IDs another
+    file registered first. Logs each fix and returns True if any ID changed.
+    """
+    owner = owner_key(path)
+    changed = False
+    for old_id, new_id in assign_ids(items, owner, cross_file=False):
+        print(f"  ✅ [{label} ID Fix] Fixed invalid ID '{old_id}' -> '{new_id}'")
+        changed = True
+    if fix_collisions:
+        for old_id, new_id in assign_ids(items, owner):
+            print(f"  ✅ [{label} ID Collision Fix] Reassigned '{old_id}' (registered by another file) -> '{new_id}'")
+            changed = True
+    return changed
 
 def find_target_dir(report_content, report_path):
     # 1. Try finding **Target Directory:** `path`
@@ -51,24 +69,12 @@ def find_target_dir(report_content, report_path):
 
     return None
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 scripts/genai/audit-scripts/apply_audit_fixes.py <path_to_audit_report.md>")
-        sys.exit(1)
-
-    report_path = sys.argv[1]
-    if not os.path.exists(report_path):
-        print(f"Error: Audit report file '{report_path}' not found.")
-        sys.exit(1)
-
-    with open(report_path, "r", encoding="utf-8") as f:
-        report_content = f.read()
-
-    target_dir = find_target_dir(report_content, report_path)
-    if not target_dir:
-        print(f"Error: Could not locate target unit directory for '{report_path}'.")
-        sys.exit(1)
-
+def apply_fixes(report_path, report_content, target_dir, fix_collisions=False):
+    """
+    Applies the fixes listed in the report to the unit's JSON files and rewrites
+    the report with per-row status. Returns the number of JSON files modified.
+    IDs owned by another file are only reassigned with fix_collisions.
+    """
     unit_name = os.path.basename(target_dir.rstrip("/"))
     print(f"🔧 Applying fixes to unit: {target_dir} ({unit_name})")
 
@@ -209,44 +215,19 @@ def main():
     # -------------------------------------------------------------
     # 4. ID Format & Chunk Fixes across VM, SH, and SA JSON data
     # -------------------------------------------------------------
+    # IDs come from the corpus-wide registry, so a fixed ID cannot collide with another unit's
     if data["vm"]:
-        used_ids = set()
-        q_count = 1
-        for c in data["vm"].get("challenges", []):
-            for q in c.get("questions", []):
-                qid = q.get("id", "")
-                if len(qid) != 8 or not qid.isalnum() or qid in used_ids:
-                    new_id = f"v{unit_name.replace('-', '')[-2:]}{q_count:05d}"
-                    if len(new_id) > 8:
-                        new_id = new_id[:8]
-                    while new_id in used_ids or len(new_id) != 8:
-                        new_id = gen_8char_id("vm")
-                    q["id"] = new_id
-                    modified_files.add("vm")
-                    print(f"  ✅ [VM ID Fix] Fixed invalid ID '{qid}' -> '{new_id}'")
-                    qid = new_id
-                used_ids.add(qid)
-                q_count += 1
+        questions = [q for c in data["vm"].get("challenges", []) for q in c.get("questions", [])]
+        if fix_ids("VM", questions, os.path.join(target_dir, files["vm"]), fix_collisions):
+            modified_files.add("vm")
 
     if data["sh"]:
-        used_ids = set()
-        w_count = 1
-        for w in data["sh"].get("spelling_words", []):
-            wid = w.get("id", "")
-            wstr = w.get("word", "")
-            if len(wid) != 8 or not wid.isalnum() or wid in used_ids:
-                new_id = f"s{unit_name.replace('-', '')[-2:]}{w_count:05d}"
-                if len(new_id) > 8:
-                    new_id = new_id[:8]
-                while new_id in used_ids or len(new_id) != 8:
-                    new_id = gen_8char_id("sh")
-                w["id"] = new_id
-                modified_files.add("sh")
-                print(f"  ✅ [SH ID Fix] Fixed invalid ID '{wid}' for '{wstr}' -> '{new_id}'")
-                wid = new_id
-            used_ids.add(wid)
-            w_count += 1
+        words = data["sh"].get("spelling_words", [])
+        if fix_ids("SH", words, os.path.join(target_dir, files["sh"]), fix_collisions):
+            modified_files.add("sh")
 
+        for w in words:
+            wstr = w.get("word", "")
             for chunk in w.get("chunks", []):
                 opts = chunk.get("options", [])
                 if len(opts) != len(set(opts)):
@@ -263,23 +244,9 @@ def main():
                     print(f"  ✅ [SH Chunk Fix] Cleaned duplicate options for '{wstr}' -> {clean_opts}")
 
     if data["sa"]:
-        used_ids = set()
-        s_count = 1
-        for c in data["sa"].get("challenges", []):
-            for item in c.get("data", []):
-                sid = item.get("id", "")
-                if len(sid) != 8 or not sid.isalnum() or sid in used_ids:
-                    new_id = f"s{unit_name.replace('-', '')[-2:]}{s_count:05d}"
-                    if len(new_id) > 8:
-                        new_id = new_id[:8]
-                    while new_id in used_ids or len(new_id) != 8:
-                        new_id = gen_8char_id("sa")
-                    item["id"] = new_id
-                    modified_files.add("sa")
-                    print(f"  ✅ [SA ID Fix] Fixed invalid ID '{sid}' -> '{new_id}'")
-                    sid = new_id
-                used_ids.add(sid)
-                s_count += 1
+        sentences = [item for c in data["sa"].get("challenges", []) for item in c.get("data", [])]
+        if fix_ids("SA", sentences, os.path.join(target_dir, files["sa"]), fix_collisions):
+            modified_files.add("sa")
 
     # Re-calculate Summary by File section with fixed/pending counts
     file_fixed_counts = {}
@@ -339,7 +306,30 @@ def main():
         f.write("\n".join(final_lines) + "\n")
     print(f"📝 Updated audit report summary & detailed status: {report_path}")
 
-    print(f"\n🎉 Fixes successfully applied! Updated {len(modified_files)} JSON file(s).")
+    return len(modified_files)
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply the fixes from a markdown audit report to its unit's JSON files.")
+    parser.add_argument("report", help="Path to the audit report (.md)")
+    parser.add_argument("--fix-collisions", action="store_true",
+                        help="Also reassign well-formed IDs that another file registered first")
+    args = parser.parse_args()
+
+    report_path = args.report
+    if not os.path.exists(report_path):
+        print(f"Error: Audit report file '{report_path}' not found.")
+        sys.exit(1)
+
+    with open(report_path, "r", encoding="utf-8") as f:
+        report_content = f.read()
+
+    target_dir = find_target_dir(report_content, report_path)
+    if not target_dir:
+        print(f"Error: Could not locate target unit directory for '{report_path}'.")
+        sys.exit(1)
+
+    modified_count = apply_fixes(report_path, report_content, target_dir, fix_collisions=args.fix_collisions)
+    print(f"\n🎉 Fixes successfully applied! Updated {modified_count} JSON file(s).")
 
 if __name__ == "__main__":
     main()
@@ -5,7 +5,12 @@ Audits generated JSON files in a unit folder against standard GEMINI.md rules
 and writes a markdown audit report to scripts/genai/audit-reports/<unit-name>-audit-report.md.
 
 Usage:
+    python3 scripts/genai/audit-scripts/audit_unit.py <unit_folder_path> [--no-llm] [--high] [--rules PATTERNS]
+    python3 scripts/genai/audit-scripts/audit_unit.py --list-rules
+
+Example:
     python3 scripts/genai/audit-scripts/audit_unit.py v2-data/B-PU1/b-pu1-u3
+    python3 scripts/genai/audit-scripts/audit_unit.py v2-data/B-PU1/b-pu1-u3 --no-llm --rules "vm.*,sh.coverage"
 """
 
 import sys
@@ -14,177 +19,338 @@ import json
 import re
 import math
 
-def audit_vocab_guide(vg, filename):
-    issues = []
-    vocab = vg.get("unit_vocabulary", [])
-    for item in vocab:
-        word = item.get("word", "")
-        ipa = item.get("ipa", "")
-        page = item.get("page_number", "")
-        ctx = item.get("context_sentence", "")
-
-        is_phrase = " " in word.strip()
-        if not is_phrase and not (ipa.startswith("/") and ipa.endswith("/")):
-            issues.append({
-                "json_file": filename,
-                "rule_section": "1. Vocab Guide Extraction (VGE)",
-                "item_id": word,
-                "issue_type": "IPA Format",
-                "description": f"IPA '{ipa}' is not enclosed in forward slashes /.../."
-            })
-        
-        if "____" in ctx or "___" in ctx:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "1. Vocab Guide Extraction (VGE)",
-                "item_id": word,
-                "issue_type": "Context Sentence Blank",
-                "description": f"Context sentence contains blank placeholder: '{ctx}'"
-            })
+from rule_engine import rule, audit_file, select_rules, rule_summary
 
-        if not page:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "1. Vocab Guide Extraction (VGE)",
-                "item_id": word,
-                "issue_type": "Missing Page Number",
-                "description": "Page number is missing or empty."
-            })
+# Rule-based checks: each rule is a visitor on one node type of one file kind
+# (see rule_engine.py), and every file is traversed once for all enabled rules.
 
-    return issues
+def get_pos(meaning, word):
+    if ' ' in word or '...' in word or 'phr.' in meaning:
+        return 'phrase'
+    if 'adj.' in meaning or 'adv.' in meaning or 'abbr.' in meaning:
+        return 'adj'
+    if 'vi.' in meaning or 'vt.' in meaning or 'v.' in meaning:
+        return 'verb'
+    if 'n.' in meaning:
+        return 'noun'
+    return 'other'
 
-def audit_vocab_master(vm, vg, filename):
-    issues = []
-    challenges = vm.get("challenges", [])
-    all_questions = []
-    
-    vg_vocab = vg.get("unit_vocabulary", []) if vg else []
-    non_proper = [v for v in vg_vocab if not (v["word"][0].isupper() and v["word"] not in ["I"])]
-    target_calc = len(non_proper) * 1.5
-    expected_target = math.ceil(target_calc / 10.0) * 10
-    
-    total_vm_q = sum(len(c.get("questions", [])) for c in challenges)
-    if total_vm_q < expected_target:
-        issues.append({
-            "json_file": filename,
-            "rule_section": "2. Vocab Master (VM)",
-            "item_id": "Question Volume",
-            "issue_type": "Volume Deficit",
-            "description": f"Generated {total_vm_q} questions; expected target ~{expected_target} based on formula ({len(non_proper)} items * 1.5)."
-        })
-
-    seen_ids = set()
-    tested_words = set()
-    for c in challenges:
-        c_qs = c.get("questions", [])
-        if len(c_qs) != 10:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "2. Vocab Master (VM)",
-                "item_id": c.get("id", "challenge"),
-                "issue_type": "Challenge Size",
-                "description": f"Challenge {c.get('id')} has {len(c_qs)} questions, expected exactly 10."
-            })
-        all_questions.extend(c_qs)
-
-    def get_pos(meaning, word):
-        if ' ' in word or '...' in word or 'phr.' in meaning:
-            return 'phrase'
-        if 'adj.' in meaning or 'adv.' in meaning or 'abbr.' in meaning:
-            return 'adj'
-        if 'vi.' in meaning or 'vt.' in meaning or 'v.' in meaning:
-            return 'verb'
-        if 'n.' in meaning:
-            return 'noun'
-        return 'other'
-
-    word_pos_map = {item.get('word', ''): get_pos(item.get('meaning', ''), item.get('word', '')) for item in vg_vocab}
-
-    for q in all_questions:
-        qid = q.get("id", "")
-        word = q.get("word", "")
-        meaning = q.get("meaning", "")
-        tested_words.add(word)
-
-        if len(qid) != 8 or not qid.isalnum():
-            issues.append({
-                "json_file": filename,
-                "rule_section": "2. Vocab Master (VM)",
-                "item_id": qid or word,
-                "issue_type": "ID Format",
-                "description": f"Question ID '{qid}' is not an 8-character alphanumeric string."
-            })
 
-        if qid in seen_ids:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "2. Vocab Master (VM)",
-                "item_id": qid,
-                "issue_type": "Duplicate ID",
-                "description": f"Duplicate question ID '{qid}' found."
-            })
-        seen_ids.add(qid)
-
-        qtype = q.get("type")
-        opts = q.get("options", [])
-        ans = q.get("answer")
-
-        if len(opts) != 6:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "2. Vocab Master (VM)",
-                "item_id": qid,
-                "issue_type": "Option Count",
-                "description": f"Question {qid} has {len(opts)} options, expected 6."
-            })
+def non_proper_vocab(ctx):
+    """Vocab-guide items that are not proper nouns (the ones VM must test)."""
+    if "non_proper" not in ctx.state:
+        ctx.state["non_proper"] = [v for v in ctx.vg_vocab if not (v["word"][0].isupper() and v["word"] not in ["I"])]
+    return ctx.state["non_proper"]
 
 
-        target_pos = word_pos_map.get(word, get_pos(meaning, word))
+def word_pos_map(ctx):
+    if "pos_map" not in ctx.state:
+        ctx.state["pos_map"] = {item.get('word', ''): get_pos(item.get('meaning', ''), item.get('word', '')) for item in ctx.vg_vocab}
+    return ctx.state["pos_map"]
 
-        for idx_o, opt in enumerate(opts):
-            opt_str = str(opt)
-            if opt_str.lower() == 'sex' and word.lower() != 'sex':
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "2. Vocab Master (VM)",
-                    "item_id": qid,
-                    "issue_type": "Forbidden Distractor",
-                    "description": f"Question {qid} ({word}): option [{idx_o}] contains forbidden distractor 'sex'."
-                })
 
-            if qtype in ["Cn2En", "Cloze"]:
-                opt_pos = word_pos_map.get(opt_str, "unknown")
-                if target_pos != "unknown" and opt_pos != "unknown" and target_pos != opt_pos:
-                    issues.append({
-                        "json_file": filename,
-                        "rule_section": "2. Vocab Master (VM)",
-                        "item_id": qid,
-                        "issue_type": "Distractor PoS Mismatch",
-                        "description": f"Question {qid} ({word} [{target_pos}]): distractor '{opt}' has mismatching PoS [{opt_pos}]."
-                    })
+# 1. Vocab Guide Extraction (VGE)
 
-        if qtype == "Cloze":
-            ctx = q.get("context_sentence", "")
-            if ctx and ("____" in ctx or "___" in ctx):
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "2. Vocab Master (VM)",
-                    "item_id": qid,
-                    "issue_type": "Context Sentence Blank",
-                    "description": f"Context sentence contains blank placeholder: '{ctx}'"
-                })
-
-    missing_coverage = set([v["word"] for v in non_proper]) - tested_words
+@rule("vg.ipa-format", "vocab")
+def vg_ipa_format(ctx, item):
+    """Single-word IPA is enclosed in forward slashes."""
+    word = item.get("word", "")
+    ipa = item.get("ipa", "")
+    is_phrase = " " in word.strip()
+    if not is_phrase and not (ipa.startswith("/") and ipa.endswith("/")):
+        ctx.report(word, "IPA Format", f"IPA '{ipa}' is not enclosed in forward slashes /.../.")
+
+
+@rule("vg.context-blank", "vocab")
+def vg_context_blank(ctx, item):
+    """Context sentences contain no blank placeholder."""
+    ctx_sentence = item.get("context_sentence", "")
+    if "____" in ctx_sentence or "___" in ctx_sentence:
+        ctx.report(item.get("word", ""), "Context Sentence Blank", f"Context sentence contains blank placeholder: '{ctx_sentence}'")
+
+
+@rule("vg.page-number", "vocab")
+def vg_page_number(ctx, item):
+    """Every item has a page number."""
+    if not item.get("page_number", ""):
+        ctx.report(item.get("word", ""), "Missing Page Number", "Page number is missing or empty.")
+
+
+# 2. Vocab Master (VM)
+
+@rule("vm.question-volume", "document")
+def vm_question_volume(ctx, vm):
+    """Question count reaches ceil(non-proper vocab items * 1.5) rounded up to 10."""
+    non_proper = non_proper_vocab(ctx)
+    expected_target = math.ceil(len(non_proper) * 1.5 / 10.0) * 10
+    total_vm_q = sum(len(c.get("questions", [])) for c in vm.get("challenges", []))
+    if total_vm_q < expected_target:
+        ctx.report("Question Volume", "Volume Deficit",
+                   f"Generated {total_vm_q} questions; expected target ~{expected_target} based on formula ({len(non_proper)} items * 1.5).")
+
+
+@rule("vm.challenge-size", "challenge")
+def vm_challenge_size(ctx, c):
+    """Every challenge has exactly 10 questions."""
+    c_qs = c.get("questions", [])
+    if len(c_qs) != 10:
+        ctx.report(c.get("id", "challenge"), "Challenge Size", f"Challenge {c.get('id')} has {len(c_qs)} questions, expected exactly 10.")
+
+
+@rule("vm.id-format", "question")
+def vm_id_format(ctx, q):
+    """Question IDs are 8-character alphanumeric strings."""
+    qid = q.get("id", "")
+    if len(qid) != 8 or not qid.isalnum():
+        ctx.report(qid or q.get("word", ""), "ID Format", f"Question ID '{qid}' is not an 8-character alphanumeric string.")
+
+
+@rule("vm.duplicate-id", "question")
+def vm_duplicate_id(ctx, q):
+    """Question IDs are unique within the file."""
+    qid = q.get("id", "")
+    seen_ids = ctx.seen("vm_ids")
+    if qid in seen_ids:
+        ctx.report(qid, "Duplicate ID", f"Duplicate question ID '{qid}' found.")
+    seen_ids.add(qid)
+
+
+@rule("vm.option-count", "question")
+def vm_option_count(ctx, q):
+    """Every question has exactly 6 options."""
+    opts = q.get("options", [])
+    if len(opts) != 6:
+        ctx.report(q.get("id", ""), "Option Count", f"Question {q.get('id', '')} has {len(opts)} options, expected 6.")
+
+
+@rule("vm.forbidden-distractor", "question")
+def vm_forbidden_distractor(ctx, q):
+    """No option is the forbidden distractor 'sex'."""
+    qid, word = q.get("id", ""), q.get("word", "")
+    for idx_o, opt in enumerate(q.get("options", [])):
+        if str(opt).lower() == 'sex' and word.lower() != 'sex':
+            ctx.report(qid, "Forbidden Distractor", f"Question {qid} ({word}): option [{idx_o}] contains forbidden distractor 'sex'.")
+
+
+@rule("vm.distractor-pos", "question")
+def vm_distractor_pos(ctx, q):
+    """Cn2En / Cloze distractors from the vocab guide share the target word's part of speech."""
+    if q.get("type") not in ["Cn2En", "Cloze"]:
+        return
+    qid, word = q.get("id", ""), q.get("word", "")
+    pos_map = word_pos_map(ctx)
+    target_pos = pos_map.get(word, get_pos(q.get("meaning", ""), word))
+    for opt in q.get("options", []):
+        opt_pos = pos_map.get(str(opt), "unknown")
+        if target_pos != "unknown" and opt_pos != "unknown" and target_pos != opt_pos:
+            ctx.report(qid, "Distractor PoS Mismatch",
+                       f"Question {qid} ({word} [{target_pos}]): distractor '{opt}' has mismatching PoS [{opt_pos}].")
+
+
+@rule("vm.cloze-context-blank", "question")
+def vm_cloze_context_blank(ctx, q):
+    """Cloze context sentences contain no blank placeholder."""
+    if q.get("type") == "Cloze":
+        ctx_sentence = q.get("context_sentence", "")
+        if ctx_sentence and ("____" in ctx_sentence or "___" in ctx_sentence):
+            ctx.report(q.get("id", ""), "Context Sentence Blank", f"Context sentence contains blank placeholder: '{ctx_sentence}'")
+
+
+@rule("vm.coverage", "question")
+def _vm_tested_word(ctx, q):
+    ctx.seen("vm_tested").add(q.get("word", ""))
+
+
+@rule("vm.coverage", "end")
+def vm_coverage(ctx, vm):
+    """Every non-proper vocabulary item is tested by at least one question."""
+    missing_coverage = set([v["word"] for v in non_proper_vocab(ctx)]) - ctx.seen("vm_tested")
     if missing_coverage:
-        issues.append({
-            "json_file": filename,
-            "rule_section": "2. Vocab Master (VM)",
-            "item_id": "Vocabulary Coverage",
-            "issue_type": "Missing Item Coverage",
-            "description": f"The following {len(missing_coverage)} non-proper vocabulary items were not tested in VM: {list(missing_coverage)}"
-        })
+        ctx.report("Vocabulary Coverage", "Missing Item Coverage",
+                   f"The following {len(missing_coverage)} non-proper vocabulary items were not tested in VM: {list(missing_coverage)}")
+
+
+# 3. Spelling Hero (SH)
+
+@rule("sh.coverage", "word")
+def _sh_present_word(ctx, w):
+    ctx.seen("sh_words").add(w.get("word"))
+
+
+@rule("sh.coverage", "end")
+def sh_coverage(ctx, sh):
+    """Every single-word vocabulary item has a spelling word."""
+    single_words_vg = [v["word"] for v in ctx.vg_vocab if " " not in v["word"].strip()]
+    missing_sh = set(single_words_vg) - ctx.seen("sh_words")
+    if missing_sh:
+        ctx.report("Coverage", "Missing Single Words", f"Single-word vocabulary items missing from Spelling Hero: {missing_sh}")
+
+
+@rule("sh.id-format", "word")
+def sh_id_format(ctx, w):
+    """Word IDs are 8-character alphanumeric strings."""
+    wid, wstr = w.get("id", ""), w.get("word", "")
+    if len(wid) != 8 or not wid.isalnum():
+        ctx.report(wstr, "ID Format", f"Word ID '{wid}' for '{wstr}' is not an 8-character alphanumeric string.")
+
+
+def chunk_id(ctx):
+    return f"{ctx.scope.get('word', '')}_chunk_{ctx.index}"
+
+
+@rule("sh.chunk-option-count", "chunk")
+def sh_chunk_option_count(ctx, chunk):
+    """Every chunk has exactly 3 options."""
+    opts = chunk.get("options", [])
+    if len(opts) != 3:
+        ctx.report(chunk_id(ctx), "Option Count", f"Chunk options count is {len(opts)}, expected 3.")
+
+
+@rule("sh.chunk-logic", "chunk")
+def sh_chunk_logic(ctx, chunk):
+    """The correct chunk is one of its options."""
+    correct, opts = chunk.get("correct"), chunk.get("options", [])
+    if correct not in opts:
+        ctx.report(chunk_id(ctx), "Logic Error", f"Correct chunk '{correct}' is not included in options {opts}.")
+
+
+@rule("sh.chunk-duplicate-options", "chunk")
+def sh_chunk_duplicate_options(ctx, chunk):
+    """Chunk options are distinct."""
+    opts = chunk.get("options", [])
+    if len(set(opts)) != len(opts):
+        ctx.report(chunk_id(ctx), "Duplicate Options", f"Chunk options contain duplicates: {opts}")
+
+
+# 4. Sentence Architect (SA)
+
+CONTRACTIONS_MAP = {
+    "he's": ["he", "is"], "she's": ["she", "is"], "it's": ["it", "is"],
+    "they're": ["they", "are"], "we're": ["we", "are"], "you're": ["you", "are"],
+    "i'm": ["i", "am"], "isn't": ["is", "not"], "aren't": ["are", "not"],
+    "haven't": ["have", "not"], "hasn't": ["has", "not"], "don't": ["do", "not"],
+    "doesn't": ["does", "not"]
+}
+
+
+@rule("sa.challenge-count", "document")
+def sa_challenge_count(ctx, sa):
+    """Exactly 5 challenges."""
+    challenges = sa.get("challenges", [])
+    if len(challenges) != 5:
+        ctx.report("Structure", "Challenge Count", f"Expected 5 challenges, found {len(challenges)}.")
+
+
+@rule("sa.item-count", "challenge")
+def sa_item_count(ctx, c):
+    """Every challenge has exactly 10 sentences."""
+    cdata = c.get("data", [])
+    if len(cdata) != 10:
+        ctx.report(c.get("id", "challenge"), "Item Count", f"Challenge {c.get('id')} has {len(cdata)} items, expected 10.")
+
+
+@rule("sa.id-format", "sentence")
+def sa_id_format(ctx, item):
+    """Sentence IDs are 8-character alphanumeric strings."""
+    sid = item.get("id", "")
+    if len(sid) != 8 or not sid.isalnum():
+        ctx.report(sid or item.get("en", ""), "ID Format", f"Sentence ID '{sid}' is not an 8-character alphanumeric string.")
+
+
+@rule("sa.duplicate-id", "sentence")
+def sa_duplicate_id(ctx, item):
+    """Sentence IDs are unique within the file."""
+    sid = item.get("id", "")
+    seen_ids = ctx.seen("sa_ids")
+    if sid in seen_ids:
+        ctx.report(sid, "Duplicate ID", f"Duplicate sentence ID '{sid}' found.")
+    seen_ids.add(sid)
+
+
+@rule("sa.expanded-contraction", "sentence")
+def sa_expanded_contraction(ctx, item):
+    """Accept variations keep the contractions of "en"."""
+    sid, en = item.get("id", ""), item.get("en", "")
+    for acc in item.get("accept", []):
+        acc_lower = acc.lower()
+        for contr, expanded in CONTRACTIONS_MAP.items():
+            if contr in en.lower() and expanded[0] in acc_lower and expanded[1] in acc_lower and contr not in acc_lower:
+                ctx.report(sid, "Expanded Contraction in Accept", f"Accept variation '{acc}' expands contraction '{contr}' from en '{en}'.")
+
+
+# 5. Recall Map (RM)
+
+@rule("rm.root-state", "document")
+def rm_root_state(ctx, rm):
+    """The root node's state is 'emoji'."""
+    tree = rm.get("tree", {})
+    if tree.get("state") != "emoji":
+        ctx.report("root", "Root State", f"Root node state is '{tree.get('state')}', expected 'emoji'.")
+
+
+@rule("rm.pu1-stories", "document")
+def rm_pu1_stories(ctx, rm):
+    """PU1 units have a Stories branch with Friendly Farm and Literature sub-branches."""
+    if not ctx.is_pu1:
+        return
+    children = rm.get("tree", {}).get("children", [])
+    stories_node = next((c for c in children if "story" in c.get("id", "").lower() or "stories" in c.get("id", "").lower()), None)
+    if not stories_node:
+        ctx.report("root", "Missing Stories Branch", "Root node does not contain a 'Stories' branch.")
+        return
+    st_children = stories_node.get("children", [])
+    st_texts = [sc.get("text", "") for sc in st_children]
+    st_ids = [sc.get("id", "") for sc in st_children]
+
+    has_ff = any("friendly farm" in t.lower() or "friendly_farm" in i.lower() for t, i in zip(st_texts, st_ids))
+    has_lit = any("literature" in t.lower() or "lit" in i.lower() or "how cows got" in t.lower() for t, i in zip(st_texts, st_ids))
+
+    if not has_ff:
+        ctx.report("stories", "Missing Friendly Farm", "Stories branch missing required PU1 'The Friendly Farm' summary sub-branch.")
+    if not has_lit:
+        ctx.report("stories", "Missing Literature", "Stories branch missing required PU1 'Literature' summary sub-branch.")
+
+
+@rule("rm.missing-emoji", "tree_node")
+def rm_missing_emoji(ctx, node):
+    """Every node has an emoji."""
+    if not node.get("emoji"):
+        nid = node.get("id", "")
+        ctx.report(nid, "Missing Emoji", f"Node '{nid}' ({node.get('text')}) is missing an emoji.")
+
+
+# 6. Text Navigator (TN)
+
+@rule("tn.pu1-sections", "document")
+def tn_pu1_sections(ctx, tn):
+    """PU1 units have 'The Friendly Farm' and 'Literature' sections."""
+    if not ctx.is_pu1:
+        return
+    sec_names = [s.get("section") for s in tn.get("sections", [])]
+    if "The Friendly Farm" not in sec_names:
+        ctx.report("sections", "Missing Section", "Missing required PU1 section 'The Friendly Farm'.")
+    if "Literature" not in sec_names:
+        ctx.report("sections", "Missing Section", "Missing required PU1 section 'Literature'.")
+
+
+@rule("tn.nesting-depth", "tree_node")
+def tn_nesting_depth(ctx, node):
+    """Trees nest at most 4 levels below the root."""
+    if ctx.depth > 4:
+        nid = node.get("id", "")
+        ctx.report(f"{ctx.scope.get('section', '')}:{nid}", "Nesting Depth Exceeded",
+                   f"Node '{nid}' at depth {ctx.depth} exceeds max allowed nesting depth of 4 levels.")
+
+
+@rule("tn.speaker-prefix", "tree_node")
+def tn_speaker_prefix(ctx, node):
+    """Node text does not repeat the speaker as a "Speaker:" prefix."""
+    text = node.get("text", "")
+    speaker = node.get("speaker")
+    if speaker and text.startswith(speaker + ":"):
+        ctx.report(f"{ctx.scope.get('section', '')}:{node.get('id', '')}", "Speaker Prefix in Text",
+                   f"Text '{text}' contains redundant speaker prefix '{speaker}:'.")
 
-    return issues
 
 def audit_vocab_master_llm(vm, filename, use_high=False):
     issues = []
@@ -305,136 +471,6 @@ Output ONLY raw JSON array, no markdown wrappers. If all questions are good, ret
     print(f"🤖 [LLM AUDIT] Finished. Total LLM distractor issues identified: {len(issues)}")
     return issues
 
-def audit_spelling_hero(sh, vg, filename):
-    issues = []
-    sp_words = sh.get("spelling_words", [])
-    vg_vocab = vg.get("unit_vocabulary", []) if vg else []
-    single_words_vg = [v["word"] for v in vg_vocab if " " not in v["word"].strip()]
-
-    sh_words_set = set([w.get("word") for w in sp_words])
-    missing_sh = set(single_words_vg) - sh_words_set
-    if missing_sh:
-        issues.append({
-            "json_file": filename,
-            "rule_section": "3. Spelling Hero (SH)",
-            "item_id": "Coverage",
-            "issue_type": "Missing Single Words",
-            "description": f"Single-word vocabulary items missing from Spelling Hero: {missing_sh}"
-        })
-
-    for w in sp_words:
-        wid = w.get("id", "")
-        wstr = w.get("word", "")
-        if len(wid) != 8 or not wid.isalnum():
-            issues.append({
-                "json_file": filename,
-                "rule_section": "3. Spelling Hero (SH)",
-                "item_id": wstr,
-                "issue_type": "ID Format",
-                "description": f"Word ID '{wid}' for '{wstr}' is not an 8-character alphanumeric string."
-            })
-
-        chunks = w.get("chunks", [])
-        for c_idx, chunk in enumerate(chunks):
-            correct = chunk.get("correct")
-            opts = chunk.get("options", [])
-            if len(opts) != 3:
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "3. Spelling Hero (SH)",
-                    "item_id": f"{wstr}_chunk_{c_idx}",
-                    "issue_type": "Option Count",
-                    "description": f"Chunk options count is {len(opts)}, expected 3."
-                })
-            if correct not in opts:
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "3. Spelling Hero (SH)",
-                    "item_id": f"{wstr}_chunk_{c_idx}",
-                    "issue_type": "Logic Error",
-                    "description": f"Correct chunk '{correct}' is not included in options {opts}."
-                })
-            if len(set(opts)) != len(opts):
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "3. Spelling Hero (SH)",
-                    "item_id": f"{wstr}_chunk_{c_idx}",
-                    "issue_type": "Duplicate Options",
-                    "description": f"Chunk options contain duplicates: {opts}"
-                })
-
-    return issues
-
-def audit_sentence_architect(sa, filename):
-    issues = []
-    challenges = sa.get("challenges", [])
-    if len(challenges) != 5:
-        issues.append({
-            "json_file": filename,
-            "rule_section": "4. Sentence Architect (SA)",
-            "item_id": "Structure",
-            "issue_type": "Challenge Count",
-            "description": f"Expected 5 challenges, found {len(challenges)}."
-        })
-
-    seen_ids = set()
-    contractions_map = {
-        "he's": ["he", "is"], "she's": ["she", "is"], "it's": ["it", "is"],
-        "they're": ["they", "are"], "we're": ["we", "are"], "you're": ["you", "are"],
-        "i'm": ["i", "am"], "isn't": ["is", "not"], "aren't": ["are", "not"],
-        "haven't": ["have", "not"], "hasn't": ["has", "not"], "don't": ["do", "not"],
-        "doesn't": ["does", "not"]
-    }
-
-    for c in challenges:
-        cdata = c.get("data", [])
-        if len(cdata) != 10:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "4. Sentence Architect (SA)",
-                "item_id": c.get("id", "challenge"),
-                "issue_type": "Item Count",
-                "description": f"Challenge {c.get('id')} has {len(cdata)} items, expected 10."
-            })
-
-        for item in cdata:
-            sid = item.get("id", "")
-            en = item.get("en", "")
-            noise = item.get("noise", [])
-            accept = item.get("accept", [])
-
-            if len(sid) != 8 or not sid.isalnum():
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "4. Sentence Architect (SA)",
-                    "item_id": sid or en,
-                    "issue_type": "ID Format",
-                    "description": f"Sentence ID '{sid}' is not an 8-character alphanumeric string."
-                })
-            if sid in seen_ids:
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "4. Sentence Architect (SA)",
-                    "item_id": sid,
-                    "issue_type": "Duplicate ID",
-                    "description": f"Duplicate sentence ID '{sid}' found."
-                })
-            seen_ids.add(sid)
-
-            for acc in accept:
-                acc_lower = acc.lower()
-                for contr, expanded in contractions_map.items():
-                    if contr in en.lower() and expanded[0] in acc_lower and expanded[1] in acc_lower and contr not in acc_lower:
-                        issues.append({
-                            "json_file": filename,
-                            "rule_section": "4. Sentence Architect (SA)",
-                            "item_id": sid,
-                            "issue_type": "Expanded Contraction in Accept",
-                            "description": f"Accept variation '{acc}' expands contraction '{contr}' from en '{en}'."
-                        })
-
-    return issues
-
 def audit_sentence_architect_llm(sa, filename, use_high=False):
     issues = []
     genai_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -544,146 +580,12 @@ Output ONLY raw JSON array, no markdown wrappers. If all sentences are good, ret
     print(f"🤖 [LLM AUDIT] Finished. Total LLM SA noise issues identified: {len(issues)}")
     return issues
 
-def audit_recall_map(rm, unit_path, filename):
-    issues = []
-    tree = rm.get("tree", {})
-    if tree.get("state") != "emoji":
-        issues.append({
-            "json_file": filename,
-            "rule_section": "5. Recall Map (RM)",
-            "item_id": "root",
-            "issue_type": "Root State",
-            "description": f"Root node state is '{tree.get('state')}', expected 'emoji'."
-        })
-
-    is_pu1 = "PU1" in unit_path.upper() or "B-PU1" in unit_path.upper()
-    if is_pu1:
-        children = tree.get("children", [])
-        stories_node = next((c for c in children if "story" in c.get("id", "").lower() or "stories" in c.get("id", "").lower()), None)
-        if not stories_node:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "5. Recall Map (RM)",
-                "item_id": "root",
-                "issue_type": "Missing Stories Branch",
-                "description": "Root node does not contain a 'Stories' branch."
-            })
-        else:
-            st_children = stories_node.get("children", [])
-            st_texts = [sc.get("text", "") for sc in st_children]
-            st_ids = [sc.get("id", "") for sc in st_children]
-            
-            has_ff = any("friendly farm" in t.lower() or "friendly_farm" in i.lower() for t, i in zip(st_texts, st_ids))
-            has_lit = any("literature" in t.lower() or "lit" in i.lower() or "how cows got" in t.lower() for t, i in zip(st_texts, st_ids))
-
-            if not has_ff:
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "5. Recall Map (RM)",
-                    "item_id": "stories",
-                    "issue_type": "Missing Friendly Farm",
-                    "description": "Stories branch missing required PU1 'The Friendly Farm' summary sub-branch."
-                })
-            if not has_lit:
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "5. Recall Map (RM)",
-                    "item_id": "stories",
-                    "issue_type": "Missing Literature",
-                    "description": "Stories branch missing required PU1 'Literature' summary sub-branch."
-                })
-
-    def check_node(node):
-        nid = node.get("id", "")
-        emoji = node.get("emoji")
-        if not emoji:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "5. Recall Map (RM)",
-                "item_id": nid,
-                "issue_type": "Missing Emoji",
-                "description": f"Node '{nid}' ({node.get('text')}) is missing an emoji."
-            })
-        for child in node.get("children", []):
-            check_node(child)
-
-    check_node(tree)
-    return issues
-
-def audit_text_navigator(tn, unit_path, filename):
-    issues = []
-    sections = tn.get("sections", [])
-    sec_names = [s.get("section") for s in sections]
-    
-    is_pu1 = "PU1" in unit_path.upper() or "B-PU1" in unit_path.upper()
-    if is_pu1:
-        if "The Friendly Farm" not in sec_names:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "6. Text Navigator (TN)",
-                "item_id": "sections",
-                "issue_type": "Missing Section",
-                "description": "Missing required PU1 section 'The Friendly Farm'."
-            })
-        if "Literature" not in sec_names:
-            issues.append({
-                "json_file": filename,
-                "rule_section": "6. Text Navigator (TN)",
-                "item_id": "sections",
-                "issue_type": "Missing Section",
-                "description": "Missing required PU1 section 'Literature'."
-            })
-
-    for sec in sections:
-        sec_name = sec.get("section", "")
-        sec_tree = sec.get("tree", {})
-        
-        def check_tn_node(node, depth):
-            nid = node.get("id", "")
-            if depth > 4:
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "6. Text Navigator (TN)",
-                    "item_id": f"{sec_name}:{nid}",
-                    "issue_type": "Nesting Depth Exceeded",
-                    "description": f"Node '{nid}' at depth {depth} exceeds max allowed nesting depth of 4 levels."
-                })
-            
-            text = node.get("text", "")
-            speaker = node.get("speaker")
-            if speaker and text.startswith(speaker + ":"):
-                issues.append({
-                    "json_file": filename,
-                    "rule_section": "6. Text Navigator (TN)",
-                    "item_id": f"{sec_name}:{nid}",
-                    "issue_type": "Speaker Prefix in Text",
-                    "description": f"Text '{text}' contains redundant speaker prefix '{speaker}:'."
-                })
-
-            for child in node.get("children", []):
-                check_tn_node(child, depth + 1)
-
-        check_tn_node(sec_tree, 0)
-
-    return issues
-
-def main():
-    skip_llm = "--no-llm" in sys.argv or "--skip-llm" in sys.argv
-    use_llm = not skip_llm
-    use_high = "high" in sys.argv or "--high" in sys.argv
-    for flag in ["--llm", "--no-llm", "--skip-llm", "high", "--high"]:
-        if flag in sys.argv:
-            sys.argv.remove(flag)
-
-    if len(sys.argv) < 2:
-        print("Usage: python3 scripts/genai/audit-scripts/audit_unit.py <unit_folder_path> [--no-llm] [--high]")
-        sys.exit(1)
-
-    unit_dir = sys.argv[1].rstrip("/")
-    if not os.path.isdir(unit_dir):
-        print(f"Error: Directory '{unit_dir}' does not exist.")
-        sys.exit(1)
-
+def run_audit(unit_dir, use_llm=True, use_high=False, output_dir="scripts/genai/audit-reports", rules=None):
+    """
+    Audits every practice JSON in unit_dir and writes the markdown report.
+    `rules` (comma-separated globs such as "vm.*,sh.coverage") limits the rule-based
+    checks to the matching rules; all run by default. Returns (report_path, issues).
+    """
     unit_name = os.path.basename(unit_dir)
     print(f"Auditing practice JSONs in: {unit_dir} (LLM Audit: {use_llm})")
 
@@ -707,24 +609,16 @@ def main():
         else:
             data[k] = None
 
-    all_issues = []
+    enabled = select_rules(rules) if rules else None
+    llm_audits = {"vm": audit_vocab_master_llm, "sa": audit_sentence_architect_llm}
 
-    if data["vg"]:
-        all_issues.extend(audit_vocab_guide(data["vg"], files["vg"]))
-    if data["vm"]:
-        all_issues.extend(audit_vocab_master(data["vm"], data["vg"], files["vm"]))
-        if use_llm:
-            all_issues.extend(audit_vocab_master_llm(data["vm"], files["vm"], use_high))
-    if data["sh"]:
-        all_issues.extend(audit_spelling_hero(data["sh"], data["vg"], files["sh"]))
-    if data["sa"]:
-        all_issues.extend(audit_sentence_architect(data["sa"], files["sa"]))
-        if use_llm:
-            all_issues.extend(audit_sentence_architect_llm(data["sa"], files["sa"], use_high))
-    if data["rm"]:
-        all_issues.extend(audit_recall_map(data["rm"], unit_dir, files["rm"]))
-    if data["tn"]:
-        all_issues.extend(audit_text_navigator(data["tn"], unit_dir, files["tn"]))
+    all_issues = []
+    for k in ["vg", "vm", "sh", "sa", "rm", "tn"]:
+        if not data[k]:
+            continue
+        all_issues.extend(audit_file(k, data[k], files[k], unit_dir, vg=data["vg"], enabled=enabled))
+        if use_llm and k in llm_audits:
+            all_issues.extend(llm_audits[k](data[k], files[k], use_high))
 
     # Deduplicate issues per (json_file, item_id, issue_type) so each issue type gets its own line
     merged_issues = []
@@ -746,7 +640,6 @@ def main():
     all_issues = merged_issues
 
     # Generate Markdown Report
-    output_dir = "scripts/genai/audit-reports"
     os.makedirs(output_dir, exist_ok=True)
     report_path = os.path.join(output_dir, f"{unit_name}-audit-report.md")
 
@@ -754,6 +647,10 @@ def main():
         f"# Audit Report: Practice JSONs for `{unit_dir}`\n",
         f"**Target Directory:** `{unit_dir}`  ",
         f"**Audit Standard:** Rules specified in `GEMINI.md`  ",
+    ]
+    if enabled is not None:
+        report_lines.append(f"**Rules Enabled:** {', '.join(f'`{r}`' for r in sorted(enabled))}  ")
+    report_lines += [
         f"**Total Issues Identified:** {len(all_issues)}\n",
         "---\n",
         "## Summary by File\n"
@@ -785,6 +682,45 @@ def main():
     with open(report_path, "w", encoding="utf-8") as f:
         f.write("\n".join(report_lines) + "\n")
 
+    return report_path, all_issues
+
+def main():
+    skip_llm = "--no-llm" in sys.argv or "--skip-llm" in sys.argv
+    use_llm = not skip_llm
+    use_high = "high" in sys.argv or "--high" in sys.argv
+    for flag in ["--llm", "--no-llm", "--skip-llm", "high", "--high"]:
+        if flag in sys.argv:
+            sys.argv.remove(flag)
+
+    rules = None
+    if "--rules" in sys.argv:
+        i = sys.argv.index("--rules")
+        rules = sys.argv[i + 1] if i + 1 < len(sys.argv) else ""
+        del sys.argv[i:i + 2]
+
+    if "--list-rules" in sys.argv:
+        for name, node_types, doc in rule_summary():
+            print(f"{name:<28} [{node_types}] {doc}")
+        return
+
+    if len(sys.argv) < 2:
+        print("Usage: python3 scripts/genai/audit-scripts/audit_unit.py <unit_folder_path> [--no-llm] [--high] [--rules PATTERNS]")
+        sys.exit(1)
+
+    unit_dir = sys.argv[1].rstrip("/")
+    if not os.path.isdir(unit_dir):
+        print(f"Error: Directory '{unit_dir}' does not exist.")
+        sys.exit(1)
+
+    try:
+        enabled = select_rules(rules) if rules else None
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if enabled is not None:
+        print(f"Rules enabled: {', '.join(sorted(enabled))}")
+
+    report_path, all_issues = run_audit(unit_dir, use_llm, use_high, rules=rules)
     print(f"Audit completed. Found {len(all_issues)} issue(s).")
     print(f"Report saved to: {report_path}")
 
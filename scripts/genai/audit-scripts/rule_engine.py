@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+rule_engine.py — Single-pass visitor engine behind audit_unit.py.
+
+Audit rules register as visitors on a (file kind, node type) pair. For each practice
+JSON the walker for its kind traverses the document ONCE and hands every node to the
+rules registered for that node type, so adding a rule adds one call per matching node
+instead of another loop over the file, and audit time stays linear in the file size.
+
+Node types per file kind (in traversal order):
+    vg:  document, vocab, end
+    vm:  document, challenge, question, end
+    sh:  document, word, chunk, end
+    sa:  document, challenge, sentence, end
+    rm:  document, tree_node, end
+    tn:  document, section, tree_node, end
+
+While a rule runs, ctx.scope is the enclosing item (the challenge of a question or
+sentence, the spelling word of a chunk, the section of a text-navigator node),
+ctx.index the node's position in its list and ctx.depth its depth in its tree (0 for
+the root). A rule that needs to see every node before deciding (e.g. vocabulary
+coverage) registers one visitor that collects into ctx.seen(...) and another on "end"
+under the same name, so enabling the rule enables both.
+
+Usage (in audit_unit.py):
+    @rule("vm.option-count", "question")
+    def vm_option_count(ctx, q):
+        if len(q.get("options", [])) != 6:
+            ctx.report(q.get("id", ""), "Option Count", "...")
+
+    issues = audit_file("vm", data, filename, unit_dir, vg=vg_data, enabled=select_rules("vm.*"))
+"""
+
+import fnmatch
+import os
+import sys
+from functools import cached_property
+
+GENAI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if GENAI_DIR not in sys.path:
+    sys.path.insert(0, GENAI_DIR)
+
+from tree_walk import walk
+
+RULE_SECTIONS = {
+    "vg": "1. Vocab Guide Extraction (VGE)",
+    "vm": "2. Vocab Master (VM)",
+    "sh": "3. Spelling Hero (SH)",
+    "sa": "4. Sentence Architect (SA)",
+    "rm": "5. Recall Map (RM)",
+    "tn": "6. Text Navigator (TN)",
+}
+
+# Registered visitors in registration order: (rule name, kind, node_type, fn)
+RULES = []
+
+
+def rule(name, node_type):
+    """Registers the decorated function as a visitor of rule `name` ("<kind>.<rule>") on `node_type` nodes."""
+    kind = name.split(".", 1)[0]
+    if kind not in RULE_SECTIONS:
+        raise ValueError(f"Unknown file kind in rule name: {name}")
+
+    def register(fn):
+        RULES.append((name, kind, node_type, fn))
+        return fn
+    return register
+
+
+def rule_names() -> list:
+    return list(dict.fromkeys(name for name, _, _, _ in RULES))
+
+
+def select_rules(patterns=None) -> set:
+    """
+    Names of the rules matching any of the comma-separated glob `patterns`
+    (e.g. "vm.*,sh.chunk-*"); every registered rule when patterns is empty.
+    """
+    if not patterns:
+        return set(rule_names())
+    wanted = [p.strip() for p in patterns.split(",") if p.strip()]
+    selected = {name for name in rule_names() if any(fnmatch.fnmatchcase(name, p) for p in wanted)}
+    if not selected:
+        raise ValueError(f"No audit rules match '{patterns}'")
+    return selected
+
+
+def rule_summary():
+    """[(name, node types, first docstring line)] for every registered rule."""
+    summary = {}
+    for name, _, node_type, fn in RULES:
+        types_, doc = summary.get(name, ([], ""))
+        types_.append(node_type)
+        summary[name] = (types_, doc or (fn.__doc__ or "").strip().split("\n")[0])
+    return [(name, ", ".join(types_), doc) for name, (types_, doc) in summary.items()]
+
+
+class AuditContext:
+    """Per-file state shared by the rules: source data, reported issues and rule scratch space."""
+
+    def __init__(self, kind, filename, unit_path, vg=None):
+        self.kind = kind
+        self.filename = filename
+        self.unit_path = unit_path
+        self.vg = vg
+        self.issues = []
+        # Scratch space for rules that accumulate across nodes (seen IDs, tested words)
+        self.state = {}
+        self.scope = None
+        self.index = 0
+        self.depth = 0
+
+    def report(self, item_id, issue_type, description):
+        self.issues.append({
+            "json_file": self.filename,
+            "rule_section": RULE_SECTIONS[self.kind],
+            "item_id": item_id,
+            "issue_type": issue_type,
+            "description": description
+        })
+
+    def seen(self, key) -> set:
+        """A set that persists for this file under `key` (e.g. IDs seen so far)."""
+        return self.state.setdefault(key, set())
+
+    @cached_property
+    def vg_vocab(self) -> list:
+        return self.vg.get("unit_vocabulary", []) if self.vg else []
+
+    @cached_property
+    def is_pu1(self) -> bool:
+        return "PU1" in self.unit_path.upper() or "B-PU1" in self.unit_path.upper()
+
+
+# Walkers yield (node_type, node, scope, index, depth) events for one document
+
+def _walk_tree(root, scope):
+    """Pre-order tree_node events for a recall-map / text-navigator tree (see tree_walk.py)."""
+    for node, _, depth, index, _ in walk(root):
+        yield "tree_node", node, scope, index, depth
+
+
+def _walk_vg(doc):
+    for i, item in enumerate(doc.get("unit_vocabulary", [])):
+        yield "vocab", item, None, i, 0
+
+
+def _walk_vm(doc):
+    for i, c in enumerate(doc.get("challenges", [])):
+        yield "challenge", c, None, i, 0
+        for j, q in enumerate(c.get("questions", [])):
+            yield "question", q, c, j, 1
+
+
+def _walk_sh(doc):
+    for i, w in enumerate(doc.get("spelling_words", [])):
+        yield "word", w, None, i, 0
+        for j, chunk in enumerate(w.get("chunks", [])):
+            yield "chunk", chunk, w, j, 1
+
+
+def _walk_sa(doc):
+    for i, c in enumerate(doc.get("challenges", [])):
+        yield "challenge", c, None, i, 0
+        for j, item in enumerate(c.get("data", [])):
+            yield "sentence", item, c, j, 1
+
+
+def _walk_rm(doc):
+    yield from _walk_tree(doc.get("tree", {}), None)
+
+
+def _walk_tn(doc):
+    for i, sec in enumerate(doc.get("sections", [])):
+        yield "section", sec, None, i, 0
+        yield from _walk_tree(sec.get("tree", {}), sec)
+
+
+WALKERS = {"vg": _walk_vg, "vm": _walk_vm, "sh": _walk_sh, "sa": _walk_sa, "rm": _walk_rm, "tn": _walk_tn}
+
+
+def _visitors(kind, enabled):
+    """{node_type: [fn]} for the enabled rules of `kind`, in registration order."""
+    visitors = {}
+    for name, rule_kind, node_type, fn in RULES:
+        if rule_kind == kind and (enabled is None or name in enabled):
+            visitors.setdefault(node_type, []).append(fn)
+    return visitors
+
+
+def audit_file(kind, doc, filename, unit_path, vg=None, enabled=None) -> list:
+    """
+    Runs the enabled rules (all when `enabled` is None) for file kind `kind` over `doc`
+    in a single traversal. Returns the issue dicts in traversal order.
+    """
+    visitors = _visitors(kind, enabled)
+    ctx = AuditContext(kind, filename, unit_path, vg)
+    if not visitors:
+        return ctx.issues
+
+    for fn in visitors.get("document", ()):
+        fn(ctx, doc)
+    get_visitors = visitors.get
+    for node_type, node, scope, index, depth in WALKERS[kind](doc):
+        fns = get_visitors(node_type)
+        if fns:
+            ctx.scope, ctx.index, ctx.depth = scope, index, depth
+            for fn in fns:
+                fn(ctx, node)
+    ctx.scope, ctx.index, ctx.depth = None, 0, 0
+    for fn in visitors.get("end", ()):
+        fn(ctx, doc)
+    return ctx.issues
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+autotune.py — Pick a generator's model / thinking level / temperature profile from data.
+
+Runs one generator over a sample of v2-data units once per candidate profile (the
+grid of --models x --thinking x --temperature), then scores every output with the
+rule-based audit (rule_engine.py) and reports, per candidate:
+  - failed runs (output rejected by schemas.py, or an API error)
+  - rule-based audit issues
+  - model latency (time inside generate_content) and total run time per unit
+  - prompt / output / thinking tokens per unit
+
+Candidates are ranked by failures, then issues, then latency; --write stores the
+best one in generator-profiles.json (see profiles.py).
+
+Each unit runs in a temporary copy (markdown, contents JSON and the unit's other
+outputs as inputs); v2-data, the ID registry and the profiles file (without
+--write) are never modified. With --replay-dir the model calls are replayed from
+the unit's existing output instead of going to the API, which checks the command
+end to end offline but gives every candidate the same output.
+
+Usage:
+    python3 scripts/genai/benchmarks/autotune.py <kind> [--units A3A/a3a-u1,...] [--sample 4] [--seed 0]
+        [--models low,high] [--thinking minimal,low] [--temperature 0.2,0.4]
+        [--workers 1] [--replay-dir DIR] [--api-latency 0.2] [--write] [--verbose]
+
+Example:
+    python3 scripts/genai/benchmarks/autotune.py rm --thinking minimal,low --temperature 0.2,0.3 --sample 6
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GENAI_DIR = Path(__file__).resolve().parents[1]
+REPO_ROOT = GENAI_DIR.parents[1]
+for p in [GENAI_DIR, GENAI_DIR / "audit-scripts"]:
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from config import API_KEY_LOW, API_KEY_HIGH, set_client_factory
+from profiles import check_profile, get_profile, set_profile_override, save_profile, PROFILES_PATH
+from replay_client import ReplayClient
+import prompt_cache
+import id_registry
+from run_all import SCRIPTS
+import audit_unit  # registers the rule-based checks
+from rule_engine import audit_file
+
+DATA_DIR = REPO_ROOT / "v2-data"
+
+# kind -> (generator module, output suffix, input type), e.g. "vg" -> ("gen_1_vg", "-vocab-guide.json", "md")
+GENERATORS = {name[:-3].split("_", 2)[2]: (name[:-3], suffix, in_type) for name, suffix, in_type in SCRIPTS}
+
+_local = threading.local()
+
+
+class _MeteredModels:
+    def __init__(self, models):
+        self._models = models
+
+    def generate_content(self, **kwargs):
+        start = time.perf_counter()
+        response = self._models.generate_content(**kwargs)
+        meter = _local.meter
+        meter["api_s"] += time.perf_counter() - start
+        meter["calls"] += 1
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            meter["prompt_tokens"] += getattr(usage, "prompt_token_count", 0) or 0
+            meter["output_tokens"] += getattr(usage, "candidates_token_count", 0) or 0
+            meter["thinking_tokens"] += getattr(usage, "thoughts_token_count", 0) or 0
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._models, name)
+
+
+class MeteredClient:
+    """Wraps a genai client, timing generate_content calls and summing their token usage for the current run."""
+
+    def __init__(self, client):
+        self._client = client
+        self.models = _MeteredModels(client.models)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def input_file(kind, unit_dir):
+    """The generator's input for a unit (mirrors run_all.py), or None when the unit has none."""
+    _, _, in_type = GENERATORS[kind]
+    md_file = unit_dir / f"{unit_dir.name}.md"
+    if in_type == "vg":
+        path = md_file.with_name(f"{md_file.stem}-vocab-guide.json")
+    elif in_type == "test_md":
+        path = md_file.with_name(f"{md_file.stem}-test.md")
+    else:
+        path = md_file
+    return path if path.exists() and md_file.exists() else None
+
+
+def eligible_units(kind) -> list:
+    """"BOOK/unit" names in v2-data that have the generator's input and an existing output to compare."""
+    _, suffix, _ = GENERATORS[kind]
+    units = []
+    for unit_dir in sorted(DATA_DIR.glob("*/*")):
+        if unit_dir.is_dir() and input_file(kind, unit_dir) and (unit_dir / f"{unit_dir.name}{suffix}").exists():
+            units.append(f"{unit_dir.parent.name}/{unit_dir.name}")
+    return units
+
+
+def stage_unit(kind, unit, dest) -> Path:
+    """Copies a unit's markdown, its other outputs (generator inputs) and the book contents JSON into dest."""
+    _, suffix, _ = GENERATORS[kind]
+    src = DATA_DIR / unit
+    unit_dst = Path(dest) / src.parent.name / src.name
+    unit_dst.mkdir(parents=True, exist_ok=True)
+    for f in src.iterdir():
+        if f.is_file() and f.suffix in (".md", ".json") and not f.name.endswith(suffix):
+            shutil.copy2(f, unit_dst / f.name)
+    for contents in src.parent.glob("*-contents.json"):
+        shutil.copy2(contents, unit_dst.parent / contents.name)
+    return unit_dst
+
+
+def score_output(kind, unit_dir, out_path) -> int:
+    """Number of rule-based audit issues in a generated output (0 for types without rules)."""
+    with open(out_path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    vg = doc if kind == "vg" else None
+    vg_path = unit_dir / f"{unit_dir.name}-vocab-guide.json"
+    if vg is None and vg_path.exists():
+        with open(vg_path, "r", encoding="utf-8") as f:
+            vg = json.load(f)
+    return len(audit_file(kind, doc, out_path.name, str(unit_dir), vg=vg))
+
+
+def run_unit(kind, unit, workspace):
+    """Runs the generator on one staged unit with the active profile. Returns its measurements."""
+    module_name, suffix, _ = GENERATORS[kind]
+    unit_dir = stage_unit(kind, unit, workspace)
+    out_path = unit_dir / f"{unit_dir.name}{suffix}"
+    _local.meter = {"api_s": 0.0, "calls": 0, "prompt_tokens": 0, "output_tokens": 0, "thinking_tokens": 0}
+    _local.original = (DATA_DIR / unit / out_path.name).read_text(encoding="utf-8")
+    result = {"unit": unit, "ok": False, "issues": 0, "error": ""}
+    start = time.perf_counter()
+    try:
+        importlib.import_module(module_name).main([str(input_file(kind, unit_dir))])
+        result["ok"] = out_path.exists()
+    except SystemExit as e:
+        result["error"] = f"exited with status {e.code}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["total_s"] = time.perf_counter() - start
+    result.update(_local.meter)
+    if result["ok"]:
+        result["issues"] = score_output(kind, unit_dir, out_path)
+    return result
+
+
+def evaluate(kind, profile, units, workers, verbose=False) -> list:
+    """Runs every unit with `profile` as the generator's profile. Returns the per-unit results."""
+    set_profile_override(kind, profile)
+    sink = io.StringIO()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stderr(sink)
+            with quiet, (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(sink)):
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    return list(pool.map(lambda u: run_unit(kind, u, tmp), units))
+    finally:
+        set_profile_override(kind, None)
+
+
+def summarize(results) -> dict:
+    n = len(results)
+    return {
+        "units": n,
+        "failed": sum(1 for r in results if not r["ok"]),
+        "issues": sum(r["issues"] for r in results),
+        "api_s": sum(r["api_s"] for r in results) / n,
+        "total_s": sum(r["total_s"] for r in results) / n,
+        "prompt_tokens": sum(r["prompt_tokens"] for r in results) / n,
+        "output_tokens": sum(r["output_tokens"] for r in results) / n,
+        "thinking_tokens": sum(r["thinking_tokens"] for r in results) / n,
+    }
+
+
+def rank_key(summary, is_current=False):
+    """Fewest failures, then fewest issues, then lowest model latency; ties keep the current profile."""
+    return (summary["failed"], summary["issues"], summary["api_s"], not is_current)
+
+
+def profile_label(profile) -> str:
+    return f"{profile['model']}/{profile['thinking_level']}/{profile['temperature']}"
+
+
+def candidate_profiles(current, models, thinking, temperatures) -> list:
+    """Grid of profiles; an empty dimension keeps the current profile's value."""
+    models = models or [current["model"]]
+    thinking = thinking or [current["thinking_level"]]
+    temperatures = temperatures or [current["temperature"]]
+    return [{"model": m, "thinking_level": t, "temperature": temp}
+            for m, t, temp in itertools.product(models, thinking, temperatures)]
+
+
+def split_list(value, cast=str) -> list:
+    return [cast(x.strip()) for x in (value or "").split(",") if x.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure candidate generator profiles on sample units.")
+    parser.add_argument("kind", choices=sorted(GENERATORS), help="Generator output type, e.g. vg, vm, rm")
+    parser.add_argument("--units", default="", help="Comma-separated BOOK/unit names (default: a random sample)")
+    parser.add_argument("--sample", type=int, default=4, help="Number of units to sample when --units is not given")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the unit sample")
+    parser.add_argument("--models", default="", help="Comma-separated tiers to try (low, high)")
+    parser.add_argument("--thinking", default="", help="Comma-separated thinking levels to try (minimal, low, ...)")
+    parser.add_argument("--temperature", default="", help="Comma-separated temperatures to try")
+    parser.add_argument("--workers", type=int, default=1, help="Units run concurrently per candidate")
+    parser.add_argument("--replay-dir", default="", help="Replay model calls from existing outputs (offline dry run)")
+    parser.add_argument("--api-latency", type=float, default=0.2, help="Simulated seconds per replayed model call")
+    parser.add_argument("--write", action="store_true", help=f"Save the best profile to {PROFILES_PATH.name}")
+    parser.add_argument("--verbose", action="store_true", help="Show generator output")
+    args = parser.parse_args()
+
+    units = split_list(args.units)
+    if not units:
+        pool = eligible_units(args.kind)
+        units = sorted(random.Random(args.seed).sample(pool, min(args.sample, len(pool))))
+    if not units:
+        print(f"❌ No v2-data units with input and output for {args.kind}", file=sys.stderr)
+        sys.exit(1)
+
+    current = get_profile(args.kind)
+    try:
+        candidates = [check_profile(p) for p in candidate_profiles(current, split_list(args.models),
+                                                                   split_list(args.thinking),
+                                                                   split_list(args.temperature, float))]
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        # Tuning outputs are thrown away: keep their minted IDs out of the real registry
+        id_registry.REGISTRY_PATH = Path(state_dir) / "id-registry.tsv"
+        if args.replay_dir:
+            os.environ.setdefault(API_KEY_LOW, "replay")
+            os.environ.setdefault(API_KEY_HIGH, "replay")
+            prompt_cache.REGISTRY_PATH = Path(state_dir) / "prompt-cache-registry.json"
+            replay = lambda key: ReplayClient(args.replay_dir, latency=args.api_latency,
+                                              record_fallback=lambda m, c, cfg, text=_local.original: text)
+            set_client_factory(lambda key: MeteredClient(replay(key)))
+        else:
+            from google import genai
+            set_client_factory(lambda key: MeteredClient(genai.Client(api_key=key)))
+
+        print(f"Autotuning {args.kind} over {len(units)} unit(s): {', '.join(units)}")
+        print(f"Current profile: {profile_label(current)}\n")
+        summaries = []
+        try:
+            for profile in candidates:
+                summary = summarize(evaluate(args.kind, profile, units, args.workers, args.verbose))
+                summaries.append((profile, summary))
+                print(f"  ✓ {profile_label(profile)}: {summary['failed']} failed, {summary['issues']} issues, "
+                      f"{summary['api_s']:.2f}s model time/unit", file=sys.stderr)
+        finally:
+            set_client_factory(None)
+
+    print(f"\n{'profile':<22} {'units':>5} {'failed':>6} {'issues':>6} {'api s':>7} {'total s':>7} "
+          f"{'prompt tok':>10} {'output tok':>10} {'think tok':>9}")
+    for profile, s in sorted(summaries, key=lambda ps: rank_key(ps[1], ps[0] == current)):
+        marker = " *" if profile == current else ""
+        print(f"{profile_label(profile) + marker:<22} {s['units']:>5} {s['failed']:>6} {s['issues']:>6} "
+              f"{s['api_s']:>7.2f} {s['total_s']:>7.2f} {s['prompt_tokens']:>10.0f} {s['output_tokens']:>10.0f} "
+              f"{s['thinking_tokens']:>9.0f}")
+    print("(* = current profile; api s / total s / tokens are per unit)")
+
+    best, best_summary = min(summaries, key=lambda ps: rank_key(ps[1], ps[0] == current))
+    print(f"\nBest: {profile_label(best)}")
+    if args.write:
+        if best == current:
+            print(f"Current profile is already the best; {PROFILES_PATH.name} unchanged.")
+        else:
+            save_profile(args.kind, best)
+            print(f"✓ Saved {args.kind} profile to {PROFILES_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+run_benchmarks.py — End-to-end pipeline benchmark over a fixed set of v2-data units.
+
+Runs every generator (in run_all.py order), audit_unit.py (rule-based only) and
+apply_audit_fixes.py against replayed model responses, then reports:
+  - mean per-unit time for each phase: prompt_render, cache_setup, api_wait,
+    json_extraction, post_processing, audit, apply_fixes, write
+  - throughput (units/minute) at several unit-level concurrency levels
+
+Replay fixtures are recorded on the first pass from the existing v2-data JSON
+outputs (the "model response" for each generator is the JSON it produced for that
+unit), so no API key or network access is needed. The v2-data tree is never
+modified; all runs happen in a temporary copy of the unit markdown.
+
+Usage:
+    python3 scripts/genai/benchmarks/run_benchmarks.py [--concurrency 1,2,4] [--api-latency 0.2]
+                                                       [--replay-dir DIR] [--save-baseline] [--tolerance 0.25]
+
+Baselines are stored in scripts/genai/benchmarks/baselines.json. Without
+--save-baseline the run is compared against it and exits non-zero on regression.
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GENAI_DIR = Path(__file__).resolve().parents[1]
+REPO_ROOT = GENAI_DIR.parents[1]
+for p in [GENAI_DIR, GENAI_DIR / "audit-scripts"]:
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from config import API_KEY_LOW, set_client_factory
+from phases import start_recording, stop_recording, phase
+from replay_client import ReplayClient
+import prompt_cache
+import id_registry
+from run_all import SCRIPTS
+import audit_unit
+import apply_audit_fixes
+
+DATA_DIR = REPO_ROOT / "v2-data"
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# Fixed benchmark set: one unit per textbook family, each with a single text-navigator
+BENCH_UNITS = [
+    "A3A/a3a-u1",
+    "B-PU1/b-pu1-u3",
+    "SA1/sa1-u1",
+    "A8A/a8a-u2",
+]
+
+PHASES = ["prompt_render", "cache_setup", "api_wait", "json_extraction", "post_processing", "audit", "apply_fixes", "write"]
+
+# Phases faster than this (ms) are too noisy to flag as regressions
+MIN_REGRESSION_MS = 2.0
+
+
+def stage_workspace(units, dest):
+    """Copies each unit's markdown (and the book-level contents JSON) into dest. Returns unit dirs."""
+    unit_dirs = []
+    for unit in units:
+        src = DATA_DIR / unit
+        book_src = src.parent
+        book_dst = Path(dest) / book_src.name
+        unit_dst = book_dst / src.name
+        unit_dst.mkdir(parents=True, exist_ok=True)
+        for md in src.glob("*.md"):
+            shutil.copy2(md, unit_dst / md.name)
+        for contents in book_src.glob("*-contents.json"):
+            shutil.copy2(contents, book_dst / contents.name)
+        unit_dirs.append(unit_dst)
+    return unit_dirs
+
+
+def unit_jobs(unit_dir):
+    """Yields (module_name, argv, out_suffix) for each generator, mirroring run_all.py input rules."""
+    md_file = unit_dir / f"{unit_dir.name}.md"
+    for script_name, out_suffix, in_type in SCRIPTS:
+        if in_type == "vg":
+            input_file = md_file.with_name(f"{md_file.stem}-vocab-guide.json")
+        elif in_type == "test_md":
+            input_file = md_file.with_name(f"{md_file.stem}-test.md")
+            if not input_file.exists():
+                continue
+        else:
+            input_file = md_file
+        yield script_name[:-3], [str(input_file)], out_suffix
+
+
+def run_unit(unit_dir, report_dir):
+    """Runs the full pipeline for one unit and returns {phase: seconds}."""
+    start_recording()
+    try:
+        for module_name, argv, _ in unit_jobs(unit_dir):
+            importlib.import_module(module_name).main(list(argv))
+        with phase("audit"):
+            report_path, _ = audit_unit.run_audit(str(unit_dir), use_llm=False, output_dir=str(report_dir))
+        with phase("apply_fixes"):
+            report_content = Path(report_path).read_text(encoding="utf-8")
+            apply_audit_fixes.apply_fixes(report_path, report_content, str(unit_dir))
+    finally:
+        timings = stop_recording()
+    return timings
+
+
+def record_fixtures(units, replay_dir):
+    """Serial pass that records one replay response per (unit, generator) from existing v2-data outputs."""
+    with tempfile.TemporaryDirectory() as tmp:
+        unit_dirs = stage_workspace(units, tmp)
+        for unit, unit_dir in zip(units, unit_dirs):
+            original_dir = DATA_DIR / unit
+            for module_name, argv, out_suffix in unit_jobs(unit_dir):
+                out_name = f"{unit_dir.name}{out_suffix}"
+                original = (original_dir / out_name).read_text(encoding="utf-8")
+                set_client_factory(lambda key, text=original: ReplayClient(replay_dir, latency=0.0, record_fallback=lambda m, c, cfg: text))
+                importlib.import_module(module_name).main(list(argv))
+    set_client_factory(None)
+
+
+def measure(units, replay_dir, concurrency, api_latency):
+    """Runs all units with `concurrency` workers. Returns (wall_seconds, [per-unit timings])."""
+    set_client_factory(lambda key: ReplayClient(replay_dir, latency=api_latency))
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            unit_dirs = stage_workspace(units, Path(tmp) / "units")
+            report_dir = Path(tmp) / "reports"
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                results = list(pool.map(lambda d: run_unit(d, report_dir), unit_dirs))
+            wall = time.perf_counter() - start
+    finally:
+        set_client_factory(None)
+    return wall, results
+
+
+def summarize(results):
+    """Mean milliseconds per unit for each phase."""
+    return {p: round(1000 * sum(r.get(p, 0.0) for r in results) / len(results), 2) for p in PHASES}
+
+
+def compare(current, baseline, tolerance):
+    """Returns a list of human-readable regression lines (empty when within tolerance)."""
+    regressions = []
+    for p, ms in current["phases_ms"].items():
+        base = baseline.get("phases_ms", {}).get(p)
+        if base is None:
+            continue
+        if ms > base * (1 + tolerance) and ms - base > MIN_REGRESSION_MS:
+            regressions.append(f"phase {p}: {ms:.2f} ms vs baseline {base:.2f} ms (+{(ms / base - 1) * 100 if base else 0:.0f}%)")
+    for level, upm in current["throughput_upm"].items():
+        base = baseline.get("throughput_upm", {}).get(level)
+        if base is None:
+            continue
+        if upm < base * (1 - tolerance):
+            regressions.append(f"throughput @{level}: {upm:.1f} units/min vs baseline {base:.1f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the genai pipeline against replayed responses.")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated unit-level concurrency levels")
+    parser.add_argument("--api-latency", type=float, default=0.2, help="Simulated seconds per model call")
+    parser.add_argument("--replay-dir", default="", help="Persist/reuse replay fixtures here (default: temp dir)")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Write results to {BASELINE_PATH.name}")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    args = parser.parse_args()
+
+    levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    os.environ.setdefault(API_KEY_LOW, "replay")
+
+    replay_tmp = None
+    replay_dir = args.replay_dir
+    if not replay_dir:
+        replay_tmp = tempfile.TemporaryDirectory()
+        replay_dir = replay_tmp.name
+
+    # Keep replayed cache names and minted IDs out of the real registries
+    prompt_cache.REGISTRY_PATH = Path(replay_dir) / "prompt-cache-registry.json"
+    id_registry.REGISTRY_PATH = Path(replay_dir) / "id-registry.tsv"
+
+    print(f"Benchmark units: {', '.join(BENCH_UNITS)}")
+    print(f"Recording replay fixtures -> {replay_dir}")
+    sink = io.StringIO()
+    with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+        record_fixtures(BENCH_UNITS, replay_dir)
+
+    phases_ms = None
+    throughput = {}
+    for level in levels:
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            wall, results = measure(BENCH_UNITS, replay_dir, level, args.api_latency)
+        throughput[str(level)] = round(len(BENCH_UNITS) / wall * 60, 1)
+        if phases_ms is None:
+            # Phase breakdown from the lowest concurrency level, free of worker contention
+            phases_ms = summarize(results)
+        print(f"  concurrency {level}: {wall:.2f}s wall, {throughput[str(level)]} units/min")
+
+    if replay_tmp:
+        replay_tmp.cleanup()
+
+    current = {
+        "units": BENCH_UNITS,
+        "api_latency_s": args.api_latency,
+        "phases_ms": phases_ms,
+        "throughput_upm": throughput,
+    }
+
+    print("\nMean time per unit by phase:")
+    for p in PHASES:
+        print(f"  {p:<16} {phases_ms[p]:>10.2f} ms")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"\nBaseline saved to {BASELINE_PATH}")
+        return
+
+    if not BASELINE_PATH.exists():
+        print(f"\nNo baseline at {BASELINE_PATH}; run with --save-baseline to create one.")
+        return
+
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("api_latency_s") != args.api_latency:
+        print(f"\nNote: baseline used --api-latency {baseline.get('api_latency_s')}; throughput comparison may be skewed.")
+
+    regressions = compare(current, baseline, args.tolerance)
+    if regressions:
+        print("\n⚠️ Regressions against baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print("\n✅ No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
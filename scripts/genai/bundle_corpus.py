@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+bundle_corpus.py — Pack a book (or all of v2-data) into one file with an offset index.
+
+v2-data holds one pretty-printed JSON file per practice, which consumers load one
+request and one parse at a time. A bundle stores the same documents as compact JSON
+in a single file, so a consumer loads the index once and then reads any practice,
+or a whole unit, with one seek (or one HTTP Range request).
+
+Two formats:
+
+  pack (default) — length-prefixed records behind a JSON index:
+      b"EPPK" | u8 version | 3 reserved bytes | u32 index length | index JSON | records
+      record = u16 path length | path (UTF-8) | u32 data length | data (compact JSON)
+    All integers are little-endian. The index is
+      {"version": 1, "files": {path: [offset, length]}, "units": {unit directory: [offset, length]}}
+    with offsets counted from the first record (8 + index length bytes into the file).
+    A "files" range is exactly one document's JSON; a "units" range covers all the
+    records of one directory back to back (parse them with the length prefixes).
+
+  sqlite — a `documents` table (path, book, unit, name, data) with an index on
+    (book, unit), for consumers that already speak SQL (e.g. a D1 import).
+
+Paths are relative to v2-data, e.g. "A7B/a7b-u1/a7b-u1-vocab-guide.json". A unit is
+the directory holding a document at any depth ("A7B/a7b-u1",
+"RAZ-B/raz-b-h/raz-b-henrys-hike"); a book's own files, such as its contents file
+("A7B/a7b-contents.json"), have no unit. Every .json document under the books is
+packed; other files are not.
+
+Usage:
+    python3 scripts/genai/bundle_corpus.py [BOOK ...] [--format pack|sqlite] [--output PATH]
+    python3 scripts/genai/bundle_corpus.py --get <bundle> <path | unit directory>
+
+Example:
+    python3 scripts/genai/bundle_corpus.py A7B                  # -> temp/bundles/A7B.pack
+    python3 scripts/genai/bundle_corpus.py A7B A8A              # -> temp/bundles/A7B+A8A.pack
+    python3 scripts/genai/bundle_corpus.py --format sqlite      # whole corpus -> temp/bundles/v2-data.sqlite
+    python3 scripts/genai/bundle_corpus.py --get temp/bundles/A7B.pack A7B/a7b-u1/a7b-u1-vocab-guide.json
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = REPO_ROOT / "v2-data"
+BUNDLE_DIR = REPO_ROOT / "temp" / "bundles"
+
+MAGIC = b"EPPK"
+VERSION = 1
+HEADER = struct.Struct("<4sB3xI")
+PATH_LEN = struct.Struct("<H")
+DATA_LEN = struct.Struct("<I")
+
+FORMATS = {"pack": ".pack", "sqlite": ".sqlite"}
+
+
+def compact(path: Path) -> bytes:
+    """A document re-serialized without indentation (same content as the file)."""
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    return json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def book_dirs(books=None, data_dir=DATA_DIR) -> list:
+    data_dir = Path(data_dir)
+    dirs = [data_dir / b for b in books] if books else sorted(d for d in data_dir.iterdir() if d.is_dir())
+    for book_dir in dirs:
+        if not book_dir.is_dir():
+            raise FileNotFoundError(f"No book directory {book_dir}")
+    return dirs
+
+
+def collect(books=None, data_dir=DATA_DIR) -> list:
+    """[(path relative to data_dir, file)] for every JSON document of the books, grouped by directory."""
+    data_dir = Path(data_dir)
+    docs = []
+    for book_dir in book_dirs(books, data_dir):
+        files = sorted(book_dir.rglob("*.json"), key=lambda f: (f.parent.as_posix(), f.name))
+        docs.extend((f.relative_to(data_dir).as_posix(), f) for f in files)
+    return docs
+
+
+def count_json_files(books=None, data_dir=DATA_DIR) -> int:
+    """Number of .json files under the books on disk (independent of collect())."""
+    return sum(1 for book_dir in book_dirs(books, data_dir)
+               for _, _, names in os.walk(book_dir) for name in names if name.endswith(".json"))
+
+
+def unit_of(path: str):
+    """The directory holding a unit document (e.g. "A7B/a7b-u1"), None for a book-level one."""
+    parent = path.rsplit("/", 1)[0]
+    return parent if "/" in parent else None
+
+
+def write_pack(docs, out_path):
+    """Writes the pack format (see module docstring). Returns the index."""
+    records = bytearray()
+    files, units = {}, {}
+    for path, f in docs:
+        name = path.encode("utf-8")
+        data = compact(f)
+        start = len(records)
+        records += PATH_LEN.pack(len(name)) + name + DATA_LEN.pack(len(data))
+        files[path] = [len(records), len(data)]
+        records += data
+        unit = unit_of(path)
+        if unit:
+            first = units.setdefault(unit, [start, 0])[0]
+            units[unit][1] = len(records) - first
+    index = {"version": VERSION, "files": files, "units": units}
+    index_bytes = json.dumps(index, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+        out.write(index_bytes)
+        out.write(records)
+    os.replace(tmp_path, out_path)
+    return index
+
+
+def write_sqlite(docs, out_path):
+    tmp_path = out_path.with_suffix(out_path.suffix + ".tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE documents (path TEXT PRIMARY KEY, book TEXT NOT NULL, unit TEXT, "
+                     "name TEXT NOT NULL, data TEXT NOT NULL)")
+        conn.executemany(
+            "INSERT INTO documents VALUES (?, ?, ?, ?, ?)",
+            ((path, path.split("/")[0], unit_of(path), path.rsplit("/", 1)[-1], compact(f).decode("utf-8"))
+             for path, f in docs),
+        )
+        conn.execute("CREATE INDEX documents_unit ON documents (book, unit)")
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, out_path)
+
+
+class PackReader:
+    """Reads documents from a pack: the index is loaded once, each document is one seek + read."""
+
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        magic, version, index_len = HEADER.unpack(self._f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version-{VERSION} practice pack")
+        self.index = json.loads(self._f.read(index_len))
+        self._base = HEADER.size + index_len
+
+    def _read(self, offset, length) -> bytes:
+        self._f.seek(self._base + offset)
+        return self._f.read(length)
+
+    def get(self, path):
+        """The document at `path` (relative to v2-data)."""
+        offset, length = self.index["files"][path]
+        return json.loads(self._read(offset, length))
+
+    def get_unit(self, unit) -> dict:
+        """{path: document} for every document of a unit directory, from one contiguous read."""
+        offset, length = self.index["units"][unit]
+        block, pos, docs = self._read(offset, length), 0, {}
+        while pos < len(block):
+            (name_len,) = PATH_LEN.unpack_from(block, pos)
+            pos += PATH_LEN.size
+            name = block[pos:pos + name_len].decode("utf-8")
+            pos += name_len
+            (data_len,) = DATA_LEN.unpack_from(block, pos)
+            pos += DATA_LEN.size
+            docs[name] = json.loads(block[pos:pos + data_len])
+            pos += data_len
+        return docs
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_document(bundle, key):
+    """A document (`key` = path) or {path: document} for a unit (`key` = its directory, e.g. "A7B/a7b-u1") from a bundle."""
+    if Path(bundle).suffix == FORMATS["sqlite"]:
+        conn = sqlite3.connect(f"file:{bundle}?mode=ro", uri=True)
+        try:
+            row = conn.execute("SELECT data FROM documents WHERE path = ?", (key,)).fetchone()
+            if row:
+                return json.loads(row[0])
+            book = key.split("/")[0]
+            rows = conn.execute("SELECT path, data FROM documents WHERE book = ? AND unit = ? ORDER BY path",
+                                (book, key)).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            raise KeyError(key)
+        return {path: json.loads(data) for path, data in rows}
+    with PackReader(bundle) as reader:
+        return reader.get(key) if key in reader.index["files"] else reader.get_unit(key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack v2-data documents into a single indexed file.")
+    parser.add_argument("books", nargs="*", help="Book directories to pack, e.g. A7B (default: all)")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="pack")
+    parser.add_argument("--output", help="Output file (default: temp/bundles/<BOOK[+BOOK...] or v2-data>.<format>)")
+    parser.add_argument("--get", nargs=2, metavar=("BUNDLE", "KEY"),
+                        help="Print one document (path) or one unit (its directory) from a bundle")
+    args = parser.parse_args()
+
+    if args.get:
+        bundle, key = args.get
+        try:
+            doc = get_document(bundle, key)
+        except KeyError:
+            print(f"❌ {key} is not in {bundle}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(doc, ensure_ascii=False, indent=2))
+        return
+
+    try:
+        docs = collect(args.books)
+        on_disk = count_json_files(args.books)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    if len(docs) != on_disk:
+        print(f"❌ Collected {len(docs)} document(s) but found {on_disk} .json file(s) on disk", file=sys.stderr)
+        sys.exit(1)
+    name = "+".join(args.books) if args.books else "v2-data"
+    out_path = Path(args.output) if args.output else BUNDLE_DIR / f"{name}{FORMATS[args.format]}"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    source_bytes = sum(f.stat().st_size for _, f in docs)
+    if args.format == "sqlite":
+        write_sqlite(docs, out_path)
+        units = len({unit_of(path) for path, _ in docs} - {None})
+    else:
+        units = len(write_pack(docs, out_path)["units"])
+    size = out_path.stat().st_size
+    print(f"✓ Packed {len(docs)} document(s) from {units} unit(s): {source_bytes / 1e6:.1f} MB -> "
+          f"{size / 1e6:.1f} MB ({out_path})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
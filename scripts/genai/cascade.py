@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+cascade.py — Low-tier-first model cascade: only failing output goes to the high tier.
+
+By default a generator runs on the low tier and with `high` entirely on the high
+tier. With `cascade` (or `--cascade`) it runs on the low tier, validates the output
+against schemas.py and sends ONLY what failed to the high tier:
+
+  - vocab-master, sentence-architect and spelling-hero repair the failing questions,
+    sentences or words (or whole challenges) through repair.py on the high tier; a
+    violation outside any such fragment (a missing top-level field, a wrong challenge
+    count) regenerates the whole document on the high tier first;
+  - the other output types have no repairable fragments, so a failing document is
+    regenerated on the high tier (and kept when it has fewer violations).
+
+Every cascaded run appends one line to .cascade-ledger.jsonl: output file, item
+count, items escalated and violations left. The escalation rate it reports is the
+share of items that needed the high tier, i.e. how much of the corpus the cheap,
+fast path covers on its own.
+
+Usage:
+    python3 scripts/genai/gen_2_vm.py <vocab-guide.json> cascade
+    python3 scripts/genai/run_all.py data/A4A/a4a-u4 cascade
+    python3 scripts/genai/cascade.py                  # escalation rate per output type
+
+Example (in a generator):
+    parsed, errors, model_name = escalate_fragments(model_name, "vm", parsed, REPAIR_RULES, out_path,
+                                                    prompt=prompt, thinking_level=profile["thinking_level"],
+                                                    normalize=...)
+    parsed, model_name = escalate_document("rm", parsed, prompt, out_path, model_name,
+                                           prefix=unit_source_prefix(source), temperature=0.3)
+"""
+
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from google.genai import types
+from config import get_genai_config, create_client
+from phases import phase
+from prompt_cache import cached_contents, recover_missing_cache, log_usage
+from repair import FRAGMENT_LEVELS, group_violations, get_at, repair_document
+from response_schemas import response_schema
+from schemas import violations, format_keys
+from id_registry import owner_key
+from tree_walk import walk_doc
+
+LEDGER_PATH = Path(__file__).resolve().parent / ".cascade-ledger.jsonl"
+
+# Item lists per output type, outermost first (recall-map / text-navigator items are tree nodes)
+ITEM_LISTS = {
+    "vg": ("unit_vocabulary",),
+    "vm": ("challenges", "questions"),
+    "sh": ("spelling_words",),
+    "sa": ("challenges", "data"),
+    "gw": ("challenges", "questions"),
+    "pd": ("sections", "sentences"),
+    "test": ("sections", "questions"),
+}
+
+_high_tier = None
+
+
+def high_tier():
+    """(client, model_name) for the high tier, created on the first escalation."""
+    global _high_tier
+    if _high_tier is None:
+        api_key, model_name = get_genai_config(True)
+        _high_tier = (create_client(api_key), model_name)
+    return _high_tier
+
+
+def count_items(kind, doc, keys=()) -> int:
+    """Number of items in `doc`, or in the fragment of it at `keys` (see repair.FRAGMENT_LEVELS)."""
+    if kind in ("rm", "tn"):
+        return sum(1 for _ in walk_doc(doc))
+    nodes = [get_at(doc, keys)]
+    for key in ITEM_LISTS[kind][len(keys) // 2:]:
+        nodes = [item for node in nodes if isinstance(node, dict) for item in (node.get(key) or [])]
+    return max(len(nodes), 1) if keys else len(nodes)
+
+
+def record(kind, out_path, low_model, items, escalated, remaining):
+    """Appends one cascaded run to the ledger."""
+    entry = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "kind": kind,
+        "file": owner_key(out_path),
+        "low": low_model,
+        "high": high_tier()[1] if escalated else None,
+        "items": items,
+        "escalated": escalated,
+        "remaining": remaining,
+    }
+    with open(LEDGER_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    rate = escalated / items if items else 0.0
+    print(f"📒 cascade: {escalated}/{items} {kind} item(s) escalated ({rate:.0%}), {remaining} violation(s) left",
+          file=sys.stderr)
+
+
+def escalate_fragments(low_model, kind, doc, rules, out_path, prompt=None, lengths=None, **repair_kwargs):
+    """
+    repair_document() on the high tier for the failing fragments of a low-tier `doc`
+    (repair_kwargs are passed through). Violations outside any repairable fragment (a
+    missing top-level field, a wrong challenge count) first regenerate the whole document
+    on the high tier from the generator's `prompt`, as escalate_document() does.
+    Returns (doc, remaining "path: message" violations, model name that produced it): the
+    high-tier model when it regenerated the document or spliced in any repair, else `low_model`.
+    """
+    levels = FRAGMENT_LEVELS[kind]
+    with phase("post_processing"):
+        found = violations(kind, doc)
+        targets, unrepairable = group_violations(found, levels)
+        items = count_items(kind, doc)
+        escalated = sum(count_items(kind, doc, keys) for keys in targets)
+    model = low_model
+    if unrepairable and prompt is not None:
+        doc, model, found = _regenerate(kind, doc, found, prompt, low_model, prefix=repair_kwargs.get("prefix"),
+                                    display_name=repair_kwargs.get("display_name", ""),
+                                    use_cache=repair_kwargs.get("use_cache", True),
+                                    thinking_level=repair_kwargs.get("thinking_level", "low"),
+                                    temperature=repair_kwargs.get("temperature", 0.2),
+                                    normalize=repair_kwargs.get("normalize"), lengths=lengths)
+        escalated = items
+        with phase("post_processing"):
+            targets, _ = group_violations(found, levels)
+    if targets:
+        print(f"🔧 {kind.upper()}: escalating {len(targets)} failing fragment(s) from {low_model} to the high tier",
+              file=sys.stderr)
+        client, model_name = high_tier()
+        before = json.dumps(doc, sort_keys=True)
+        doc, errors = repair_document(client, model_name, kind, doc, rules, **repair_kwargs)
+        if json.dumps(doc, sort_keys=True) != before:
+            model = model_name
+    else:
+        errors = [f"{format_keys(keys)}: {msg}" for keys, msg in found]
+    record(kind, out_path, low_model, items, escalated, len(errors))
+    return doc, errors, model
+
+
+def _generate(client, model_name, kind, contents, cache_name, thinking_level, temperature, lengths,
+              prefix=None, prompt="", display_name=""):
+    for attempt in range(5):
+        try:
+            return client.models.generate_content(
+                model=model_name,
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    thinking_config=types.ThinkingConfig(thinking_level=thinking_level),
+                    temperature=temperature,
+                    response_mime_type="application/json",
+                    response_json_schema=response_schema(kind, **lengths),
+                    cached_content=cache_name
+                )
+            )
+        except Exception as e:
+            recovered = recover_missing_cache(e, client, model_name, prefix, prompt, cache_name, display_name)
+            if recovered:
+                contents, cache_name = recovered
+                continue
+            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+            if attempt == 4:
+                raise e
+            time.sleep(2 ** attempt)
+
+
+def _regenerate(kind, doc, found, prompt, low_model, prefix=None, display_name="", use_cache=True,
+                thinking_level="low", temperature=0.2, normalize=None, lengths=None):
+    """
+    Regenerates `doc` (which has the `found` violations) on the high tier. Returns
+    (doc, model name that produced it, its violations); the low-tier `doc` is kept when
+    the response is not valid JSON or has more violations.
+    """
+    client, model_name = high_tier()
+    print(f"🔧 {kind.upper()}: {len(found)} violation(s) from {low_model}; regenerating on {model_name}",
+          file=sys.stderr)
+    with phase("cache_setup"):
+        if prefix:
+            contents, cache_name = cached_contents(client, model_name, prefix, prompt,
+                                                   display_name=display_name, use_cache=use_cache)
+        else:
+            contents, cache_name = prompt, None
+    with phase("api_wait"):
+        response = _generate(client, model_name, kind, contents, cache_name, thinking_level, temperature,
+                             lengths or {}, prefix=prefix, prompt=prompt, display_name=display_name)
+    log_usage(response)
+
+    try:
+        with phase("json_extraction"):
+            regenerated = json.loads(response.text)
+    except ValueError as e:
+        print(f"⚠️  High-tier response was not valid JSON: {e}", file=sys.stderr)
+        return doc, low_model, found
+
+    with phase("post_processing"):
+        if normalize is not None:
+            normalize(regenerated)
+        remaining = violations(kind, regenerated)
+    if len(remaining) > len(found):
+        print(f"⚠️  {model_name} output has more violations ({len(remaining)}); keeping the low-tier document",
+              file=sys.stderr)
+        return doc, low_model, found
+    print(f"  ✓ regenerated on {model_name}: {len(remaining)} violation(s) left", file=sys.stderr)
+    return regenerated, model_name, remaining
+
+
+def escalate_document(kind, doc, prompt, out_path, low_model, prefix=None, display_name="", use_cache=True,
+                      thinking_level="low", temperature=0.2, normalize=None, lengths=None):
+    """
+    Regenerates a low-tier `doc` that fails validation on the high tier, with the same
+    prompt (and cached `prefix`, e.g. the unit source) and the generator's post-processing
+    `normalize(doc)`. The regenerated document replaces `doc` unless it has more
+    violations. Returns (doc, model name that produced it).
+    """
+    with phase("post_processing"):
+        found = violations(kind, doc)
+        items = count_items(kind, doc)
+    if not found:
+        record(kind, out_path, low_model, items, 0, 0)
+        return doc, low_model
+
+    doc, model_name, remaining = _regenerate(kind, doc, found, prompt, low_model, prefix=prefix,
+                                             display_name=display_name, use_cache=use_cache,
+                                             thinking_level=thinking_level, temperature=temperature,
+                                             normalize=normalize, lengths=lengths)
+    record(kind, out_path, low_model, items, items, len(remaining))
+    return doc, model_name
+
+
+def load_ledger(path=LEDGER_PATH) -> list:
+    if not Path(path).exists():
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+def summarize(entries) -> dict:
+    """{kind: {"runs", "escalated_runs", "items", "escalated", "remaining"}} plus a "total" row."""
+    rows = {}
+    for e in entries:
+        for key in (e["kind"], "total"):
+            row = rows.setdefault(key, {"runs": 0, "escalated_runs": 0, "items": 0, "escalated": 0, "remaining": 0})
+            row["runs"] += 1
+            row["escalated_runs"] += 1 if e["escalated"] else 0
+            row["items"] += e["items"]
+            row["escalated"] += e["escalated"]
+            row["remaining"] += e["remaining"]
+    if "total" in rows:
+        rows["total"] = rows.pop("total")
+    return rows
+
+
+def main():
+    entries = load_ledger()
+    if not entries:
+        print(f"No cascaded runs recorded yet ({LEDGER_PATH.name}).", file=sys.stderr)
+        return
+    print(f"{'type':<6} {'runs':>5} {'esc.runs':>9} {'items':>7} {'esc.items':>10} {'rate':>6} {'left':>5}")
+    for kind, row in summarize(entries).items():
+        rate = row["escalated"] / row["items"] if row["items"] else 0.0
+        print(f"{kind:<6} {row['runs']:>5} {row['escalated_runs']:>9} {row['items']:>7} "
+              f"{row['escalated']:>10} {rate:>6.1%} {row['remaining']:>5}")
+
+
+if __name__ == "__main__":
+    main()
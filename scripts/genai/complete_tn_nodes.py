@@ -2,6 +2,11 @@
 """
 complete_tn_nodes.py — Complete and fill missing/incorrect fields in a text-navigator JSON via Gemini API.
 
+Only the fields that are actually missing (or suspect, for nodes split from a longer
+sentence) are requested: each node lists the fields to fill, nodes needing the same
+fields are batched together, the response schema only allows the fields the batch
+asks for, and the merge writes back only each node's requested fields.
+
 Usage:
     python3 scripts/genai/complete_tn_nodes.py <path-to-text-navigator.json>
 
@@ -17,158 +22,168 @@ from pathlib import Path
 from google import genai
 from google.genai import types
 from config import get_genai_config, parse_high_flag
+from tree_walk import walk_doc, bulk_update
 
 PROMPT_TEMPLATE = """\
-You are an expert English curriculum designer. Audit the following list of nodes from a primary school English textbook mindmap.
-
-For each node:
-1. Verify "cn" (Chinese translation). It must translate ONLY the English sentence in "text" exactly. If "cn" is empty, incorrect, or contains extra translation (e.g., from a split sentence), update it.
-2. Verify/generate "emoji".
-3. Verify/generate "notes" (brief explanation of difficult vocabulary or grammar).
-4. Verify/generate "statement" (a simple true/false statement in Chinese about the sentence's grammar or vocabulary).
-5. Verify/generate "answer" (boolean true/false for the statement).
-6. Verify/generate "explanation" (concise Chinese explanation for the true/false statement).
-7. Verify/generate "keywords" (comma-separated string of 2-5 trigger words).
-
-Here are the nodes to audit:
+You are an expert English curriculum designer. Complete the following nodes from a primary school English textbook mindmap.
+
+For each node, fill ONLY the fields listed in its "fill" array:
+{field_rules}
+
+If a node below already has a value for a field in its "fill" array, that value is suspect (e.g. the node was split from a longer sentence): verify it and correct it if needed. Any other fields shown are context only.
+
+Here are the nodes:
 {nodes_json}
 
-Return the audited nodes as a JSON array of objects. Each object must contain:
-- "id"
-- "cn"
-- "emoji"
-- "notes"
-- "statement"
-- "answer"
-- "explanation"
-- "keywords"
+Return a JSON array with one object per node, containing "key" (copied from the node) and exactly the fields in its "fill" array.
 
 Output ONLY valid JSON, no markdown formatting or wrappers.
 """
 
-def needs_audit(node):
-    # Determine if node needs audit/fill
-    is_leaf = not node.get("children")
-    
+# Fields every node carries, and the ones only leaves carry
+NODE_FIELDS = ["cn", "emoji"]
+LEAF_FIELDS = ["notes", "statement", "answer", "explanation", "keywords"]
+
+FIELD_RULES = {
+    "cn": '"cn": Chinese translation of ONLY the English sentence in "text", exactly (no extra translation from a split sentence).',
+    "emoji": '"emoji": one emoji that fits the node.',
+    "notes": '"notes": brief explanation of difficult vocabulary or grammar.',
+    "statement": '"statement": a simple true/false statement in Chinese about the sentence\'s grammar or vocabulary.',
+    "answer": '"answer": boolean true/false for the statement.',
+    "explanation": '"explanation": concise Chinese explanation for the true/false statement.',
+    "keywords": '"keywords": comma-separated string of 2-5 trigger words.',
+}
+
+# Existing fields a requested field is written against (sent as context when not requested themselves)
+FIELD_CONTEXT = {"answer": ["statement"], "explanation": ["statement", "answer"]}
+
+def fields_to_fill(node) -> list:
+    """
+    Fields to request for a node: every applicable field for split nodes (their values came
+    from the unsplit sentence), otherwise the missing ones. A missing statement brings its
+    answer and explanation along, since those only make sense for the statement they belong to.
+    """
+    fields = NODE_FIELDS + (LEAF_FIELDS if not node.get("children") else [])
+
     # Always audit split nodes
     if str(node.get("id", "")).startswith("split-"):
-        return True
-        
-    if not node.get("cn"):
-        return True
-        
-    if not node.get("emoji"):
-        return True
-        
-    if is_leaf:
-        if not node.get("notes") or not node.get("statement") or not node.get("explanation") or not node.get("keywords"):
-            return True
-            
-    return False
-
-def collect_nodes(node, nodes_to_audit):
-    if needs_audit(node):
-        audit_node = {
-            "id": node.get("id"),
-            "text": node.get("text"),
-            "cn": node.get("cn", ""),
-            "emoji": node.get("emoji", ""),
-            "notes": node.get("notes", ""),
-            "statement": node.get("statement", ""),
-            "answer": node.get("answer", False),
-            "explanation": node.get("explanation", ""),
-            "keywords": node.get("keywords", "")
-        }
-        if "speaker" in node:
-            audit_node["speaker"] = node["speaker"]
-        nodes_to_audit.append(audit_node)
-    for child in node.get("children", []):
-        collect_nodes(child, nodes_to_audit)
-
-def update_nodes(node, audited_map):
-    node_id = node.get("id")
-    if node_id in audited_map:
-        audit = audited_map[node_id]
-        node["cn"] = audit.get("cn", node.get("cn", ""))
-        node["emoji"] = audit.get("emoji", node.get("emoji", ""))
-        
-        # Only set details for leaves (or nodes that don't have children)
-        if not node.get("children"):
-            node["notes"] = audit.get("notes", node.get("notes", ""))
-            node["statement"] = audit.get("statement", node.get("statement", ""))
-            node["answer"] = audit.get("answer", node.get("answer", False))
-            node["explanation"] = audit.get("explanation", node.get("explanation", ""))
-            node["keywords"] = audit.get("keywords", node.get("keywords", ""))
-            
-    for child in node.get("children", []):
-        update_nodes(child, audited_map)
-
-def extract_json(text: str) -> list:
-    start = text.find("[")
-    if start == -1:
-        start = text.find("{")
-        if start == -1:
-            raise ValueError("No JSON array/object found in response")
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch in ["[", "{"]:
-            depth += 1
-        elif ch in ["]", "}"]:
-            depth -= 1
-            if depth == 0:
-                parsed = json.loads(text[start:i + 1])
-                if isinstance(parsed, dict):
-                    return [parsed]
-                return parsed
-    raise ValueError("Unbalanced JSON in response")
+        return fields
+
+    wanted = {f for f in fields if f != "answer" and not node.get(f)}
+    if "answer" in fields and "answer" not in node:
+        wanted.add("answer")
+    if "statement" in wanted:
+        wanted.update(["answer", "explanation"])
+    return [f for f in fields if f in wanted]
+
+def needs_audit(node):
+    return bool(fields_to_fill(node))
+
+def delta_payload(key, node, fields) -> dict:
+    """The node as sent to the model: key, text, current values of suspect fields, and context fields."""
+    payload = {"key": key, "fill": fields, "text": node.get("text")}
+    if "speaker" in node:
+        payload["speaker"] = node["speaker"]
+    for f in fields:
+        if node.get(f) not in (None, ""):
+            payload[f] = node[f]
+        for dep in FIELD_CONTEXT.get(f, []):
+            if dep not in fields and dep in node:
+                payload[dep] = node[dep]
+    return payload
+
+def collect_nodes(data) -> list:
+    """(node, fields to fill) for every node (in every section's tree) that needs audit, in document order."""
+    targets = []
+    for node, _, _, _, _ in walk_doc(data):
+        fields = fields_to_fill(node)
+        if fields:
+            targets.append((node, fields))
+    return targets
+
+def make_batches(targets, batch_size) -> list:
+    """
+    Batches of (key, node, fields), keyed by position in `targets`. Nodes are ordered by the
+    fields they need so that a batch mostly shares one field set (and a narrow schema).
+    """
+    keyed = [(str(i), node, fields) for i, (node, fields) in enumerate(targets)]
+    rank = {f: i for i, f in enumerate(NODE_FIELDS + LEAF_FIELDS)}
+    keyed.sort(key=lambda t: [rank[f] for f in t[2]])
+    return [keyed[i:i + batch_size] for i in range(0, len(keyed), batch_size)]
+
+def batch_fields(batch) -> list:
+    """Union of the fields a batch asks for, in canonical order."""
+    wanted = {f for _, _, fields in batch for f in fields}
+    return [f for f in NODE_FIELDS + LEAF_FIELDS if f in wanted]
+
+def response_schema(fields):
+    """JSON array of {"key", <fields>} objects; each node returns only its own subset of `fields`."""
+    properties = {"key": types.Schema(type=types.Type.STRING)}
+    for f in fields:
+        properties[f] = types.Schema(type=types.Type.BOOLEAN if f == "answer" else types.Type.STRING)
+    return types.Schema(
+        type=types.Type.ARRAY,
+        items=types.Schema(type=types.Type.OBJECT, properties=properties,
+                           required=["key"], property_ordering=["key", *fields])
+    )
+
+def render_prompt(batch):
+    nodes = [delta_payload(key, node, fields) for key, node, fields in batch]
+    return PROMPT_TEMPLATE.format(
+        field_rules="\n".join(f"- {FIELD_RULES[f]}" for f in batch_fields(batch)),
+        nodes_json=json.dumps(nodes, ensure_ascii=False, indent=2)
+    )
+
+def field_patch(item, fields) -> dict:
+    """The requested fields of one response object, dropping any of the wrong type."""
+    patch = {}
+    for f in fields:
+        value = item.get(f)
+        if isinstance(value, bool if f == "answer" else str):
+            patch[f] = value
+    return patch
 
 def main():
     use_high = parse_high_flag()
     if len(sys.argv) < 2:
         print("Usage: python3 scripts/genai/complete_tn_nodes.py <path-to-json-file>", file=sys.stderr)
         sys.exit(1)
-        
+
     json_path = Path(sys.argv[1])
     if not json_path.exists():
         print(f"Error: File not found at {json_path}", file=sys.stderr)
         sys.exit(1)
-        
+
     with open(json_path, "r", encoding="utf-8") as f:
         data = json.load(f)
-        
-    # Collect all nodes needing audit
-    nodes_to_audit = []
-    
-    # The JSON structure can have a sections array, or be a tree root directly
-    if "sections" in data:
-        for section in data["sections"]:
-            if "tree" in section:
-                collect_nodes(section["tree"], nodes_to_audit)
-    elif "tree" in data:
-        collect_nodes(data["tree"], nodes_to_audit)
-    else:
-        collect_nodes(data, nodes_to_audit)
-        
-    if not nodes_to_audit:
+
+    # Collect all nodes needing audit (the JSON can have a sections array, a tree, or be a tree root directly)
+    targets = collect_nodes(data)
+
+    if not targets:
         print("All nodes look complete! No audit needed.", file=sys.stderr)
         sys.exit(0)
-        
-    print(f"Found {len(nodes_to_audit)} nodes to audit.", file=sys.stderr)
-    
+
+    requested = sum(len(fields) for _, fields in targets)
+    full = sum(len(NODE_FIELDS) + (len(LEAF_FIELDS) if not node.get("children") else 0) for node, _ in targets)
+    print(f"Found {len(targets)} nodes to audit: requesting {requested} of {full} fields.", file=sys.stderr)
+
     # Setup client
     api_key, model_name = get_genai_config(use_high)
     client = genai.Client(api_key=api_key)
-    
+
     # Split into batches of 15 to stay within limits and ensure quality
     batch_size = 15
-    audited_nodes = []
-    
-    for i in range(0, len(nodes_to_audit), batch_size):
-        batch = nodes_to_audit[i:i + batch_size]
-        print(f"Auditing batch {i//batch_size + 1} ({len(batch)} nodes)...", file=sys.stderr)
-        
-        prompt = PROMPT_TEMPLATE.format(nodes_json=json.dumps(batch, ensure_ascii=False, indent=2))
-        
+    batches = make_batches(targets, batch_size)
+    by_key = {}
+    updates = {}
+
+    for b, batch in enumerate(batches, 1):
+        fields = batch_fields(batch)
+        print(f"Auditing batch {b}/{len(batches)} ({len(batch)} nodes: {', '.join(fields)})...", file=sys.stderr)
+
+        prompt = render_prompt(batch)
+
         import time
         response = None
         for attempt in range(5):
@@ -179,7 +194,8 @@ def main():
                     config=types.GenerateContentConfig(
                         thinking_config=types.ThinkingConfig(thinking_level="low"),
                         temperature=0.2,
-                        response_mime_type="application/json"
+                        response_mime_type="application/json",
+                        response_schema=response_schema(fields)
                     )
                 )
                 break
@@ -188,28 +204,23 @@ def main():
                 if attempt == 4:
                     raise e
                 time.sleep(2 ** attempt)
-                
-        batch_audited = extract_json(response.text)
-        audited_nodes.extend(batch_audited)
-        
-    # Map by ID
-    audited_map = {n["id"]: n for n in audited_nodes if "id" in n}
-    
-    # Apply updates
-    if "sections" in data:
-        for section in data["sections"]:
-            if "tree" in section:
-                update_nodes(section["tree"], audited_map)
-    elif "tree" in data:
-        update_nodes(data["tree"], audited_map)
-    else:
-        update_nodes(data, audited_map)
-        
+
+        requested = {key: node_fields for key, _, node_fields in batch}
+        for key, node, _ in batch:
+            by_key[key] = node
+        for item in json.loads(response.text):
+            key = str(item.get("key", "")) if isinstance(item, dict) else ""
+            if key in requested:
+                updates[key] = field_patch(item, requested[key])
+
+    # Write back only the requested fields of each node
+    updated = bulk_update(by_key, updates)
+
     # Save back
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
-        
-    print(f"Audit complete! Audited and updated {len(audited_map)} nodes in {json_path}", file=sys.stderr)
+
+    print(f"Audit complete! Audited and updated {updated} nodes in {json_path}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
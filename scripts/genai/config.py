@@ -18,21 +18,69 @@ MODEL_HIGH = model_high
 MODEL_LOW = model_low
 
 
-def parse_high_flag() -> bool:
+# Optional override for client construction (e.g. an offline ReplayClient in benchmarks)
+_client_factory = None
+
+
+def parse_high_flag(argv: list = None) -> bool:
     """
-    Checks sys.argv for 'high' or '--high' flag.
-    Removes the flag from sys.argv if present and returns True.
+    Checks argv (default: sys.argv) for 'high' or '--high' flag.
+    Removes the flag from argv if present and returns True.
     Also strips obsolete 'model=3.5' or 'model=high' if present.
     """
+    if argv is None:
+        argv = sys.argv
     use_high = False
     for flag in ["high", "--high", "model=high", "model=3.5"]:
-        if flag in sys.argv:
+        if flag in argv:
             if flag in ["high", "--high", "model=high"]:
                 use_high = True
-            sys.argv.remove(flag)
+            argv.remove(flag)
     return use_high
 
 
+def parse_cascade_flag(argv: list = None) -> bool:
+    """
+    Checks argv (default: sys.argv) for 'cascade' or '--cascade' flag.
+    Removes the flag if present and returns True (run on the low tier and escalate
+    only failing items to the high tier, see cascade.py).
+    """
+    if argv is None:
+        argv = sys.argv
+    use_cascade = False
+    for flag in ["cascade", "--cascade"]:
+        if flag in argv:
+            use_cascade = True
+            argv.remove(flag)
+    return use_cascade
+
+
+def parse_no_cache_flag(argv: list = None) -> bool:
+    """
+    Checks argv (default: sys.argv) for '--no-cache' flag.
+    Removes the flag if present and returns True (disables explicit prompt caching).
+    """
+    if argv is None:
+        argv = sys.argv
+    if "--no-cache" in argv:
+        argv.remove("--no-cache")
+        return True
+    return False
+
+
+def parse_stable_ids_flag(argv: list = None) -> bool:
+    """
+    Checks argv (default: sys.argv) for '--stable-ids' flag.
+    Removes the flag if present and returns True (derive item IDs from content, see id_registry.py).
+    """
+    if argv is None:
+        argv = sys.argv
+    if "--stable-ids" in argv:
+        argv.remove("--stable-ids")
+        return True
+    return False
+
+
 def get_genai_config(use_high: bool = False):
     """
     Returns (api_key, model_name) tuple based on use_high flag.
@@ -46,3 +94,21 @@ def get_genai_config(use_high: bool = False):
         sys.exit(1)
     model_name = model_high if use_high else model_low
     return api_key, model_name
+
+
+def set_client_factory(factory):
+    """
+    Overrides how create_client() builds clients. `factory` is a callable taking
+    the api_key and returning a genai.Client-compatible object; pass None to restore
+    the default.
+    """
+    global _client_factory
+    _client_factory = factory
+
+
+def create_client(api_key: str):
+    """Returns a genai.Client for api_key, or the overriding factory's client if one is set."""
+    if _client_factory is not None:
+        return _client_factory(api_key)
+    from google import genai
+    return genai.Client(api_key=api_key)
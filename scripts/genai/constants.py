@@ -14,7 +14,11 @@ try:
         MODEL_HIGH,
         MODEL_LOW,
         parse_high_flag,
+        parse_no_cache_flag,
+        parse_stable_ids_flag,
         get_genai_config,
+        create_client,
+        set_client_factory,
     )
 except ImportError:
     from .config import (
@@ -27,7 +31,11 @@ except ImportError:
         MODEL_HIGH,
         MODEL_LOW,
         parse_high_flag,
+        parse_no_cache_flag,
+        parse_stable_ids_flag,
         get_genai_config,
+        create_client,
+        set_client_factory,
     )
 
 __all__ = [
@@ -40,5 +48,9 @@ __all__ = [
     "MODEL_HIGH",
     "MODEL_LOW",
     "parse_high_flag",
+    "parse_no_cache_flag",
+    "parse_stable_ids_flag",
     "get_genai_config",
+    "create_client",
+    "set_client_factory",
 ]
@@ -3,7 +3,7 @@
 gen_10_test.py — Generate a test JSON from a unit markdown file via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_10_test.py <path-to-test.md> [--level "Grade X Semester Y Unit Z"]
+    python3 scripts/genai/gen_10_test.py <path-to-test.md> [--level "Grade X Semester Y Unit Z"] [--stable-ids]
 
 Example:
     python3 scripts/genai/gen_10_test.py data/A8A/a8a-u1/a8a-u1-test.md --level "Grade 8 Semester 1 - Unit 1"
@@ -16,57 +16,17 @@ Output:
     Saves <same-dir>/<basename>.json next to the source file.
 """
 
-import os, sys, json, argparse, re, random, string
+import os, sys, json, argparse, re
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
-
-def generate_id(length=8):
-    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
-
-def extract_json(text: str) -> dict:
-    """Extract the first balanced JSON object from a string with fallback repair logic."""
-    start = text.find("{")
-    if start == -1:
-        raise ValueError("No JSON object found in response")
-    depth = 0
-    end_idx = -1
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                end_idx = i
-                break
-    if end_idx == -1:
-        raise ValueError("Unbalanced JSON in response")
-
-    candidate = text[start:end_idx + 1]
-
-    # 1. Try standard json.loads with strict=False (allows raw control characters in strings)
-    try:
-        return json.loads(candidate, strict=False)
-    except Exception:
-        pass
-
-    # 2. Try trailing comma removal
-    cleaned_commas = re.sub(r',\s*([}\]])', r'\1', candidate)
-    try:
-        return json.loads(cleaned_commas, strict=False)
-    except Exception:
-        pass
-
-    # 3. Try removing single-line comments // ...
-    cleaned_comments = re.sub(r'//.*$', '', cleaned_commas, flags=re.MULTILINE)
-    try:
-        return json.loads(cleaned_comments, strict=False)
-    except Exception:
-        pass
-
-    # Fallback to raise exact parse exception
-    return json.loads(candidate)
+from config import parse_high_flag, parse_cascade_flag, parse_stable_ids_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from id_registry import assign_ids, id_claims, owner_key
+from cascade import escalate_document
+
 
 PROMPT_TEMPLATE = """\
 You are an expert English curriculum designer and test generator. Generate a Test Sheet JSON by parsing the following test markdown.
@@ -138,13 +98,34 @@ TEST MARKDOWN:
 {source}
 """
 
-def main():
-    use_high = parse_high_flag()
+def post_process(parsed: dict, owner: str, stable_ids=False):
+    """Fills in missing section IDs, trims section titles and assigns corpus-unique question IDs."""
+    for i, section in enumerate(parsed.get("sections", []), 1):
+        if "id" not in section or not section["id"]:
+            section["id"] = f"s{i}"
+
+        # Keep section titles clean and concise
+        if "title" in section:
+            section["title"] = section["title"].strip()
+
+    id_key = None
+    if stable_ids:
+        # A test question is identified by its section and its prompt (or blank position in a passage)
+        section_of = {id(q): section.get("id", "") for section in parsed.get("sections", [])
+                      for q in section.get("questions", [])}
+        id_key = lambda q: f"{section_of[id(q)]}|{q.get('prompt', q.get('blankIndex', ''))}"
+    assign_ids([q for section in parsed.get("sections", []) for q in section.get("questions", [])],
+               owner, key=id_key)
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    stable_ids = parse_stable_ids_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate test JSON via Gemini API.")
     parser.add_argument("md_file", help="Path to the test markdown file (e.g. data/A8A/a8a-u1/a8a-u1-test.md)")
     parser.add_argument("--level", default="", help='Level label, e.g. "Grade 8 Semester 1"')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     md_path = Path(args.md_file)
     if not md_path.exists():
@@ -170,26 +151,30 @@ def main():
             "(0-indexed integer)."
         )
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("test", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(level=level, conversion_instruction=conversion_instruction, source=source)
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(level=level, conversion_instruction=conversion_instruction, source=source)
 
     print(f"Calling {model_name} for: {md_path}", file=sys.stderr)
     import time
     parsed = None
     for attempt in range(5):
         try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="minimal"),
-                    temperature=0.2,
-                    response_mime_type="application/json"
+            with phase("api_wait"):
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("test")
+                    )
                 )
-            )
-            parsed = extract_json(response.text)
+            with phase("json_extraction"):
+                parsed = json.loads(response.text)
             break
         except Exception as e:
             print(f"Error calling Gemini API / parsing JSON (attempt {attempt + 1}/5): {e}", file=sys.stderr)
@@ -197,19 +182,6 @@ def main():
                 raise e
             time.sleep(2 ** attempt)
 
-    # Post-process to ensure all sections and questions have valid structure/IDs
-    for i, section in enumerate(parsed.get("sections", []), 1):
-        if "id" not in section or not section["id"]:
-            section["id"] = f"s{i}"
-        
-        # Keep section titles clean and concise
-        if "title" in section:
-            section["title"] = section["title"].strip()
-
-        for q in section.get("questions", []):
-            if "id" not in q or len(q["id"]) != 8:
-                q["id"] = generate_id(8)
-
     # Determine output path
     stem = md_path.stem
     if stem.endswith("-test"):
@@ -218,10 +190,25 @@ def main():
         out_name = f"{stem}-test.json"
 
     out_path = md_path.parent / out_name
-    parsed["generated_by"] = model_name
-    
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+    owner = owner_key(out_path)
+
+    with id_claims(owner) as claims:
+        # Post-process to ensure all sections and questions have valid structure/IDs
+        with phase("post_processing"):
+            post_process(parsed, owner, stable_ids)
+        if use_cascade:
+            parsed, model_name = escalate_document("test", parsed, prompt, out_path, model_name,
+                                                   thinking_level=profile["thinking_level"], temperature=profile["temperature"],
+                                                   normalize=lambda doc: post_process(doc, owner, stable_ids))
+
+        with phase("post_processing"):
+            validate_or_exit("test", parsed, out_path)
+        parsed["generated_by"] = model_name
+
+        with phase("write"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        claims.commit(parsed)
 
     total_questions = sum(len(sec.get("questions", [])) for sec in parsed.get("sections", []))
     print(f"Done! {total_questions} questions -> {out_path}", file=sys.stderr)
@@ -3,7 +3,7 @@
 gen_1_vg.py — Generate a vocab-guide JSON from a unit markdown file via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_1_vg.py <path-to-unit.md> [--level "Grade X Semester Y Unit Z"]
+    python3 scripts/genai/gen_1_vg.py <path-to-unit.md> [--level "Grade X Semester Y Unit Z"] [--no-cache]
 
 Example:
     python3 scripts/genai/gen_1_vg.py data/B-PU1/b-pu1-u1/b-pu1-u1.md --level "Pupil's Book 1 - Unit 1"
@@ -18,12 +18,17 @@ Output:
 
 import os, sys, json, argparse
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
+from config import parse_high_flag, parse_cascade_flag, parse_no_cache_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from prompt_cache import unit_source_prefix, cached_contents, recover_missing_cache, log_usage
+from cascade import escalate_document
 
 PROMPT_TEMPLATE = """\
-You are an expert English curriculum analyst. Generate a vocab-guide JSON for the following primary school textbook unit markdown.
+You are an expert English curriculum analyst. Generate a vocab-guide JSON for the primary school textbook unit markdown provided above.
 
 RULES:
 - level: "{level}"
@@ -59,19 +64,30 @@ JSON structure:
     }}
   ]
 }}
-
-SOURCE MARKDOWN:
-{source}
 """
 
 
-def main():
-    use_high = parse_high_flag()
+def post_process(parsed: dict):
+    """Wraps every IPA value in slashes."""
+    for item in parsed.get("unit_vocabulary", []):
+        if "ipa" in item and isinstance(item["ipa"], str) and item["ipa"].strip():
+            ipa = item["ipa"].strip()
+            if not ipa.startswith("/"):
+                ipa = f"/{ipa}"
+            if not ipa.endswith("/"):
+                ipa = f"{ipa}/"
+            item["ipa"] = ipa
+
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    no_cache = parse_no_cache_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate vocab-guide JSON via Gemini API.")
     parser.add_argument("md_file", help="Path to the unit markdown file (e.g. data/B-PU1/b-pu1-u1/b-pu1-u1.md)")
     parser.add_argument("--level", default="", help='Level label, e.g. "Pupil\'s Book 1 - Unit 1"')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     md_path = Path(args.md_file)
     if not md_path.exists():
@@ -82,49 +98,67 @@ def main():
     source_file = md_path.name
     level = args.level or source_file.replace("-", " ").replace(".md", "").title()
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("vg", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(level=level, source_file=source_file, source=source)
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(level=level, source_file=source_file)
+    with phase("cache_setup"):
+        contents, cache_name = cached_contents(client, model_name, unit_source_prefix(source), prompt,
+                                               display_name=md_path.name, use_cache=not no_cache)
 
     print(f"Calling {model_name} for: {md_path}", file=sys.stderr)
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="minimal"),
-                    temperature=0.2,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("vg"),
+                        cached_content=cache_name
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = json.loads(response.text)
+                break
+            except Exception as e:
+                recovered = recover_missing_cache(e, client, model_name, unit_source_prefix(source), prompt,
+                                                  cache_name, display_name=md_path.name)
+                if recovered:
+                    contents, cache_name = recovered
+                    continue
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    log_usage(response)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     # Ensure all IPA values have slashes
-    for item in parsed.get("unit_vocabulary", []):
-        if "ipa" in item and isinstance(item["ipa"], str) and item["ipa"].strip():
-            ipa = item["ipa"].strip()
-            if not ipa.startswith("/"):
-                ipa = f"/{ipa}"
-            if not ipa.endswith("/"):
-                ipa = f"{ipa}/"
-            item["ipa"] = ipa
+    with phase("post_processing"):
+        post_process(parsed)
 
     stem = md_path.stem  # e.g. "b-pu1-u1"
     out_path = md_path.parent / f"{stem}-vocab-guide.json"
+    if use_cascade:
+        parsed, model_name = escalate_document("vg", parsed, prompt, out_path, model_name,
+                                               prefix=unit_source_prefix(source), display_name=md_path.name,
+                                               use_cache=not no_cache, thinking_level=profile["thinking_level"],
+                                               temperature=profile["temperature"],
+                                               normalize=post_process)
+    with phase("post_processing"):
+        validate_or_exit("vg", parsed, out_path)
     parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+    with phase("write"):
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(parsed, f, ensure_ascii=False, indent=2)
 
     count = len(parsed.get("unit_vocabulary", []))
     print(f"Done! {count} vocab items -> {out_path}", file=sys.stderr)
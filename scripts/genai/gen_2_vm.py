@@ -3,7 +3,7 @@
 gen_2_vm.py — Generate a vocab-master JSON from a vocab-guide JSON via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_2_vm.py <path-to-vocab-guide.json>
+    python3 scripts/genai/gen_2_vm.py <path-to-vocab-guide.json> [--stable-ids]
 
 Example:
     python3 scripts/genai/gen_2_vm.py data/B-PU1/b-pu1-u1/b-pu1-u1-vocab-guide.json
@@ -16,11 +16,17 @@ Output:
     Saves <same-dir>/<basename replaced '-vocab-guide' with '-vocab-master'>.json
 """
 
-import os, sys, json, argparse, math, random, string
+import os, sys, json, argparse, math
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
+from config import parse_high_flag, parse_cascade_flag, parse_stable_ids_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from repair import repair_document
+from cascade import escalate_fragments
+from id_registry import assign_ids, id_claims, owner_key, SEMANTIC_KEYS
 
 PROMPT_TEMPLATE = """\
 You are an expert English curriculum question designer for primary school students.
@@ -99,6 +105,18 @@ Output ONLY valid JSON, no markdown fences, no commentary.
 """
 
 
+REPAIR_RULES = """\
+- Each challenge has "id", "title", "icon" and a "questions" array of exactly 10 question objects.
+- Each question has "id" (unique 8-character alphanumeric), "word", "meaning", "context_sentence", "cn",
+  "hint", "type" ("Cloze" | "Cn2En" | "En2Cn"), "prompt", "options" and "answer".
+- "options": exactly 6 distinct, non-empty strings; "answer" is the 0–5 index of the correct option.
+- Cloze: replace the target word in context_sentence with "____"; options match its PoS and inflection.
+- Cn2En: prompt is the Chinese meaning; options are English words.
+- En2Cn: prompt is the English word; options are Chinese only, with no duplicate or near-duplicate meanings.
+- Words and meanings must come from the vocab list below.
+"""
+
+
 def calc_targets(items: list) -> dict:
     proper_nouns = 0  # caller can override if needed
     effective = len(items) - proper_nouns
@@ -114,28 +132,28 @@ def calc_targets(items: list) -> dict:
     }
 
 
-def extract_json(text: str) -> dict:
-    """Extract the first balanced JSON object from a string."""
-    start = text.find("{")
-    if start == -1:
-        raise ValueError("No JSON object found in response")
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return json.loads(text[start:i + 1])
-    raise ValueError("Unbalanced JSON in response")
+def post_process(parsed: dict, word_to_sentence: dict, owner: str, id_key=None):
+    """Drops stray question titles, assigns corpus-unique IDs and restores verbatim context sentences."""
+    questions = [q for c in parsed.get("challenges", []) for q in c.get("questions", [])]
+    assign_ids(questions, owner, key=id_key)
+    for q in questions:
+        if "title" in q:
+            del q["title"]
+        word = q.get("word")
+        if word:
+            correct_sentence = word_to_sentence.get(word.lower())
+            if correct_sentence:
+                q["context_sentence"] = correct_sentence
 
 
-def main():
-    use_high = parse_high_flag()
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    stable_ids = parse_stable_ids_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate vocab-master JSON via Gemini API.")
     parser.add_argument("vg_file", help="Path to the vocab-guide JSON (e.g. data/B-PU1/b-pu1-u1/b-pu1-u1-vocab-guide.json)")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     vg_path = Path(args.vg_file)
     if not vg_path.exists():
@@ -149,63 +167,82 @@ def main():
     items = vg.get("unit_vocabulary", [])
     targets = calc_targets(items)
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("vm", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(
-        level=level,
-        vocab_guide=json.dumps(vg, ensure_ascii=False, indent=2),
-        **targets
-    )
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(
+            level=level,
+            vocab_guide=json.dumps(vg, ensure_ascii=False, indent=2),
+            **targets
+        )
 
     print(f"Calling {model_name} for: {vg_path}", file=sys.stderr)
     print(f"  {targets['total_items']} items → {targets['target_questions']} questions / {targets['num_challenges']} challenges", file=sys.stderr)
 
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="low"),
-                    temperature=0.4,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("vm", challenges=targets["num_challenges"])
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = json.loads(response.text)
-
-    # Inject context sentences for cloze questions if not filled by LLM
-    word_to_sentence = {}
-    for item in vg.get("unit_vocabulary", []):
-        w = item.get("word")
-        s = item.get("context_sentence")
-        if w and s:
-            word_to_sentence[w.lower()] = s
-
-    for challenge in parsed.get("challenges", []):
-        for q in challenge.get("questions", []):
-            if "title" in q:
-                del q["title"]
-            word = q.get("word")
-            if word:
-                correct_sentence = word_to_sentence.get(word.lower())
-                if correct_sentence:
-                    q["context_sentence"] = correct_sentence
+                break
+            except Exception as e:
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     stem = vg_path.stem.replace("-vocab-guide", "")
     out_path = vg_path.parent / f"{stem}-vocab-master.json"
-    parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+    owner = owner_key(out_path)
+    id_key = SEMANTIC_KEYS["vm"] if stable_ids else None
+
+    with id_claims(owner) as claims:
+        # Inject context sentences for cloze questions if not filled by LLM; assign corpus-unique IDs
+        with phase("post_processing"):
+            word_to_sentence = {}
+            for item in vg.get("unit_vocabulary", []):
+                w = item.get("word")
+                s = item.get("context_sentence")
+                if w and s:
+                    word_to_sentence[w.lower()] = s
+            post_process(parsed, word_to_sentence, owner, id_key)
+
+        # Send only the failing challenges/questions back for repair (to the high tier when cascading)
+        vocab_list = "\n".join(f"- {item.get('word')}: {item.get('meaning')}" for item in items)
+        repair_kwargs = {
+            "context": f"=== VOCAB LIST ===\n{vocab_list}",
+            "thinking_level": profile["thinking_level"],
+            "temperature": profile["temperature"],
+            "normalize": lambda doc: post_process(doc, word_to_sentence, owner, id_key),
+        }
+        if use_cascade:
+            parsed, errors, model_name = escalate_fragments(model_name, "vm", parsed, REPAIR_RULES, out_path,
+                                                            prompt=prompt, lengths={"challenges": targets["num_challenges"]},
+                                                            **repair_kwargs)
+        else:
+            parsed, errors = repair_document(client, model_name, "vm", parsed, REPAIR_RULES, **repair_kwargs)
+
+        with phase("post_processing"):
+            validate_or_exit("vm", parsed, out_path, errors=errors)
+        parsed["generated_by"] = model_name
+        with phase("write"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        claims.commit(parsed)
 
     total_q = sum(len(c.get("questions", [])) for c in parsed.get("challenges", []))
     print(f"Done! {len(parsed.get('challenges', []))} challenges, {total_q} questions -> {out_path}", file=sys.stderr)
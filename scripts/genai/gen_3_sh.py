@@ -3,7 +3,7 @@
 gen_3_sh.py — Generate a spelling-hero JSON from a vocab-guide JSON via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_3_sh.py <path-to-vocab-guide.json>
+    python3 scripts/genai/gen_3_sh.py <path-to-vocab-guide.json> [--stable-ids]
 
 Example:
     python3 scripts/genai/gen_3_sh.py data/B-PU1/b-pu1-u1/b-pu1-u1-vocab-guide.json
@@ -18,9 +18,15 @@ Output:
 
 import os, sys, json, argparse
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
+from config import parse_high_flag, parse_cascade_flag, parse_stable_ids_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from repair import repair_document
+from cascade import escalate_fragments
+from id_registry import assign_ids, id_claims, owner_key, SEMANTIC_KEYS
 
 PROMPT_TEMPLATE = """\
 You are an expert English phonics teacher for primary school students.
@@ -111,28 +117,41 @@ Output ONLY valid JSON, no markdown fences, no commentary.
 """
 
 
-def extract_json(text: str) -> dict:
-    """Extract the first balanced JSON object from a string."""
-    start = text.find("{")
-    if start == -1:
-        raise ValueError("No JSON object found in response")
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return json.loads(text[start:i + 1])
-    raise ValueError("Unbalanced JSON in response")
+REPAIR_RULES = """\
+- Each entry has "id" (unique 8-character alphanumeric), "word", "meaning" (Chinese, no PoS prefix like "n. "),
+  "type" ("single-syllable" | "multi-syllable", from the word's syllable_type) and a non-empty "chunks" array.
+- Single-syllable words are chunked by phonics graphemes (e.g. "book" → b, oo, k; "rule" → r, u-e);
+  multi-syllable words by the syllables in syllable_type (e.g. "pen-cil" → pen, cil).
+- Each chunk has "correct" and "options": exactly 3 distinct strings (correct + 2 plausible spelling traps), shuffled.
+- Entries that only have "word" and "meaning" are missing from the output: generate them in full.
+"""
+
+
+def post_process(parsed: dict, owner: str, id_key=None):
+    """Replaces malformed, duplicate or corpus-colliding IDs (or derives them all with id_key)."""
+    assign_ids(parsed.get("spelling_words", []), owner, key=id_key)
+
 
+def add_missing_words(parsed: dict, single_words: list) -> set:
+    """Appends a {word, meaning} stub for every vocab-guide single word the model skipped. Returns their words."""
+    words = parsed.setdefault("spelling_words", [])
+    present = {str(w.get("word", "")).strip().lower() for w in words if isinstance(w, dict)}
+    missing = set()
+    for item in single_words:
+        if item["word"].strip().lower() not in present:
+            words.append({"word": item["word"], "meaning": item.get("meaning", "")})
+            missing.add(item["word"])
+    return missing
 
-def main():
-    use_high = parse_high_flag()
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    stable_ids = parse_stable_ids_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate spelling-hero JSON via Gemini API.")
     parser.add_argument("vg_file", help="Path to the vocab-guide JSON (e.g. data/B-PU1/b-pu1-u1/b-pu1-u1-vocab-guide.json)")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     vg_path = Path(args.vg_file)
     if not vg_path.exists():
@@ -146,58 +165,82 @@ def main():
     items = vg.get("unit_vocabulary", [])
     single_words = [w for w in items if " " not in w["word"]]
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("sh", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(
-        level=level,
-        vocab_guide=json.dumps(vg, ensure_ascii=False, indent=2)
-    )
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(
+            level=level,
+            vocab_guide=json.dumps(vg, ensure_ascii=False, indent=2)
+        )
 
     print(f"Calling {model_name} for: {vg_path}", file=sys.stderr)
     print(f"  {len(single_words)} single words to process (skipping {len(items) - len(single_words)} phrases)", file=sys.stderr)
 
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="low"),
-                    temperature=0.2,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("sh")
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = extract_json(response.text)
-
-    # Post-processing ID validation & sanitization
-    import random, string
-    existing_ids = set()
-    for w in parsed.get("spelling_words", []):
-        wid = str(w.get("id", ""))
-        if len(wid) != 8 or not wid.isalnum() or wid in existing_ids:
-            new_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
-            while new_id in existing_ids:
-                new_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
-            w["id"] = new_id
-            existing_ids.add(new_id)
-        else:
-            existing_ids.add(wid)
+                break
+            except Exception as e:
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     stem = vg_path.stem.replace("-vocab-guide", "")
     out_path = vg_path.parent / f"{stem}-spelling-hero.json"
-    parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+    owner = owner_key(out_path)
+    id_key = SEMANTIC_KEYS["sh"] if stable_ids else None
+
+    with id_claims(owner) as claims:
+        # Post-processing ID validation & sanitization; stub out skipped words so they get repaired
+        with phase("post_processing"):
+            post_process(parsed, owner, id_key)
+            missing = add_missing_words(parsed, single_words)
+        if missing:
+            print(f"⚠️  Missing single words: {', '.join(sorted(missing))}", file=sys.stderr)
+
+        vocab_list = "\n".join(f"- {w['word']} ({w.get('syllable_type', '')}): {w.get('meaning', '')}" for w in single_words)
+        repair_kwargs = {
+            "context": f"=== VOCAB LIST (word (syllable_type): meaning) ===\n{vocab_list}",
+            "thinking_level": profile["thinking_level"],
+            "temperature": profile["temperature"],
+            "normalize": lambda doc: post_process(doc, owner, id_key),
+        }
+        if use_cascade:
+            parsed, errors, model_name = escalate_fragments(model_name, "sh", parsed, REPAIR_RULES, out_path,
+                                                            prompt=prompt, **repair_kwargs)
+        else:
+            parsed, errors = repair_document(client, model_name, "sh", parsed, REPAIR_RULES, **repair_kwargs)
+        with phase("post_processing"):
+            unfilled = [w for w in parsed["spelling_words"] if w.get("word") in missing and "chunks" not in w]
+            if unfilled:
+                print(f"⚠️  Dropping {len(unfilled)} word(s) the repair did not fill in", file=sys.stderr)
+                parsed["spelling_words"] = [w for w in parsed["spelling_words"] if not any(w is u for u in unfilled)]
+                errors = None
+
+        with phase("post_processing"):
+            validate_or_exit("sh", parsed, out_path, errors=errors)
+        parsed["generated_by"] = model_name
+        with phase("write"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        claims.commit(parsed)
 
     count = len(parsed.get("spelling_words", []))
     print(f"Done! {count} spelling words -> {out_path}", file=sys.stderr)
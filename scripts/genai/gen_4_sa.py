@@ -3,7 +3,7 @@
 gen_4_sa.py — Generate a sentence-architect JSON from a unit markdown file via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_4_sa.py <path-to-unit.md> [--level "..."] [--title "Unit Title"] [--suffix "_pu1_u1"]
+    python3 scripts/genai/gen_4_sa.py <path-to-unit.md> [--level "..."] [--title "Unit Title"] [--suffix "_pu1_u1"] [--no-cache] [--stable-ids]
 
 Example:
     python3 scripts/genai/gen_4_sa.py data/B-PU1/b-pu1-u1/b-pu1-u1.md \
@@ -19,16 +19,23 @@ Output:
     Saves <same-dir>/<basename>-sentence-architect.json next to the source file.
 """
 
-import os, sys, json, argparse
+import os, sys, json, argparse, re
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
+from config import parse_high_flag, parse_cascade_flag, parse_no_cache_flag, parse_stable_ids_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from prompt_cache import unit_source_prefix, cached_contents, recover_missing_cache, log_usage
+from repair import repair_document
+from cascade import escalate_fragments
+from id_registry import assign_ids, id_claims, owner_key, SEMANTIC_KEYS
 
 PROMPT_TEMPLATE = """\
 You are an expert English curriculum designer for primary school students.
 
-Generate a sentence-architect JSON from the following textbook unit markdown.
+Generate a sentence-architect JSON from the textbook unit markdown provided above.
 
 === STRUCTURE REQUIREMENTS ===
 - Exactly 5 challenges, each with exactly 10 sentences = 50 sentences total.
@@ -104,37 +111,56 @@ Output ONLY valid JSON, no markdown fences, no commentary.
     }}
   ]
 }}
+"""
+
 
-=== SOURCE MARKDOWN ===
-{source}
+REPAIR_RULES = """\
+- Each challenge has "id" (c1–c5), "title", "icon" and a "data" array of exactly 10 sentence objects.
+- Each sentence has "id" (unique 8-character alphanumeric), "en" (verbatim from the source markdown above),
+  "cn" (Chinese translation), "hint" (concise bilingual grammar clue), "noise" and "accept".
+- "noise": 2–5 thematically relevant distractor words that do NOT appear in "en" (≤5 words: 2; 6–9 words: 3–4; 10+: 4–5).
+- "accept": alternative valid orderings of exactly the same words, or [] if none.
+- Use British English spelling and avoid repeating a sentence used elsewhere in the unit.
 """
 
+FALLBACK_NOISE = ["are", "is", "were", "was", "be", "been", "have", "has", "had", "do", "does", "did", "can", "could", "will", "would", "shall", "should", "may", "might", "must", "with", "from", "for", "about", "under", "over", "into", "onto", "behind", "near", "next"]
+
+
+def post_process(parsed: dict, owner: str, id_key=None):
+    """Assigns corpus-unique IDs and removes noise words that appear in the sentence."""
+    sentences = [item for c in parsed.get("challenges", []) for item in c.get("data", [])]
+    assign_ids(sentences, owner, key=id_key)
+
+    for item in sentences:
+        en_words = set(w.lower() for w in re.findall(r"\b\w+['’]?\w*\b", item.get("en", "")))
+        clean_noise = []
+        for nw in item.get("noise", []):
+            if nw.lower() not in en_words and nw.lower() not in [cn.lower() for cn in clean_noise]:
+                clean_noise.append(nw)
+
+        # Replenish if noise list shrank
+        needed = max(2, len(item.get("noise", [])))
+        for fb in FALLBACK_NOISE:
+            if len(clean_noise) >= needed:
+                break
+            if fb.lower() not in en_words and fb.lower() not in [cn.lower() for cn in clean_noise]:
+                clean_noise.append(fb)
 
-def extract_json(text: str) -> dict:
-    """Extract the first balanced JSON object from a string."""
-    start = text.find("{")
-    if start == -1:
-        raise ValueError("No JSON object found in response")
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return json.loads(text[start:i + 1])
-    raise ValueError("Unbalanced JSON in response")
+        item["noise"] = clean_noise
 
 
-def main():
-    use_high = parse_high_flag()
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    no_cache = parse_no_cache_flag(argv)
+    stable_ids = parse_stable_ids_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate sentence-architect JSON via Gemini API.")
     parser.add_argument("md_file", help="Path to the unit markdown file")
     parser.add_argument("--level", default="", help='Level label, e.g. "Pupil\'s Book 1 - Unit 1"')
     parser.add_argument("--title", default="", help='Unit title, e.g. "Our new school"')
     parser.add_argument("--suffix", default="", help='Storage suffix, e.g. "_bpu1_u1"')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     md_path = Path(args.md_file)
     if not md_path.exists():
@@ -145,74 +171,84 @@ def main():
     level = args.level or md_path.stem.replace("-", " ").title()
     suffix = args.suffix or f"_{md_path.stem.replace('-', '_')}"
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("sa", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(level=level, suffix=suffix, source=source)
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(level=level, suffix=suffix)
+    with phase("cache_setup"):
+        contents, cache_name = cached_contents(client, model_name, unit_source_prefix(source), prompt,
+                                               display_name=md_path.name, use_cache=not no_cache)
 
     print(f"Calling {model_name} for: {md_path}", file=sys.stderr)
     print(f"  level='{level}'  suffix='{suffix}'", file=sys.stderr)
 
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="low"),
-                    temperature=0.3,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("sa"),
+                        cached_content=cache_name
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = extract_json(response.text)
-
-    # Post-processing noise word validation & deduplication
-    import re, random, string
-    all_fallback_noise = ["are", "is", "were", "was", "be", "been", "have", "has", "had", "do", "does", "did", "can", "could", "will", "would", "shall", "should", "may", "might", "must", "with", "from", "for", "about", "under", "over", "into", "onto", "behind", "near", "next"]
-    existing_ids = set()
-
-    for c in parsed.get("challenges", []):
-        for item in c.get("data", []):
-            sid = str(item.get("id", ""))
-            if len(sid) != 8 or not sid.isalnum() or sid in existing_ids:
-                new_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
-                while new_id in existing_ids:
-                    new_id = "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
-                item["id"] = new_id
-                existing_ids.add(new_id)
-            else:
-                existing_ids.add(sid)
-
-            en_words = set(w.lower() for w in re.findall(r"\b\w+['’]?\w*\b", item.get("en", "")))
-            clean_noise = []
-            for nw in item.get("noise", []):
-                if nw.lower() not in en_words and nw.lower() not in [cn.lower() for cn in clean_noise]:
-                    clean_noise.append(nw)
-            
-            # Replenish if noise list shrank
-            needed = max(2, len(item.get("noise", [])))
-            for fb in all_fallback_noise:
-                if len(clean_noise) >= needed:
-                    break
-                if fb.lower() not in en_words and fb.lower() not in [cn.lower() for cn in clean_noise]:
-                    clean_noise.append(fb)
-            
-            item["noise"] = clean_noise
+                break
+            except Exception as e:
+                recovered = recover_missing_cache(e, client, model_name, unit_source_prefix(source), prompt,
+                                                  cache_name, display_name=md_path.name)
+                if recovered:
+                    contents, cache_name = recovered
+                    continue
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    log_usage(response)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     stem = md_path.stem
     out_path = md_path.parent / f"{stem}-sentence-architect.json"
-    parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+    owner = owner_key(out_path)
+    id_key = SEMANTIC_KEYS["sa"] if stable_ids else None
+
+    with id_claims(owner) as claims:
+        # Post-processing noise word validation & deduplication
+        with phase("post_processing"):
+            post_process(parsed, owner, id_key)
+
+        # Send only the failing challenges/sentences back for repair (to the high tier when cascading),
+        # reusing the cached unit source
+        repair_kwargs = {
+            "prefix": unit_source_prefix(source),
+            "display_name": md_path.name,
+            "use_cache": not no_cache,
+            "thinking_level": profile["thinking_level"],
+            "temperature": profile["temperature"],
+            "normalize": lambda doc: post_process(doc, owner, id_key),
+        }
+        if use_cascade:
+            parsed, errors, model_name = escalate_fragments(model_name, "sa", parsed, REPAIR_RULES, out_path,
+                                                            prompt=prompt, **repair_kwargs)
+        else:
+            parsed, errors = repair_document(client, model_name, "sa", parsed, REPAIR_RULES, **repair_kwargs)
+
+        with phase("post_processing"):
+            validate_or_exit("sa", parsed, out_path, errors=errors)
+        parsed["generated_by"] = model_name
+        with phase("write"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        claims.commit(parsed)
 
     total = sum(len(c.get("data", [])) for c in parsed.get("challenges", []))
     print(f"Done! {len(parsed.get('challenges', []))} challenges, {total} sentences -> {out_path}", file=sys.stderr)
@@ -3,7 +3,7 @@
 gen_5_rm.py — Generate a recall-map JSON from a unit markdown file via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_5_rm.py <path-to-unit.md> [--level "Pupil's Book 1"] [--part "Unit 1"]
+    python3 scripts/genai/gen_5_rm.py <path-to-unit.md> [--level "Pupil's Book 1"] [--part "Unit 1"] [--no-cache]
 
 Example:
     python3 scripts/genai/gen_5_rm.py data/B-PU1/b-pu1-u1/b-pu1-u1.md \
@@ -20,12 +20,17 @@ Output:
 
 import os, sys, json, argparse
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
+from config import parse_high_flag, parse_cascade_flag, parse_no_cache_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from prompt_cache import unit_source_prefix, cached_contents, recover_missing_cache, log_usage
+from cascade import escalate_document
 
 PROMPT_TEMPLATE = """\
-You are an expert English curriculum designer. Generate a recall-map JSON for the following primary school textbook unit markdown.
+You are an expert English curriculum designer. Generate a recall-map JSON for the primary school textbook unit markdown provided above.
 
 === STRUCTURE REQUIREMENTS ===
 - Top level fields: "level" (e.g. "Pupil's Book 1"), "part" (e.g. "Unit 1"), and "tree" (the root node).
@@ -102,36 +107,19 @@ Output ONLY valid JSON, no markdown fences, no commentary.
     ]
   }}
 }}
-
-=== SOURCE MARKDOWN ===
-{source}
 """
 
 
-def extract_json(text: str) -> dict:
-    """Extract the first balanced JSON object from a string."""
-    start = text.find("{")
-    if start == -1:
-        raise ValueError("No JSON object found in response")
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return json.loads(text[start:i + 1])
-    raise ValueError("Unbalanced JSON in response")
-
-
-def main():
-    use_high = parse_high_flag()
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    no_cache = parse_no_cache_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate recall-map JSON via Gemini API.")
     parser.add_argument("md_file", help="Path to the unit markdown file")
     parser.add_argument("--level", default="Pupil's Book 1", help='Level label')
     parser.add_argument("--part", default="Unit 1", help='Part label')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     md_path = Path(args.md_file)
     if not md_path.exists():
@@ -140,40 +128,63 @@ def main():
 
     source = md_path.read_text(encoding="utf-8")
     
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("rm", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(level=args.level, part=args.part, source=source)
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(level=args.level, part=args.part)
+    with phase("cache_setup"):
+        contents, cache_name = cached_contents(client, model_name, unit_source_prefix(source), prompt,
+                                               display_name=md_path.name, use_cache=not no_cache)
 
     print(f"Calling {model_name} for: {md_path}", file=sys.stderr)
 
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="low"),
-                    temperature=0.3,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("rm"),
+                        cached_content=cache_name
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = extract_json(response.text)
+                break
+            except Exception as e:
+                recovered = recover_missing_cache(e, client, model_name, unit_source_prefix(source), prompt,
+                                                  cache_name, display_name=md_path.name)
+                if recovered:
+                    contents, cache_name = recovered
+                    continue
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    log_usage(response)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     stem = md_path.stem
     out_path = md_path.parent / f"{stem}-recall-map.json"
+    if use_cascade:
+        parsed, model_name = escalate_document("rm", parsed, prompt, out_path, model_name,
+                                               prefix=unit_source_prefix(source), display_name=md_path.name,
+                                               use_cache=not no_cache, thinking_level=profile["thinking_level"],
+                                               temperature=profile["temperature"])
+    with phase("post_processing"):
+        validate_or_exit("rm", parsed, out_path)
     parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+    with phase("write"):
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump(parsed, f, ensure_ascii=False, indent=2)
 
     print(f"Done! Saved recall-map to {out_path}", file=sys.stderr)
 
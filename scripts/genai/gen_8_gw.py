@@ -3,7 +3,7 @@
 gen_8_gw.py — Generate a grammar-wizard JSON from a unit markdown file (and optional contents JSON) via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_8_gw.py <path-to-unit.md> [--level "Grade X Semester Y Unit Z"]
+    python3 scripts/genai/gen_8_gw.py <path-to-unit.md> [--level "Grade X Semester Y Unit Z"] [--no-cache] [--stable-ids]
 
 Example:
     python3 scripts/genai/gen_8_gw.py data/B-PU1/b-pu1-u1/b-pu1-u1.md --level "Pupil's Book 1 - Unit 1"
@@ -16,17 +16,20 @@ Output:
     Saves <same-dir>/<basename>-grammar-wizard.json next to the source file.
 """
 
-import os, sys, json, argparse, re, random, string
+import os, sys, json, argparse, re
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
-
-def generate_id(length=8):
-    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
+from config import parse_high_flag, parse_cascade_flag, parse_no_cache_flag, parse_stable_ids_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from prompt_cache import unit_source_prefix, cached_contents, recover_missing_cache, log_usage
+from id_registry import assign_ids, id_claims, owner_key, SEMANTIC_KEYS
+from cascade import escalate_document
 
 PROMPT_TEMPLATE = """\
-You are an expert English curriculum analyst. Generate a Grammar Wizard JSON for the following primary school textbook unit.
+You are an expert English curriculum analyst. Generate a Grammar Wizard JSON for the primary school textbook unit whose markdown is provided above.
 
 RULES:
 - Target Question Count: Exactly 2 Challenges of 10 questions each (20 questions total).
@@ -80,18 +83,24 @@ Output ONLY valid JSON, no markdown fences, no commentary. Ensure exactly 20 que
 
 UNIT TEXTBOOK CONTENTS JSON (Context):
 {contents}
-
-UNIT MARKDOWN:
-{source}
 """
 
-def main():
-    use_high = parse_high_flag()
+
+def post_process(parsed: dict, owner: str, id_key=None):
+    """Assigns corpus-unique question IDs."""
+    assign_ids([q for c in parsed.get("challenges", []) for q in c.get("questions", [])], owner, key=id_key)
+
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    no_cache = parse_no_cache_flag(argv)
+    stable_ids = parse_stable_ids_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate grammar-wizard JSON via Gemini API.")
     parser.add_argument("md_file", help="Path to the unit markdown file (e.g. data/B-PU1/b-pu1-u1/b-pu1-u1.md)")
     parser.add_argument("--level", default="", help='Level label, e.g. "Pupil\'s Book 1 - Unit 1"')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     md_path = Path(args.md_file)
     if not md_path.exists():
@@ -113,45 +122,73 @@ def main():
     if contents_file and contents_file.exists():
         contents_str = contents_file.read_text(encoding="utf-8")
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("gw", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(level=level, contents=contents_str, source=source)
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(level=level, contents=contents_str)
+    with phase("cache_setup"):
+        contents, cache_name = cached_contents(client, model_name, unit_source_prefix(source), prompt,
+                                               display_name=md_path.name, use_cache=not no_cache)
 
     print(f"Calling {model_name} for: {md_path}", file=sys.stderr)
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="minimal"),
-                    temperature=0.2,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("gw"),
+                        cached_content=cache_name
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = json.loads(response.text)
-
-    # Validate and fix some fields if needed
-    for challenge in parsed.get("challenges", []):
-        for q in challenge.get("questions", []):
-            if "id" not in q or len(q["id"]) != 8:
-                q["id"] = generate_id()
+                break
+            except Exception as e:
+                recovered = recover_missing_cache(e, client, model_name, unit_source_prefix(source), prompt,
+                                                  cache_name, display_name=md_path.name)
+                if recovered:
+                    contents, cache_name = recovered
+                    continue
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    log_usage(response)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     stem = md_path.stem  # e.g. "b-pu1-u1"
     out_path = md_path.parent / f"{stem}-grammar-wizard.json"
-    parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+
+    owner = owner_key(out_path)
+    id_key = SEMANTIC_KEYS["gw"] if stable_ids else None
+
+    with id_claims(owner) as claims:
+        # Assign corpus-unique IDs
+        with phase("post_processing"):
+            post_process(parsed, owner, id_key)
+        if use_cascade:
+            parsed, model_name = escalate_document("gw", parsed, prompt, out_path, model_name,
+                                                   prefix=unit_source_prefix(source), display_name=md_path.name,
+                                                   use_cache=not no_cache, thinking_level=profile["thinking_level"],
+                                                   temperature=profile["temperature"],
+                                                   normalize=lambda doc: post_process(doc, owner, id_key))
+
+        with phase("post_processing"):
+            validate_or_exit("gw", parsed, out_path)
+        parsed["generated_by"] = model_name
+        with phase("write"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        claims.commit(parsed)
 
     total_qs = sum(len(c.get("questions", [])) for c in parsed.get("challenges", []))
     print(f"Done! {total_qs} questions -> {out_path}", file=sys.stderr)
@@ -3,7 +3,7 @@
 gen_9_pd.py — Generate a passage-decoder JSON from a unit markdown file and text-navigator JSON via Gemini API.
 
 Usage:
-    python3 scripts/genai/gen_9_pd.py <path-to-unit.md> [--tn <path-to-text-navigator.json>] [--level "Grade X Semester Y Unit Z"]
+    python3 scripts/genai/gen_9_pd.py <path-to-unit.md> [--tn <path-to-text-navigator.json>] [--level "Grade X Semester Y Unit Z"] [--no-cache] [--stable-ids]
 
 Example:
     python3 scripts/genai/gen_9_pd.py data/B-PU1/b-pu1-u1/b-pu1-u1.md \
@@ -22,32 +22,21 @@ Output:
     (or preserves the suffix like -w.json if the source md has -w).
 """
 
-import os, sys, json, argparse, re, random, string
+import os, sys, json, argparse, re
 from pathlib import Path
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
-
-def generate_id(length=8):
-    return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
-
-def extract_json(text: str) -> dict:
-    """Extract the first balanced JSON object from a string."""
-    start = text.find("{")
-    if start == -1:
-        raise ValueError("No JSON object found in response")
-    depth = 0
-    for i, ch in enumerate(text[start:], start):
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return json.loads(text[start:i + 1])
-    raise ValueError("Unbalanced JSON in response")
+from config import parse_high_flag, parse_cascade_flag, parse_no_cache_flag, parse_stable_ids_flag, create_client
+from phases import phase
+from profiles import generator_config
+from schemas import validate_or_exit
+from response_schemas import response_schema
+from prompt_cache import unit_source_prefix, cached_contents, recover_missing_cache, log_usage
+from id_registry import assign_ids, id_claims, owner_key, SEMANTIC_KEYS
+from cascade import escalate_document
+
 
 PROMPT_TEMPLATE = """\
-You are an expert English curriculum designer. Generate a Passage Decoder JSON for the following primary school textbook unit.
+You are an expert English curriculum designer. Generate a Passage Decoder JSON for the primary school textbook unit whose markdown is provided above.
 
 RULES:
 - Extraction Scope & Alignment with Text Navigator (TN): Extract every sentence/dialogue line from the reading passages or listening dialogue sections. CRITICAL: Every element in the "sentences" array SHOULD MIRROR what's in the corresponding leaf nodes of Text Navigator (TN). For textbooks starting with PU1, you MUST include both "The Friendly Farm" and "Literature". For grade levels A7A, A7B, A8A, A8B, and A9, if the first section of the listening scripts (e.g. "Section A, 1b and 1c" or "Section A, 1b, 1c, and 1d" etc.) is long and meaningful enough, include it as the first section in addition to the other sections.
@@ -102,19 +91,26 @@ VOCABULARY LIST (For Highlighting):
 
 TEXT NAVIGATOR SOURCE (Mirror sections and leaf node sentences from this structure):
 {text_navigator}
-
-UNIT MARKDOWN:
-{source}
 """
 
-def main():
-    use_high = parse_high_flag()
+
+def post_process(parsed: dict, owner: str, id_key=None):
+    """Assigns corpus-unique "pd_" sentence IDs."""
+    sentences = [s for section in parsed.get("sections", []) for s in section.get("sentences", [])]
+    assign_ids(sentences, owner, prefix="pd_", key=id_key)
+
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+    use_cascade = parse_cascade_flag(argv) and not use_high
+    no_cache = parse_no_cache_flag(argv)
+    stable_ids = parse_stable_ids_flag(argv)
 
     parser = argparse.ArgumentParser(description="Generate passage-decoder JSON via Gemini API.")
     parser.add_argument("md_file", help="Path to the unit markdown file (e.g. data/B-PU1/b-pu1-u1/b-pu1-u1.md)")
     parser.add_argument("--tn", default="", help='Path to text-navigator JSON file')
     parser.add_argument("--level", default="", help='Level label, e.g. "Pupil\'s Book 1 - Unit 1"')
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     md_path = Path(args.md_file)
     if not md_path.exists():
@@ -154,47 +150,48 @@ def main():
         except Exception as e:
             print(f"Warning: could not read {tn_file}: {e}", file=sys.stderr)
 
-    api_key, model_name = get_genai_config(use_high)
+    api_key, model_name, profile = generator_config("pd", use_high)
 
-    client = genai.Client(api_key=api_key)
-    prompt = PROMPT_TEMPLATE.format(level=level, vocab=vocab_str, text_navigator=tn_str, source=source)
+    client = create_client(api_key)
+    with phase("prompt_render"):
+        prompt = PROMPT_TEMPLATE.format(level=level, vocab=vocab_str, text_navigator=tn_str)
+    with phase("cache_setup"):
+        contents, cache_name = cached_contents(client, model_name, unit_source_prefix(source), prompt,
+                                               display_name=md_path.name, use_cache=not no_cache)
 
     print(f"Calling {model_name} for: {md_path}", file=sys.stderr)
     import time
     response = None
-    for attempt in range(5):
-        try:
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt,
-                config=types.GenerateContentConfig(
-                    thinking_config=types.ThinkingConfig(thinking_level="minimal"),
-                    temperature=0.3,
-                    response_mime_type="application/json"
+    with phase("api_wait"):
+        for attempt in range(5):
+            try:
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=contents,
+                    config=types.GenerateContentConfig(
+                        thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                        temperature=profile["temperature"],
+                        response_mime_type="application/json",
+                        response_json_schema=response_schema("pd"),
+                        cached_content=cache_name
+                    )
                 )
-            )
-            break
-        except Exception as e:
-            print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
-            if attempt == 4:
-                raise e
-            time.sleep(2 ** attempt)
-
-    parsed = extract_json(response.text)
-
-    # Validate and fix some fields if needed
-    for section in parsed.get("sections", []):
-        for s in section.get("sentences", []):
-            if "id" not in s or not s["id"].startswith("pd_") or len(s["id"]) != 11:
-                s["id"] = "pd_" + generate_id(8)
-            if "answer" not in s:
-                s["answer"] = 0
-            if "speaker" not in s:
-                s["speaker"] = ""
-            if "highlight" not in s:
-                s["highlight"] = ""
-            if "newline" not in s:
-                s["newline"] = False
+                break
+            except Exception as e:
+                recovered = recover_missing_cache(e, client, model_name, unit_source_prefix(source), prompt,
+                                                  cache_name, display_name=md_path.name)
+                if recovered:
+                    contents, cache_name = recovered
+                    continue
+                print(f"Error calling Gemini API (attempt {attempt + 1}/5): {e}", file=sys.stderr)
+                if attempt == 4:
+                    raise e
+                time.sleep(2 ** attempt)
+
+    log_usage(response)
+
+    with phase("json_extraction"):
+        parsed = json.loads(response.text)
 
     # Determine output filename
     stem = md_path.stem
@@ -202,11 +199,30 @@ def main():
         out_name = f"{stem}.json"
     else:
         out_name = f"{stem}-passage-decoder-s.json"
-        
+
     out_path = md_path.parent / out_name
-    parsed["generated_by"] = model_name
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(parsed, f, ensure_ascii=False, indent=2)
+
+    owner = owner_key(out_path)
+    id_key = SEMANTIC_KEYS["pd"] if stable_ids else None
+
+    with id_claims(owner) as claims:
+        # Assign corpus-unique IDs (answer/speaker/highlight/newline are required by the response schema)
+        with phase("post_processing"):
+            post_process(parsed, owner, id_key)
+        if use_cascade:
+            parsed, model_name = escalate_document("pd", parsed, prompt, out_path, model_name,
+                                                   prefix=unit_source_prefix(source), display_name=md_path.name,
+                                                   use_cache=not no_cache, thinking_level=profile["thinking_level"],
+                                                   temperature=profile["temperature"],
+                                                   normalize=lambda doc: post_process(doc, owner, id_key))
+
+        with phase("post_processing"):
+            validate_or_exit("pd", parsed, out_path)
+        parsed["generated_by"] = model_name
+        with phase("write"):
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(parsed, f, ensure_ascii=False, indent=2)
+        claims.commit(parsed)
 
     total_sentences = sum(len(sec.get("sentences", [])) for sec in parsed.get("sections", []))
     print(f"Done! {total_sentences} sentences -> {out_path}", file=sys.stderr)
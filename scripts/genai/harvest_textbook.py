@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+harvest_textbook.py — Transcribe a textbook unit PDF into the unit markdown the generators read.
+
+Replaces scripts/obsolete/harvest_textbook.py (legacy google.generativeai SDK, one call for
+the whole PDF). The PDF is split into small page groups that are uploaded and transcribed
+concurrently with the google.genai client from config.py, then stitched in page order into
+a single .md with a "### --- PRINTED PAGE X ---" heading per page.
+
+Printed page numbers are pre-detected from the PDF text layer (see scripts/split_pdf.py) and
+passed to the model as hints; the model reads them off the page images when there is no
+text layer. Uploads are cached by content hash in .upload-cache.json, so re-harvesting the
+same PDF reuses files that are still live on the server instead of re-uploading them.
+
+Usage:
+    python3 scripts/genai/harvest_textbook.py <unit.pdf> <output.md> [--pages-per-group 2] [--workers 4]
+                                              [--instructions FILE] [--code A3B-U3] [--force] [--high]
+
+Example:
+    python3 scripts/genai/harvest_textbook.py temp/pdf/A3B/A3B-New-U3.pdf v2-data/A3B/a3b-u3/a3b-u3.md
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+GENAI_DIR = Path(__file__).resolve().parent
+SCRIPTS_DIR = GENAI_DIR.parent
+if str(SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+
+from pypdf import PdfReader, PdfWriter
+from google.genai import types
+from config import get_genai_config, parse_high_flag, create_client
+from phases import phase
+from split_pdf import file_sha256, extract_page_texts, build_page_map, printed_label
+
+UPLOAD_CACHE_PATH = GENAI_DIR / ".upload-cache.json"
+# Gemini keeps uploaded files for 48h; stop reusing them a little before that
+UPLOAD_TTL_SECONDS = 46 * 3600
+POLL_INTERVAL_SECONDS = 2
+MAX_RETRIES = 3
+DEFAULT_PAGES_PER_GROUP = 2
+DEFAULT_WORKERS = 4
+
+MARKER_RE = re.compile(r"^#{0,6}\s*---\s*PRINTED PAGE\s+(\S+)\s*---\s*$", re.MULTILINE)
+
+HARVEST_PROMPT_TEMPLATE = """\
+You are a meticulous textbook content harvester. The attached PDF contains {page_count} page(s) of an English textbook
+(PDF pages {first_page}-{last_page} of {total_pages} in the unit file).
+
+Transcribe EVERY page completely and in order into semantic Markdown:
+- Start each page with a heading line exactly of the form: ### --- PRINTED PAGE X ---
+  where X is the page number printed on that page. If no number is printed, use: ### --- PRINTED PAGE Unnumbered ---
+{page_hints}- Separate pages with a line containing only: ---
+- Keep all text verbatim (titles, dialogues, exercises, word lists, chants, captions).
+- Describe layout and pictures in bracketed italics, e.g. [*VISUAL: ...*] and [*LAYOUT: ...*].
+- Do not add commentary, summaries, or a preamble. Output only the transcription.
+{extra_instructions}"""
+
+
+_upload_lock = threading.Lock()
+
+
+def _load_upload_cache() -> dict:
+    if UPLOAD_CACHE_PATH.exists():
+        try:
+            return json.loads(UPLOAD_CACHE_PATH.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+    return {}
+
+
+def _save_upload_cache(cache: dict):
+    tmp_path = UPLOAD_CACHE_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, UPLOAD_CACHE_PATH)
+
+
+def _state_name(file_obj) -> str:
+    state = getattr(file_obj, "state", None)
+    return getattr(state, "name", None) or str(state or "")
+
+
+def _wait_until_active(client, file_obj):
+    while _state_name(file_obj).endswith("PROCESSING"):
+        time.sleep(POLL_INTERVAL_SECONDS)
+        file_obj = client.files.get(name=file_obj.name)
+    if _state_name(file_obj).endswith("FAILED"):
+        raise RuntimeError(f"File processing failed: {file_obj.name}")
+    return file_obj
+
+
+def upload_cached(client, data: bytes, display_name: str):
+    """
+    Uploads PDF bytes unless a live upload of identical content is recorded in the cache.
+    Returns the (active) file object to pass in `contents`.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    now = time.time()
+    with _upload_lock:
+        entry = _load_upload_cache().get(digest)
+    if entry and entry["expire_time"] > now:
+        try:
+            file_obj = client.files.get(name=entry["name"])
+            if not _state_name(file_obj).endswith("FAILED"):
+                return _wait_until_active(client, file_obj)
+        except Exception:
+            # Deleted or expired server-side; fall through to a fresh upload
+            pass
+
+    file_obj = client.files.upload(
+        file=io.BytesIO(data),
+        config=types.UploadFileConfig(mime_type="application/pdf", display_name=display_name[:128]),
+    )
+    file_obj = _wait_until_active(client, file_obj)
+    with _upload_lock:
+        cache = _load_upload_cache()
+        cache = {k: v for k, v in cache.items() if v["expire_time"] > now}
+        cache[digest] = {"name": file_obj.name, "display_name": display_name, "expire_time": now + UPLOAD_TTL_SECONDS}
+        _save_upload_cache(cache)
+    return file_obj
+
+
+def page_groups(total_pages: int, pages_per_group: int):
+    """[(first_page, last_page)] 1-based inclusive groups covering the document."""
+    return [(start, min(start + pages_per_group - 1, total_pages))
+            for start in range(1, total_pages + 1, pages_per_group)]
+
+
+def group_pdf_bytes(reader, first_page: int, last_page: int) -> bytes:
+    writer = PdfWriter()
+    for p in range(first_page, last_page + 1):
+        writer.add_page(reader.pages[p - 1])
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def _page_hints(page_map, first_page: int, last_page: int) -> str:
+    known = [(p, page_map[p - 1]) for p in range(first_page, last_page + 1) if page_map[p - 1] is not None]
+    if not known:
+        return ""
+    hints = ", ".join(f"PDF page {p} -> printed page {n}" for p, n in known)
+    return f"- Printed page numbers detected from the text layer (use them unless the page clearly shows otherwise): {hints}\n"
+
+
+def _clean_transcription(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = re.sub(r"^```(?:markdown|md)?\n?", "", text)
+        text = re.sub(r"\n?```$", "", text)
+    return text.strip().strip("-").strip()
+
+
+def transcribe_group(client, model_name, reader, pdf_name, total_pages, page_map, first_page, last_page,
+                     extra_instructions=""):
+    """Uploads one page group and returns its Markdown, guaranteed to start with a PRINTED PAGE marker."""
+    data = group_pdf_bytes(reader, first_page, last_page)
+    prompt = HARVEST_PROMPT_TEMPLATE.format(
+        page_count=last_page - first_page + 1,
+        first_page=first_page,
+        last_page=last_page,
+        total_pages=total_pages,
+        page_hints=_page_hints(page_map, first_page, last_page),
+        extra_instructions=f"\nADDITIONAL INSTRUCTIONS:\n{extra_instructions}\n" if extra_instructions else "",
+    )
+
+    for attempt in range(MAX_RETRIES):
+        try:
+            file_obj = upload_cached(client, data, f"{pdf_name} p{first_page}-{last_page}")
+            with phase("api_wait"):
+                response = client.models.generate_content(
+                    model=model_name,
+                    contents=[file_obj, prompt],
+                    config=types.GenerateContentConfig(temperature=0.0),
+                )
+            text = _clean_transcription(response.text or "")
+            if not text:
+                raise ValueError("empty transcription")
+            if not MARKER_RE.search(text):
+                # The model dropped the markers; anchor the group on its first page at least
+                text = f"### --- PRINTED PAGE {printed_label(page_map[first_page - 1])} ---\n\n{text}"
+            return text
+        except Exception as e:
+            print(f"  ⚠️ Pages {first_page}-{last_page} (attempt {attempt + 1}/{MAX_RETRIES}): {e}", file=sys.stderr)
+            if attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def harvest_pdf(pdf_path, output_path, use_high=False, pages_per_group=DEFAULT_PAGES_PER_GROUP,
+                workers=DEFAULT_WORKERS, instructions="", code=None):
+    api_key, model_name = get_genai_config(use_high)
+    client = create_client(api_key)
+
+    reader = PdfReader(pdf_path)
+    total_pages = len(reader.pages)
+    with phase("prompt_render"):
+        page_map = build_page_map(extract_page_texts(pdf_path, source_sha=file_sha256(pdf_path)))
+    groups = page_groups(total_pages, pages_per_group)
+    pdf_name = Path(pdf_path).name
+    print(f"Harvesting {pdf_path}: {total_pages} page(s) in {len(groups)} group(s) with {workers} worker(s) using {model_name}...")
+
+    def run(group):
+        first, last = group
+        text = transcribe_group(client, model_name, reader if workers == 1 else PdfReader(pdf_path), pdf_name,
+                                total_pages, page_map, first, last, instructions)
+        print(f"  ✓ Pages {first}-{last}")
+        return text
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        sections = list(pool.map(run, groups))
+
+    code = code or Path(output_path).stem.upper()
+    header = (
+        f"> ## **Target Filename Code:** {code}\n"
+        f"> \n"
+        f"> **Total PDF Pages:** {total_pages}\n"
+    )
+    body = "\n\n---\n\n".join(sections)
+    with phase("write"):
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(f"{header}\n---\n\n{body}\n")
+
+    markers = MARKER_RE.findall(body)
+    print(f"Successfully harvested to {output_path} ({len(markers)} PRINTED PAGE marker(s) for {total_pages} page(s))")
+    if len(markers) != total_pages:
+        print(f"  ⚠️ Marker count differs from page count; review {output_path}", file=sys.stderr)
+    return output_path
+
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+
+    parser = argparse.ArgumentParser(description="Transcribe a textbook unit PDF into markdown with PRINTED PAGE markers.")
+    parser.add_argument("pdf", help="Unit PDF")
+    parser.add_argument("output", help="Output .md path")
+    parser.add_argument("--pages-per-group", type=int, default=DEFAULT_PAGES_PER_GROUP, help="Pages per model call")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent page groups")
+    parser.add_argument("--instructions", help="Extra harvesting instructions file appended to the prompt")
+    parser.add_argument("--code", help="Target filename code for the header (default: output stem)")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing output file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.pdf):
+        print(f"Error: {args.pdf} not found.", file=sys.stderr)
+        sys.exit(1)
+    if os.path.exists(args.output) and not args.force:
+        print(f"Error: {args.output} already exists (use --force to overwrite).", file=sys.stderr)
+        sys.exit(1)
+
+    instructions = ""
+    if args.instructions:
+        with open(args.instructions, "r", encoding="utf-8") as f:
+            instructions = f.read().strip()
+
+    harvest_pdf(args.pdf, args.output, use_high=use_high, pages_per_group=args.pages_per_group,
+                workers=args.workers, instructions=instructions, code=args.code)
+
+
+if __name__ == "__main__":
+    main()
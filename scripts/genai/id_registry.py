@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+id_registry.py — Corpus-wide registry and bulk allocator for 8-character item IDs.
+
+Every question, sentence, spelling word and test item carries an 8-character
+alphanumeric ID that the progress-tracking backend uses as its key, so IDs must be
+unique across the whole of v2-data, not just within one file. The registry keeps
+every known ID with the file that owns it in an append-only TSV file
+(`<id>\\t<owner>` per line); it is built by scanning v2-data on first use.
+
+Membership checks are O(1) set/dict lookups. Allocation happens under an exclusive
+file lock: lines appended by other processes since the last read are picked up first,
+then the new IDs are drawn, checked and appended in one write, so concurrent
+generators (run_all.py, ThreadPoolExecutor workers) never hand out the same ID.
+
+An ID is free for a file if nobody owns it or the file itself already owns it, so
+regenerating or fixing a unit can keep its existing IDs.
+
+Generators register IDs before the output is validated and written, inside
+`with id_claims(owner) as claims:`. `claims.commit(doc)` after the write releases the
+IDs the run registered but the written document does not use (e.g. replaced during
+repair); leaving the block without commit (validation failure, API error) releases
+every ID it registered. A release is an appended `<id>\t<owner>\treleased` line, so the
+file stays append-only; --rebuild compacts it.
+
+Stable-ID mode (generators' --stable-ids flag) derives each ID from a hash of the
+owner and the item's semantic key (SEMANTIC_KEYS, e.g. word + type + prompt for VM,
+`en` for SA) instead of drawing it at random, so an unchanged item keeps its ID
+across regenerations and diffs, verdict/TTS caches and learner progress stay valid.
+
+Usage:
+    python3 scripts/genai/id_registry.py --stats          # ID count and file count
+    python3 scripts/genai/id_registry.py --rebuild        # rescan v2-data, drop stale entries
+    python3 scripts/genai/id_registry.py --collisions     # IDs used by more than one file
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import string
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from schemas import kind_for_path
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+GENAI_DIR = Path(__file__).resolve().parent
+DATA_DIR = GENAI_DIR.parents[1] / "v2-data"
+REGISTRY_PATH = GENAI_DIR / ".id-registry.tsv"
+
+ID_ALPHABET = string.ascii_lowercase + string.digits
+ID_LENGTH = 8
+ID_RE = re.compile(r"[A-Za-z0-9]{8}")
+# Output types whose items carry minted IDs (recall-map / text-navigator node IDs are structural)
+ID_KINDS = {"vm", "sh", "sa", "gw", "pd", "test"}
+# Prefixed IDs (passage-decoder "pd_xxxxxxxx") register their 8-character core
+PREFIXED_ID_RE = re.compile(r"(?:[a-z]+_)?([A-Za-z0-9]{8})")
+
+
+# Semantic key per output type for stable-ID mode: what makes an item "the same item"
+SEMANTIC_KEYS = {
+    "vm": lambda q: f"{q.get('word', '')}|{q.get('type', '')}|{q.get('prompt', '')}",
+    "sh": lambda w: str(w.get("word", "")),
+    "sa": lambda s: str(s.get("en", "")),
+    "gw": lambda q: f"{q.get('category', '')}|{q.get('prompt', '')}",
+    "pd": lambda s: str(s.get("en", "")),
+}
+
+
+def stable_id(text: str) -> str:
+    """8-character lowercase alphanumeric ID derived from sha256(text)."""
+    n = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    chars = []
+    for _ in range(ID_LENGTH):
+        n, r = divmod(n, len(ID_ALPHABET))
+        chars.append(ID_ALPHABET[r])
+    return "".join(chars)
+
+
+def owner_key(path) -> str:
+    """
+    Registry owner for an output file: "<BOOK>/<unit>/<file>", so the same unit checked out
+    elsewhere (data/, a temporary copy) maps to the owner its v2-data file has.
+    """
+    return "/".join(Path(path).resolve().parts[-3:])
+
+
+def iter_ids(data):
+    """Yields the 8-character core of every "id" value in a practice JSON document."""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            value = node.get("id")
+            if isinstance(value, str):
+                m = PREFIXED_ID_RE.fullmatch(value)
+                if m:
+                    yield m.group(1)
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(v for v in node if isinstance(v, (dict, list)))
+
+
+def scan_corpus(data_dir=DATA_DIR):
+    """Returns ({id: first owner}, [(id, owner, first owner)] collisions) for the practice files under data_dir."""
+    owners, collisions = {}, []
+    for path in sorted(Path(data_dir).rglob("*.json")):
+        if kind_for_path(path.name) not in ID_KINDS:
+            continue
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        owner = owner_key(path)
+        for id_ in iter_ids(data):
+            first = owners.setdefault(id_, owner)
+            if first != owner:
+                collisions.append((id_, owner, first))
+    return owners, collisions
+
+
+class IdRegistry:
+    """In-memory view of the registry file; see the module docstring."""
+
+    def __init__(self, path=None, data_dir=None):
+        self.path = Path(path or REGISTRY_PATH)
+        self.data_dir = Path(data_dir or DATA_DIR)
+        self._owners = {}
+        self._offset = 0
+        # owner -> IDs registered for it inside an id_claims() block
+        self._claims = {}
+        self._lock = threading.Lock()
+        with self._lock:
+            if not self.path.exists():
+                self._write_all(scan_corpus(self.data_dir)[0])
+            with self._locked_file() as f:
+                self._read_new(f)
+
+    def __contains__(self, id_) -> bool:
+        return id_ in self._owners
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def owner(self, id_):
+        return self._owners.get(id_)
+
+    def is_free(self, id_, owner) -> bool:
+        current = self._owners.get(id_)
+        return current is None or current == owner
+
+    @contextmanager
+    def _locked_file(self):
+        """The registry file opened for append, under an exclusive cross-process lock."""
+        with open(self.path, "a+", encoding="utf-8") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield f
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _read_new(self, f):
+        """Loads lines appended since the last read (by this or another process)."""
+        f.seek(self._offset)
+        chunk = f.read()
+        self._offset = f.tell()
+        for line in chunk.splitlines():
+            id_, _, owner = line.partition("\t")
+            owner, _, released = owner.partition("\t")
+            if not id_:
+                continue
+            if released:
+                if self._owners.get(id_) == owner:
+                    del self._owners[id_]
+            else:
+                # First registration wins; later lines for the same ID are stale duplicates
+                self._owners.setdefault(id_, owner)
+
+    def _write_all(self, owners):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text("".join(f"{i}\t{o}\n" for i, o in owners.items()), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _register(self, id_, owner, lines):
+        self._owners[id_] = owner
+        lines.append(f"{id_}\t{owner}\n")
+        if owner in self._claims:
+            self._claims[owner].add(id_)
+
+    def _draw(self, n, owner, lines) -> list:
+        fresh = []
+        while len(fresh) < n:
+            for id_ in ("".join(random.choices(ID_ALPHABET, k=ID_LENGTH)) for _ in range(n - len(fresh))):
+                if id_ not in self._owners:
+                    self._register(id_, owner, lines)
+                    fresh.append(id_)
+        return fresh
+
+    def _append(self, f, lines):
+        if lines:
+            f.seek(0, os.SEEK_END)
+            f.write("".join(lines))
+            f.flush()
+            self._offset = f.tell()
+
+    def allocate(self, n, owner) -> list:
+        """Draws and registers `n` fresh IDs for `owner` in one locked append."""
+        with self._lock, self._locked_file() as f:
+            self._read_new(f)
+            lines = []
+            fresh = self._draw(n, owner, lines)
+            self._append(f, lines)
+        return fresh
+
+    def _derive(self, items, owner, key, lines) -> list:
+        """Stable-ID mode: one ID per item from hash(owner, semantic key, occurrence)."""
+        ids, seen, occurrences = [], set(), {}
+        for item in items:
+            base = f"{owner}\n{key(item)}"
+            n = occurrences[base] = occurrences.get(base, 0) + 1
+            text = base if n == 1 else f"{base}\n#{n}"
+            id_, salt = stable_id(text), 0
+            # Only on a hash collision with another file (or a repeated key) does the ID depend on salt
+            while id_ in seen or not self.is_free(id_, owner):
+                salt += 1
+                id_ = stable_id(f"{text}\n~{salt}")
+            seen.add(id_)
+            ids.append(id_)
+            if id_ not in self._owners:
+                self._register(id_, owner, lines)
+        return ids
+
+    def assign(self, items, owner, prefix="", key=None, cross_file=True) -> list:
+        """
+        Gives every item in `items` (dicts with an "id" key) an ID unique across the corpus.
+        IDs that are well-formed, unique within `items` and free for `owner` are kept (and
+        registered); the rest are replaced from one bulk draw. With cross_file=False an ID
+        another file registered first is kept too (left to that file), so only malformed
+        and in-file duplicate IDs change. With `key` (see SEMANTIC_KEYS) every ID is derived
+        from the item's semantic key instead. Returns [(old_id, new_id)].
+        """
+        items = list(items)
+        if key is not None:
+            with self._lock, self._locked_file() as f:
+                self._read_new(f)
+                lines = []
+                derived = self._derive(items, owner, key, lines)
+                self._append(f, lines)
+            replaced = []
+            for item, id_ in zip(items, derived):
+                if item.get("id") != prefix + id_:
+                    replaced.append((item.get("id"), prefix + id_))
+                    item["id"] = prefix + id_
+            return replaced
+
+        with self._lock, self._locked_file() as f:
+            self._read_new(f)
+            lines, seen, bad = [], set(), []
+            for item in items:
+                raw = item.get("id")
+                core = raw[len(prefix):] if isinstance(raw, str) and raw.startswith(prefix) else None
+                if (core is None or not ID_RE.fullmatch(core) or core in seen
+                        or (cross_file and not self.is_free(core, owner))):
+                    bad.append(item)
+                    continue
+                seen.add(core)
+                if core not in self._owners:
+                    self._register(core, owner, lines)
+            fresh = self._draw(len(bad), owner, lines)
+            self._append(f, lines)
+        replaced = []
+        for item, id_ in zip(bad, fresh):
+            replaced.append((item.get("id"), prefix + id_))
+            item["id"] = prefix + id_
+        return replaced
+
+    def release(self, ids, owner) -> int:
+        """Releases those of `ids` that `owner` holds (one locked append). Returns the count."""
+        with self._lock, self._locked_file() as f:
+            self._read_new(f)
+            lines = []
+            for id_ in sorted(ids):
+                if self._owners.get(id_) == owner:
+                    del self._owners[id_]
+                    lines.append(f"{id_}\t{owner}\treleased\n")
+            self._append(f, lines)
+        return len(lines)
+
+    def rebuild(self):
+        """Rescans the data directory and rewrites the registry, dropping IDs no file uses any more."""
+        owners, collisions = scan_corpus(self.data_dir)
+        with self._lock, self._locked_file():
+            self._write_all(owners)
+            self._owners, self._offset = {}, 0
+            with open(self.path, encoding="utf-8") as f:
+                self._read_new(f)
+        return collisions
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> IdRegistry:
+    """Process-wide registry, loaded (or built from v2-data) on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None or _registry.path != Path(REGISTRY_PATH):
+            _registry = IdRegistry(REGISTRY_PATH)
+        return _registry
+
+
+def assign_ids(items, owner, prefix="", key=None, cross_file=True) -> list:
+    """Shortcut for get_registry().assign(...); see IdRegistry.assign."""
+    return get_registry().assign(items, owner, prefix, key, cross_file)
+
+
+class IdClaims:
+    """IDs registered for one owner inside an id_claims() block."""
+
+    def __init__(self, registry, owner):
+        self.registry = registry
+        self.owner = owner
+        self.committed = False
+
+    def commit(self, doc):
+        """Keeps the registered IDs `doc` (the written output) uses and releases the rest."""
+        ids = self.registry._claims.pop(self.owner, set())
+        unused = ids - set(iter_ids(doc))
+        if unused:
+            self.registry.release(unused, self.owner)
+        self.committed = True
+
+
+@contextmanager
+def id_claims(owner):
+    """
+    Tracks the IDs registered for `owner` in the block; see the module docstring.
+    Every one of them is released unless claims.commit(doc) ran.
+    """
+    registry = get_registry()
+    registry._claims[owner] = set()
+    claims = IdClaims(registry, owner)
+    try:
+        yield claims
+    finally:
+        if not claims.committed:
+            ids = registry._claims.pop(owner, set())
+            if ids:
+                registry.release(ids, owner)
+                print(f"  ↩️ Released {len(ids)} unused ID(s) registered for {owner}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or rebuild the corpus-wide ID registry.")
+    parser.add_argument("--rebuild", action="store_true", help="Rescan v2-data and rewrite the registry")
+    parser.add_argument("--collisions", action="store_true", help="List IDs used by more than one file")
+    parser.add_argument("--stats", action="store_true", help="Print registry size")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        collisions = get_registry().rebuild()
+        print(f"✓ Rebuilt {REGISTRY_PATH.name}: {len(get_registry())} IDs ({len(collisions)} cross-file collisions)")
+    if args.collisions:
+        _, collisions = scan_corpus()
+        for id_, owner, first in collisions:
+            print(f"{id_}\t{owner}\t(first used in {first})")
+        print(f"{len(collisions)} cross-file collision(s)", file=sys.stderr)
+    if args.stats or not (args.rebuild or args.collisions):
+        registry = get_registry()
+        owners = set(registry._owners.values())
+        print(f"{len(registry)} IDs across {len(owners)} files -> {registry.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+phases.py — Lightweight per-phase wall-clock timer for genai scripts.
+
+Generators wrap each stage of their pipeline in `with phase("..."):` blocks.
+Timings are only collected while a recording is active on the current thread
+(see `start_recording` / `stop_recording`), so normal CLI runs pay nothing.
+
+Standard phase names:
+    prompt_render, cache_setup, api_wait, json_extraction, post_processing, write,
+    audit, apply_fixes
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+def start_recording():
+    """Begin collecting phase timings on the current thread."""
+    _state.timings = {}
+
+
+def stop_recording() -> dict:
+    """Stop collecting and return {phase_name: seconds} for the current thread."""
+    timings = getattr(_state, "timings", None) or {}
+    _state.timings = None
+    return timings
+
+
+@contextmanager
+def phase(name: str):
+    """Accumulate the wall-clock time spent inside the block under `name`."""
+    timings = getattr(_state, "timings", None)
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+profiles.py — Per-generator model / thinking level / temperature profiles.
+
+Each generator reads its request settings from generator-profiles.json instead of
+hard-coding them:
+
+    {
+      "vg": {"model": "low", "thinking_level": "minimal", "temperature": 0.2},
+      ...
+    }
+
+"model" is a tier from config.py: "low" (GOOGLE_API_KEY_FREE / model_low) or
+"high" (GOOGLE_API_KEY / model_high). The `high` command-line flag still forces
+the high tier. Fields missing from the file fall back to DEFAULT_PROFILE.
+
+benchmarks/autotune.py measures candidate profiles on sample units and can write
+the winner back to this file.
+
+Usage:
+    python3 scripts/genai/profiles.py              # print the active profiles
+
+Example (in a generator):
+    api_key, model_name, profile = generator_config("vg", use_high)
+    types.GenerateContentConfig(thinking_config=types.ThinkingConfig(thinking_level=profile["thinking_level"]),
+                                temperature=profile["temperature"], ...)
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from config import get_genai_config
+
+PROFILES_PATH = Path(__file__).resolve().parent / "generator-profiles.json"
+
+DEFAULT_PROFILE = {"model": "low", "thinking_level": "low", "temperature": 0.2}
+
+TIERS = ("low", "high")
+THINKING_LEVELS = ("minimal", "low", "medium", "high")
+
+# In-process overrides ({kind: profile}), e.g. candidate profiles during autotuning
+_overrides = {}
+
+
+def load_profiles(path=None) -> dict:
+    """{kind: profile} from the profiles file (empty when it does not exist)."""
+    path = Path(path or PROFILES_PATH)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_profile(profile: dict) -> dict:
+    """Returns `profile` completed with DEFAULT_PROFILE; raises ValueError on an invalid field."""
+    profile = {**DEFAULT_PROFILE, **profile}
+    if profile["model"] not in TIERS:
+        raise ValueError(f"Unknown model tier '{profile['model']}' (expected one of {', '.join(TIERS)})")
+    if profile["thinking_level"] not in THINKING_LEVELS:
+        raise ValueError(f"Unknown thinking_level '{profile['thinking_level']}'")
+    if not isinstance(profile["temperature"], (int, float)) or not 0 <= profile["temperature"] <= 2:
+        raise ValueError(f"temperature must be a number in [0, 2], got {profile['temperature']!r}")
+    return profile
+
+
+def set_profile_override(kind: str, profile=None):
+    """Overrides the profile of generator `kind` in this process; pass None to restore the file's."""
+    if profile is None:
+        _overrides.pop(kind, None)
+    else:
+        _overrides[kind] = check_profile(profile)
+
+
+def get_profile(kind: str) -> dict:
+    """The active profile for generator `kind` (override, else file, else DEFAULT_PROFILE)."""
+    if kind in _overrides:
+        return dict(_overrides[kind])
+    return check_profile(load_profiles().get(kind, {}))
+
+
+def save_profile(kind: str, profile: dict, path=None):
+    """Writes `profile` for `kind` into the profiles file (atomically), keeping the other generators."""
+    path = Path(path or PROFILES_PATH)
+    profiles = load_profiles(path)
+    profiles[kind] = check_profile(profile)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(profiles, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def generator_config(kind: str, use_high: bool = False):
+    """
+    (api_key, model_name, profile) for generator `kind`: the tier named by its profile,
+    or the high tier when `use_high` is set.
+    """
+    profile = get_profile(kind)
+    api_key, model_name = get_genai_config(use_high or profile["model"] == "high")
+    return api_key, model_name, profile
+
+
+def main():
+    profiles = load_profiles()
+    print(f"Profiles: {PROFILES_PATH}", file=sys.stderr)
+    for kind in profiles:
+        p = get_profile(kind)
+        print(f"{kind:<6} model={p['model']:<5} thinking_level={p['thinking_level']:<8} temperature={p['temperature']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+prompt_cache.py — Explicit Gemini context caching for large, repeated prompt prefixes.
+
+Prompts are split into a stable prefix (e.g. the unit markdown shared by gen_1/4/5/6/8/9,
+or the schema guide shared by all 75 poem prompts) and a variable suffix. The prefix is
+registered once with the cached-content API and later calls only send the suffix.
+
+Cache names and expiry times are tracked in a small local registry so that separate
+generator processes (run_all.py runs each one as a subprocess) reuse the same cache.
+Entries close to expiry are extended in place; expired ones are recreated. A cache that
+disappears before its recorded expiry (deleted elsewhere, or evicted early) makes the
+generate_content call fail; callers pass that error to recover_missing_cache(), which
+drops the registry entry and returns contents for a fresh cache or the full prompt.
+
+Usage (CLI):
+    python3 scripts/genai/prompt_cache.py --list     # show registered caches
+    python3 scripts/genai/prompt_cache.py --purge    # delete all registered caches [high]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+REGISTRY_PATH = Path(__file__).resolve().parent / ".prompt-cache-registry.json"
+
+DEFAULT_TTL_SECONDS = 3600
+# Extend a cache if it would expire within this window
+REFRESH_MARGIN_SECONDS = 300
+# Gemini rejects caches below a minimum token count (~1024); skip obviously small prefixes
+MIN_CACHE_CHARS = 4000
+
+_lock = threading.Lock()
+
+
+def unit_source_prefix(source: str) -> str:
+    """Stable, byte-identical prefix for every generator that sends the same unit markdown."""
+    return f"=== SOURCE MARKDOWN ===\n{source}\n=== END OF SOURCE MARKDOWN ===\n"
+
+
+def _load_registry() -> dict:
+    if REGISTRY_PATH.exists():
+        try:
+            return json.loads(REGISTRY_PATH.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+    return {}
+
+
+def _save_registry(registry: dict):
+    tmp_path = REGISTRY_PATH.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(registry, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, REGISTRY_PATH)
+
+
+def _prefix_key(model_name: str, prefix: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{prefix}".encode("utf-8")).hexdigest()[:32]
+
+
+def _expire_epoch(cached) -> float:
+    expire_time = getattr(cached, "expire_time", None)
+    if expire_time is None:
+        return time.time() + DEFAULT_TTL_SECONDS
+    return expire_time.timestamp()
+
+
+def get_or_create_cache(client, model_name: str, prefix: str, display_name: str = "",
+                        ttl_seconds: int = DEFAULT_TTL_SECONDS):
+    """
+    Returns the cached-content name holding `prefix`, creating or extending it as needed.
+    Returns None if the prefix is too small to cache or the API refuses it.
+    """
+    from google.genai import types
+
+    if len(prefix) < MIN_CACHE_CHARS:
+        return None
+
+    key = _prefix_key(model_name, prefix)
+    with _lock:
+        registry = _load_registry()
+        entry = registry.get(key)
+        now = time.time()
+
+        if entry and entry["expire_time"] - now > REFRESH_MARGIN_SECONDS:
+            return entry["name"]
+
+        if entry and entry["expire_time"] > now:
+            try:
+                cached = client.caches.update(
+                    name=entry["name"],
+                    config=types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s"),
+                )
+                entry["expire_time"] = _expire_epoch(cached)
+                _save_registry(registry)
+                print(f"  ♻️ Extended prompt cache {entry['name']} by {ttl_seconds}s", file=sys.stderr)
+                return entry["name"]
+            except Exception as e:
+                print(f"  ⚠️ Could not extend prompt cache {entry['name']}: {e}", file=sys.stderr)
+
+        try:
+            cached = client.caches.create(
+                model=model_name,
+                config=types.CreateCachedContentConfig(
+                    contents=[prefix],
+                    display_name=display_name[:128],
+                    ttl=f"{ttl_seconds}s",
+                ),
+            )
+        except Exception as e:
+            print(f"  ⚠️ Prompt cache unavailable, sending full prompt: {e}", file=sys.stderr)
+            return None
+
+        registry[key] = {
+            "name": cached.name,
+            "model": model_name,
+            "display_name": display_name,
+            "expire_time": _expire_epoch(cached),
+        }
+        # Drop entries that have already expired server-side
+        for k in [k for k, v in registry.items() if v["expire_time"] <= now]:
+            del registry[k]
+        _save_registry(registry)
+        print(f"  📦 Created prompt cache {cached.name} ({len(prefix)} chars, ttl {ttl_seconds}s)", file=sys.stderr)
+        return cached.name
+
+
+def forget_cache(cache_name: str):
+    """Drops `cache_name` from the registry (e.g. after the server reported it missing)."""
+    with _lock:
+        registry = _load_registry()
+        stale = [k for k, v in registry.items() if v["name"] == cache_name]
+        for k in stale:
+            del registry[k]
+        if stale:
+            _save_registry(registry)
+
+
+def is_missing_cache_error(error) -> bool:
+    """True when a generate_content error says the cached content no longer exists."""
+    text = str(error).lower()
+    if "cachedcontent" not in text and "cached content" not in text:
+        return False
+    return getattr(error, "code", None) in (403, 404) or "not found" in text
+
+
+def recover_missing_cache(error, client, model_name: str, prefix: str, suffix: str, cache_name,
+                          display_name: str = ""):
+    """
+    For a generate_content `error` caused by `cache_name` having vanished server-side, forgets
+    the registry entry and returns fresh (contents, cached_content_name) from a new cache (or
+    the full prompt). Returns None for any other error, so the caller retries as usual.
+    """
+    if not cache_name or not is_missing_cache_error(error):
+        return None
+    print(f"  ⚠️ Prompt cache {cache_name} is gone; recreating it", file=sys.stderr)
+    forget_cache(cache_name)
+    return cached_contents(client, model_name, prefix, suffix, display_name)
+
+
+def cached_contents(client, model_name: str, prefix: str, suffix: str, display_name: str = "", use_cache: bool = True):
+    """
+    Returns (contents, cached_content_name) for a generate_content call.
+    When caching is unavailable the full prefix + suffix is returned with a None cache name.
+    """
+    cache_name = get_or_create_cache(client, model_name, prefix, display_name) if use_cache else None
+    if cache_name:
+        return suffix, cache_name
+    return prefix + "\n" + suffix, None
+
+
+def log_usage(response):
+    """Prints prompt/cached/output token counts so cache savings are visible per call."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    print(
+        f"  tokens: prompt={usage.prompt_token_count or 0} "
+        f"cached={usage.cached_content_token_count or 0} "
+        f"output={usage.candidates_token_count or 0}",
+        file=sys.stderr,
+    )
+
+
+def main():
+    genai_dir = Path(__file__).resolve().parent
+    if str(genai_dir) not in sys.path:
+        sys.path.insert(0, str(genai_dir))
+    from config import get_genai_config, parse_high_flag, create_client
+
+    use_high = parse_high_flag()
+    registry = _load_registry()
+
+    if "--purge" in sys.argv:
+        api_key, _ = get_genai_config(use_high)
+        client = create_client(api_key)
+        for key, entry in list(registry.items()):
+            try:
+                client.caches.delete(name=entry["name"])
+                print(f"Deleted {entry['name']} ({entry.get('display_name', '')})")
+            except Exception as e:
+                print(f"Could not delete {entry['name']}: {e}")
+            del registry[key]
+        _save_registry(registry)
+        return
+
+    if not registry:
+        print("No registered prompt caches.")
+        return
+    now = time.time()
+    for entry in registry.values():
+        remaining = int(entry["expire_time"] - now)
+        state = f"expires in {remaining}s" if remaining > 0 else "expired"
+        print(f"{entry['name']}  {entry['model']}  {entry.get('display_name', '')}  ({state})")
+
+
+if __name__ == "__main__":
+    main()
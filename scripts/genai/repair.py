@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+repair.py — Targeted repair of schema violations in generator output.
+
+Instead of rerunning a whole generator (or going through the audit report and
+apply_audit_fixes.py) when a few challenges or items are malformed, the generator
+maps every violation to the smallest repairable fragment — a question, a sentence,
+a spelling word, or the whole challenge when the challenge itself is wrong (e.g. 9
+questions instead of 10) — sends ONE focused prompt containing only those fragments
+and the problems found, and splices the corrected fragments back in place.
+
+Violations outside any repairable fragment (missing top-level fields, wrong number
+of challenges) are left for validate_or_exit to report.
+
+Usage (from a generator, before validate_or_exit):
+    parsed, errors = repair_document(client, model_name, "vm", parsed, REPAIR_RULES,
+                                     context=vg_summary, normalize=post_process,
+                                     thinking_level=profile["thinking_level"], temperature=profile["temperature"])
+    validate_or_exit("vm", parsed, out_path, errors=errors)
+"""
+
+import json
+import sys
+import time
+
+from google.genai import types
+from phases import phase
+from prompt_cache import cached_contents, recover_missing_cache, log_usage
+from response_schemas import repair_schema
+from schemas import violations, format_keys
+
+# Repairable fragment paths per output type, deepest first. int matches any list index.
+FRAGMENT_LEVELS = {
+    "vm": (("challenges", int, "questions", int), ("challenges", int)),
+    "sa": (("challenges", int, "data", int), ("challenges", int)),
+    "sh": (("spelling_words", int),),
+}
+
+TYPE_LABELS = {"vm": "vocab-master", "sa": "sentence-architect", "sh": "spelling-hero"}
+
+MAX_ROUNDS = 2
+
+REPAIR_PROMPT = """\
+You previously generated a {label} JSON document. Some fragments of it failed validation.
+Rewrite ONLY the fragments listed below so that they satisfy the rules. Keep every field
+that is already correct, and keep each fragment's "id" unless the problem is the id itself.
+
+=== RULES ===
+{rules}
+{context}
+=== FRAGMENTS TO FIX ===
+Each entry gives the fragment's path in the document, the problems found, and its current JSON.
+
+{fragments}
+
+Output ONLY a JSON object mapping each path above to its corrected fragment, e.g.
+{{"{example}": {{...}}}}
+No markdown fences, no commentary.
+"""
+
+
+def _matches(keys, pattern) -> bool:
+    if len(keys) < len(pattern):
+        return False
+    for key, want in zip(keys, pattern):
+        if want is int:
+            if not isinstance(key, int):
+                return False
+        elif key != want:
+            return False
+    return True
+
+
+def fragment_for(keys, levels):
+    """Key tuple of the deepest repairable fragment containing the violation at `keys`, or None."""
+    for pattern in levels:
+        if _matches(keys, pattern):
+            # A violation *on* the item list itself (e.g. wrong length) belongs to its parent
+            return tuple(keys[:len(pattern)])
+    return None
+
+
+def _describe(rel, msg) -> str:
+    return f"{format_keys(rel)[2:] or 'fragment'}: {msg}"
+
+
+def group_violations(found, levels):
+    """
+    Groups (keys, message) violations by repairable fragment.
+    Returns ({fragment_keys: [problem strings]}, [unrepairable "path: message" strings]).
+    Item-level fragments inside a challenge that is itself being repaired are folded into it.
+    """
+    grouped, unrepairable = {}, []
+    for keys, msg in found:
+        frag = fragment_for(keys, levels)
+        if frag is None:
+            unrepairable.append(f"{format_keys(keys)}: {msg}")
+        else:
+            grouped.setdefault(frag, []).append((keys, msg))
+    owners = {}
+    for frag in sorted(grouped, key=len):
+        owner = next((t for t in owners if frag[:len(t)] == t), frag)
+        owners.setdefault(owner, []).extend(grouped[frag])
+    targets = {frag: [_describe(keys[len(frag):], msg) for keys, msg in owners[frag]] for frag in sorted(owners)}
+    return targets, unrepairable
+
+
+def get_at(doc, keys):
+    for key in keys:
+        doc = doc[key]
+    return doc
+
+
+def set_at(doc, keys, value):
+    get_at(doc, keys[:-1])[keys[-1]] = value
+
+
+def render_prompt(kind, doc, targets, rules, context=""):
+    blocks = []
+    for keys, problems in targets.items():
+        fragment = json.dumps(get_at(doc, keys), ensure_ascii=False, indent=2)
+        listed = "\n".join(f"  - {p}" for p in problems)
+        blocks.append(f"--- {format_keys(keys)} ---\nProblems:\n{listed}\nCurrent JSON:\n{fragment}")
+    return REPAIR_PROMPT.format(
+        label=TYPE_LABELS.get(kind, kind),
+        rules=rules.strip(),
+        context=f"\n{context.strip()}\n" if context else "",
+        fragments="\n\n".join(blocks),
+        example=format_keys(next(iter(targets))),
+    )
+
+
+def _generate(client, model_name, contents, cache_name, temperature, thinking_level="low", prefix=None, prompt="",
+              display_name="", schema=None):
+    for attempt in range(3):
+        try:
+            return client.models.generate_content(
+                model=model_name,
+                contents=contents,
+                config=types.GenerateContentConfig(
+                    thinking_config=types.ThinkingConfig(thinking_level=thinking_level),
+                    temperature=temperature,
+                    response_mime_type="application/json",
+                    response_json_schema=schema,
+                    cached_content=cache_name
+                )
+            )
+        except Exception as e:
+            recovered = recover_missing_cache(e, client, model_name, prefix, prompt, cache_name, display_name)
+            if recovered:
+                contents, cache_name = recovered
+                continue
+            print(f"Error calling Gemini API for repair (attempt {attempt + 1}/3): {e}", file=sys.stderr)
+            if attempt == 2:
+                raise e
+            time.sleep(2 ** attempt)
+
+
+def splice(doc, targets, fixes) -> int:
+    """Writes each corrected fragment from `fixes` ({path label: fragment}) back into doc. Returns the count."""
+    applied = 0
+    for keys in targets:
+        fixed = fixes.get(format_keys(keys))
+        if isinstance(fixed, dict):
+            set_at(doc, keys, fixed)
+            applied += 1
+    return applied
+
+
+def repair_document(client, model_name, kind, doc, rules, context="", prefix=None, display_name="",
+                    use_cache=True, temperature=0.2, thinking_level="low", normalize=None, max_rounds=MAX_ROUNDS):
+    """
+    Validates `doc` as output type `kind` and repairs failing fragments in place with focused
+    prompts, for up to `max_rounds` rounds. `prefix` (e.g. the unit source) goes through the
+    prompt cache when given; `temperature` and `thinking_level` come from the generator's
+    profile (profiles.py); `normalize(doc)` reruns the generator's own post-processing
+    after each splice. Returns (doc, remaining "path: message" violations) so callers can
+    hand the final state to validate_or_exit without validating twice.
+    """
+    levels = FRAGMENT_LEVELS[kind]
+    with phase("post_processing"):
+        found = violations(kind, doc)
+    for round_no in range(1, max_rounds + 1):
+        targets, _ = group_violations(found, levels)
+        if not targets:
+            break
+
+        print(f"🔧 {kind.upper()}: repairing {len(targets)} fragment(s) (round {round_no}/{max_rounds})", file=sys.stderr)
+        with phase("prompt_render"):
+            prompt = render_prompt(kind, doc, targets, rules, context)
+            schema = repair_schema(kind, {format_keys(keys): keys for keys in targets})
+        with phase("cache_setup"):
+            if prefix:
+                contents, cache_name = cached_contents(client, model_name, prefix, prompt,
+                                                       display_name=display_name, use_cache=use_cache)
+            else:
+                contents, cache_name = prompt, None
+        with phase("api_wait"):
+            response = _generate(client, model_name, contents, cache_name, temperature, thinking_level,
+                                 prefix=prefix, prompt=prompt, display_name=display_name, schema=schema)
+        log_usage(response)
+
+        with phase("json_extraction"):
+            try:
+                fixes = json.loads(response.text)
+            except ValueError as e:
+                print(f"⚠️  Repair response was not valid JSON: {e}", file=sys.stderr)
+                break
+
+        with phase("post_processing"):
+            applied = splice(doc, targets, fixes)
+            if applied and normalize is not None:
+                normalize(doc)
+        print(f"  ✓ spliced {applied}/{len(targets)} fragment(s)", file=sys.stderr)
+        if not applied:
+            break
+        with phase("post_processing"):
+            found = violations(kind, doc)
+    return doc, [f"{format_keys(keys)}: {msg}" for keys, msg in found]
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+replay_client.py — Offline stand-in for `genai.Client` that replays recorded responses.
+
+Responses are stored one per file in a replay directory, keyed by a hash of
+(model, contents). On a miss the client either calls `record_fallback` (and
+stores what it returns) or raises KeyError, so a directory can be recorded
+once and replayed any number of times without network access.
+
+The client also emulates the cached-content API (`client.caches`): caches are
+persisted under `<replay_dir>/caches/` with their TTL, and a request that uses
+`cached_content` is keyed exactly like the equivalent uncached prompt
+(prefix + "\n" + suffix), so fixtures replay the same either way.
+
+`LocalTTSClient` stands in for the TTS endpoint: it answers audio requests with
+deterministic 24 kHz 16-bit PCM (a tone per word, padded with silence) so audio
+pipelines can run end to end offline.
+
+Uploaded files (`client.files`) are named after a hash of their bytes, so a
+request that attaches the same file replays under the same key.
+
+Usage (inside a benchmark or a local test run):
+    from config import set_client_factory
+    from replay_client import ReplayClient
+    set_client_factory(lambda api_key: ReplayClient("temp/replay", latency=0.2))
+"""
+
+import datetime
+import hashlib
+import json
+import math
+import os
+import re
+import time
+import uuid
+from types import SimpleNamespace
+
+
+def replay_key(model: str, contents) -> str:
+    """Stable hash of a request. `contents` may be a string or any JSON-able structure."""
+    if not isinstance(contents, str):
+        contents = json.dumps(contents, ensure_ascii=False, sort_keys=True, default=str)
+    digest = hashlib.sha256(f"{model}\n{contents}".encode("utf-8")).hexdigest()
+    return digest[:32]
+
+
+class ReplayResponse:
+    """Mimics the parts of `GenerateContentResponse` the genai scripts read."""
+
+    def __init__(self, text: str, prompt_tokens: int = 0, output_tokens: int = 0, cached_tokens: int = 0):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            cached_content_token_count=cached_tokens,
+        )
+
+
+def _ttl_seconds(ttl) -> float:
+    match = re.fullmatch(r"\s*([\d.]+)s\s*", str(ttl or ""))
+    return float(match.group(1)) if match else 3600.0
+
+
+class _ReplayCaches:
+    """Emulates client.caches.create/get/update/delete/list with on-disk persistence."""
+
+    def __init__(self, client):
+        self._dir = os.path.join(client.replay_dir, "caches")
+        os.makedirs(self._dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self._dir, name.replace("/", "_") + ".json")
+
+    def _load(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise KeyError(f"Cached content not found: {name}")
+        with open(path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if record["expire_time"] <= time.time():
+            raise KeyError(f"Cached content expired: {name}")
+        return record
+
+    def _save(self, record):
+        with open(self._path(record["name"]), "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+
+    @staticmethod
+    def _view(record):
+        return SimpleNamespace(
+            name=record["name"],
+            model=record["model"],
+            display_name=record.get("display_name", ""),
+            expire_time=datetime.datetime.fromtimestamp(record["expire_time"], tz=datetime.timezone.utc),
+        )
+
+    def create(self, model, config=None):
+        contents = getattr(config, "contents", None) or []
+        record = {
+            "name": f"cachedContents/replay-{uuid.uuid4().hex[:12]}",
+            "model": model,
+            "display_name": getattr(config, "display_name", "") or "",
+            "text": "\n".join(str(c) for c in contents),
+            "expire_time": time.time() + _ttl_seconds(getattr(config, "ttl", None)),
+        }
+        self._save(record)
+        return self._view(record)
+
+    def get(self, name):
+        return self._view(self._load(name))
+
+    def update(self, name, config=None):
+        record = self._load(name)
+        record["expire_time"] = time.time() + _ttl_seconds(getattr(config, "ttl", None))
+        self._save(record)
+        return self._view(record)
+
+    def delete(self, name):
+        path = self._path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def list(self):
+        views = []
+        for fname in os.listdir(self._dir):
+            with open(os.path.join(self._dir, fname), "r", encoding="utf-8") as f:
+                views.append(self._view(json.load(f)))
+        return views
+
+    def text_of(self, name):
+        return self._load(name)["text"]
+
+
+class _ReplayFiles:
+    """Emulates client.files.upload/get/delete; files are ACTIVE immediately and named by content hash."""
+
+    def __init__(self, client):
+        self._dir = os.path.join(client.replay_dir, "files")
+        os.makedirs(self._dir, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self._dir, name.replace("/", "_") + ".json")
+
+    @staticmethod
+    def _view(record):
+        return SimpleNamespace(
+            name=record["name"],
+            display_name=record.get("display_name", ""),
+            mime_type=record.get("mime_type", ""),
+            size_bytes=record["size_bytes"],
+            state=SimpleNamespace(name="ACTIVE"),
+        )
+
+    def upload(self, file, config=None):
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "rb") as f:
+                data = f.read()
+        else:
+            data = file.read()
+        record = {
+            "name": f"files/replay-{hashlib.sha256(data).hexdigest()[:16]}",
+            "display_name": getattr(config, "display_name", "") or "",
+            "mime_type": getattr(config, "mime_type", "") or "",
+            "size_bytes": len(data),
+        }
+        with open(self._path(record["name"]), "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        return self._view(record)
+
+    def get(self, name):
+        path = self._path(name)
+        if not os.path.exists(path):
+            raise KeyError(f"File not found: {name}")
+        with open(path, "r", encoding="utf-8") as f:
+            return self._view(json.load(f))
+
+    def delete(self, name):
+        path = self._path(name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class _ReplayModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        return self._client._respond(model, contents, config)
+
+
+class ReplayClient:
+    """
+    :param replay_dir: Directory holding `<key>.json` response records.
+    :param latency: Seconds to sleep per call, simulating API wait. When None,
+                    the latency stored in each record is used.
+    :param record_fallback: Optional callable(model, contents, config) -> str used on a miss.
+    """
+
+    def __init__(self, replay_dir, latency=None, record_fallback=None):
+        self.replay_dir = str(replay_dir)
+        self.latency = latency
+        self.record_fallback = record_fallback
+        os.makedirs(self.replay_dir, exist_ok=True)
+        self.models = _ReplayModels(self)
+        self.caches = _ReplayCaches(self)
+        self.files = _ReplayFiles(self)
+
+    def _path(self, key):
+        return os.path.join(self.replay_dir, f"{key}.json")
+
+    def _respond(self, model, contents, config):
+        cached_text = ""
+        cache_name = getattr(config, "cached_content", None)
+        if cache_name:
+            cached_text = self.caches.text_of(cache_name)
+            contents = cached_text + "\n" + contents
+        key = replay_key(model, contents)
+        path = self._path(key)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        elif self.record_fallback is not None:
+            record = {"model": model, "text": self.record_fallback(model, contents, config), "latency_s": self.latency or 0.0}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+        else:
+            raise KeyError(f"No replay record for model={model} key={key} in {self.replay_dir}")
+
+        delay = self.latency if self.latency is not None else record.get("latency_s", 0.0)
+        if delay:
+            time.sleep(delay)
+
+        prompt_len = len(contents) if isinstance(contents, str) else len(json.dumps(contents, ensure_ascii=False, default=str))
+        # Rough 4-chars-per-token estimate so usage reporting has something to show offline
+        return ReplayResponse(
+            record["text"],
+            prompt_tokens=prompt_len // 4,
+            output_tokens=len(record["text"]) // 4,
+            cached_tokens=len(cached_text) // 4,
+        )
+
+
+class _LocalTTSModels:
+    def __init__(self, client):
+        self._client = client
+
+    def generate_content(self, model, contents, config=None):
+        return self._client._speak(model, contents if isinstance(contents, str) else " ".join(map(str, contents)))
+
+
+class LocalTTSClient:
+    """
+    Offline TTS stand-in. Each word becomes a short tone whose pitch is derived from the
+    text hash, with `pad_s` of silence before and after, returned in the same
+    `candidates[0].content.parts[0].inline_data.data` shape as the real endpoint.
+
+    A prompt of several blank-line-separated paragraphs is read as an instruction followed
+    by one sentence per paragraph: the instruction is not spoken and each sentence is
+    followed by `gap_s` of silence, like a multi-sentence render from the real model.
+
+    :param sample_rate: PCM sample rate (the Gemini TTS models emit 24 kHz mono 16-bit).
+    :param latency: Seconds to sleep per call, simulating API wait.
+    """
+
+    def __init__(self, sample_rate=24000, latency=0.0, pad_s=0.3, word_s=0.25, gap_s=1.5):
+        self.sample_rate = sample_rate
+        self.latency = latency
+        self.pad_s = pad_s
+        self.word_s = word_s
+        self.gap_s = gap_s
+        self.calls = 0
+        self.models = _LocalTTSModels(self)
+
+    def _speak(self, model, text):
+        import numpy as np
+
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+        sentences = paragraphs[1:] if len(paragraphs) > 1 else paragraphs
+        pad = np.zeros(int(self.sample_rate * self.pad_s))
+        gap = np.zeros(int(self.sample_rate * self.gap_s))
+        pieces = [pad]
+        for i, sentence in enumerate(sentences):
+            words = max(1, len(sentence.split()))
+            freq = 220 + int(hashlib.sha256(sentence.encode("utf-8")).hexdigest()[:4], 16) % 440
+            t = np.arange(int(self.sample_rate * self.word_s * words)) / self.sample_rate
+            pieces.append(0.3 * np.sin(2 * math.pi * freq * t))
+            pieces.append(gap if i < len(sentences) - 1 else pad)
+        pcm = (np.concatenate(pieces) * 32767).astype("<i2").tobytes()
+        part = SimpleNamespace(inline_data=SimpleNamespace(data=pcm, mime_type=f"audio/L16;rate={self.sample_rate}"))
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))], text=None)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+response_schemas.py — Structured-output schemas the generators pass to the Gemini API.
+
+schemas.py checks a parsed document after the fact and only lists the fields it
+validates; the schemas here describe the COMPLETE output of each generator (every
+field of its prompt skeleton, in skeleton order) and are sent as
+GenerateContentConfig(response_json_schema=...), so the model is constrained to
+emit exactly that structure: required fields are always present, enums and answer
+indexes stay in range, fixed-size arrays have the right length, and the response
+is plain JSON that json.loads() reads directly.
+
+They are written as JSON Schema (not types.Schema) because the recall-map and
+text-navigator trees are recursive ($ref into $defs) and test answers can be an
+index, a string or a boolean (anyOf). Constraints JSON Schema cannot express
+(unique options, answer matching an option, corpus-unique IDs) are still enforced
+by id_registry.py and schemas.py.
+
+Usage (in a generator):
+    config=types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_json_schema=response_schema("vm", challenges=targets["num_challenges"]),
+    )
+    parsed = json.loads(response.text)
+
+repair.py sends repair_schema(kind, {path label: keys}) so a repair response maps
+each fragment path to a fragment of the same shape.
+
+    python3 scripts/genai/response_schemas.py vm    # print a schema
+"""
+
+import copy
+import json
+import sys
+
+STRING = {"type": "string"}
+INTEGER = {"type": "integer"}
+BOOLEAN = {"type": "boolean"}
+
+
+def obj(properties, optional=()):
+    """Object schema requiring every property except the `optional` ones."""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": [k for k in properties if k not in optional],
+    }
+
+
+def array(items, length=None, min_items=None, max_items=None):
+    """Array schema; `length` fixes the element count."""
+    schema = {"type": "array", "items": items}
+    if length is not None:
+        min_items = max_items = length
+    if min_items is not None:
+        schema["minItems"] = min_items
+    if max_items is not None:
+        schema["maxItems"] = max_items
+    return schema
+
+
+def strings(length=None, min_items=None, max_items=None):
+    return array(STRING, length, min_items, max_items)
+
+
+def enum(*values):
+    return {"type": "string", "enum": list(values)}
+
+
+def index(n):
+    """Index of the correct option among `n` options."""
+    return {"type": "integer", "minimum": 0, "maximum": n - 1}
+
+
+def challenge(questions_key, item, length):
+    return obj({"id": STRING, "title": STRING, "icon": STRING, questions_key: array(item, length)})
+
+
+TEST_SECTION_TYPES = [
+    "cloze-passage", "cloze-passage-wordbank", "reading-comprehension", "multiple-choice",
+    "fill-in-the-blank-wordbank", "fill-in-the-blank-firstletter", "definition-matching",
+    "dialogue-completion", "true-false", "put-words-in-order",
+]
+
+RESPONSE_SCHEMAS = {
+    "vg": obj({
+        "level": STRING,
+        "source_file": STRING,
+        "unit_vocabulary": array(obj({
+            "word": STRING,
+            # Single words only; phrases omit it
+            "ipa": STRING,
+            "meaning": STRING,
+            "syllable_type": STRING,
+            "comparison": STRING,
+            "page_number": STRING,
+            "context_sentence": STRING,
+            "memorization_hook": STRING,
+        }, optional=["ipa"]), min_items=1),
+    }),
+    "vm": obj({
+        "level": STRING,
+        "title": STRING,
+        "stats": obj({"vocab_guide_items": INTEGER, "vocab_master_questions": INTEGER}),
+        "challenges": array(challenge("questions", obj({
+            "id": STRING,
+            "word": STRING,
+            "meaning": STRING,
+            "context_sentence": STRING,
+            "cn": STRING,
+            "hint": STRING,
+            "type": enum("Cloze", "Cn2En", "En2Cn"),
+            "prompt": STRING,
+            "options": strings(6),
+            "answer": index(6),
+        }), 10), min_items=1),
+    }),
+    "sh": obj({
+        "level": STRING,
+        "title": STRING,
+        "spelling_words": array(obj({
+            "id": STRING,
+            "word": STRING,
+            "meaning": STRING,
+            "type": enum("single-syllable", "multi-syllable"),
+            "chunks": array(obj({"correct": STRING, "options": strings(3)}), min_items=1),
+        }), min_items=1),
+    }),
+    "sa": obj({
+        "title": STRING,
+        "level": STRING,
+        "primaryColor": STRING,
+        "primaryColorDark": STRING,
+        "storageSuffix": STRING,
+        "passcode": STRING,
+        # word -> British IPA without slashes
+        "ipaDict": {"type": "object", "additionalProperties": STRING},
+        "challenges": array(challenge("data", obj({
+            "id": STRING,
+            "en": STRING,
+            "cn": STRING,
+            "hint": STRING,
+            "noise": strings(min_items=2, max_items=5),
+            "accept": strings(),
+        }), 10), 5),
+    }),
+    "rm": {
+        **obj({"level": STRING, "part": STRING, "tree": {"$ref": "#/$defs/rm_node"}}),
+        "$defs": {
+            "rm_node": obj({
+                "id": STRING,
+                "text": STRING,
+                "emoji": STRING,
+                "state": enum("emoji", "hidden"),
+                "children": array({"$ref": "#/$defs/rm_node"}),
+            }, optional=["children"]),
+        },
+    },
+    "tn": {
+        **obj({
+            "level": STRING,
+            "part": STRING,
+            "sections": array(obj({"section": STRING, "tree": {"$ref": "#/$defs/tn_node"}}), min_items=1),
+        }),
+        "$defs": {
+            # Only the root and heading nodes skip the sentence fields
+            "tn_node": obj({
+                "id": STRING,
+                "text": STRING,
+                "speaker": STRING,
+                "cn": STRING,
+                "notes": STRING,
+                "statement": STRING,
+                "answer": BOOLEAN,
+                "explanation": STRING,
+                "emoji": STRING,
+                "keywords": STRING,
+                "highlight": STRING,
+                "children": array({"$ref": "#/$defs/tn_node"}),
+            }, optional=["speaker", "cn", "notes", "statement", "answer", "explanation", "keywords", "highlight"]),
+        },
+    },
+    "gw": obj({
+        "level": STRING,
+        "title": STRING,
+        "challenges": array(challenge("questions", obj({
+            "id": STRING,
+            "type": enum("multiple-choice"),
+            "category": enum("purpose", "definition", "formation", "usage", "differentiation"),
+            "prompt": STRING,
+            "options": strings(4),
+            "answer": index(4),
+            "explanation": STRING,
+            "hint": STRING,
+        }), 10), 2),
+    }),
+    "pd": obj({
+        "level": STRING,
+        "title": STRING,
+        "sections": array(obj({
+            "title": STRING,
+            "sentences": array(obj({
+                "id": STRING,
+                "en": STRING,
+                "options": strings(3),
+                "answer": index(3),
+                # "" when not a dialogue line / no vocabulary match
+                "speaker": STRING,
+                "newline": BOOLEAN,
+                "highlight": STRING,
+            }), min_items=1),
+        }), min_items=1),
+    }),
+    "test": obj({
+        "level": STRING,
+        "title": STRING,
+        "sections": array(obj({
+            "id": STRING,
+            "title": STRING,
+            "instruction": STRING,
+            "type": enum(*TEST_SECTION_TYPES),
+            "passage": STRING,
+            "wordbank": strings(),
+            "dialogue": array(obj({"speaker": STRING, "text": STRING})),
+            "options": strings(),
+            "questions": array(obj({
+                "id": STRING,
+                # reading-comprehension items only
+                "type": enum("multiple-choice", "short-answer"),
+                "blankIndex": INTEGER,
+                "prompt": STRING,
+                "options": strings(),
+                # option index, word/sentence, or true/false depending on the section type
+                "answer": {"anyOf": [INTEGER, STRING, BOOLEAN]},
+                "translation": STRING,
+                "explanation": STRING,
+            }, optional=["type", "blankIndex", "prompt", "options"]), min_items=1),
+        }, optional=["passage", "wordbank", "dialogue", "options"]), min_items=1),
+    }),
+}
+
+
+def response_schema(kind, **lengths) -> dict:
+    """
+    The response schema for output type `kind`. Keyword arguments fix the length of
+    top-level arrays known only at run time, e.g. response_schema("vm", challenges=4).
+    """
+    schema = RESPONSE_SCHEMAS[kind]
+    if not lengths:
+        return schema
+    schema = copy.deepcopy(schema)
+    for key, length in lengths.items():
+        schema["properties"][key]["minItems"] = schema["properties"][key]["maxItems"] = length
+    return schema
+
+
+def fragment_schema(kind, keys) -> dict:
+    """
+    The sub-schema of `kind`'s response schema at a document path (str keys are
+    properties, int keys list items), e.g. ("challenges", 0, "questions", 3).
+    """
+    schema = RESPONSE_SCHEMAS[kind]
+    for key in keys:
+        schema = schema["items"] if isinstance(key, int) else schema["properties"][key]
+    return schema
+
+
+def repair_schema(kind, fragments) -> dict:
+    """
+    The response schema for a repair.py prompt: an object mapping each path label in
+    `fragments` ({label: keys}) to a corrected fragment of that path's schema.
+    """
+    return obj({label: fragment_schema(kind, keys) for label, keys in fragments.items()})
+
+
+def main():
+    if len(sys.argv) != 2 or sys.argv[1] not in RESPONSE_SCHEMAS:
+        print(f"Usage: python3 scripts/genai/response_schemas.py <{'|'.join(RESPONSE_SCHEMAS)}>", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(RESPONSE_SCHEMAS[sys.argv[1]], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,19 @@
 run_all.py — Run all genai scripts sequentially for a given unit folder.
 
 Usage:
-    python3 scripts/genai/run_all.py <path-to-unit-folder> [high]
+    python3 scripts/genai/run_all.py <path-to-unit-folder> [high | cascade] [--no-cache] [--stable-ids]
 
 Example:
     python3 scripts/genai/run_all.py data/A4A/a4a-u4
     python3 scripts/genai/run_all.py data/SA1/sa1-u5 high
+    python3 scripts/genai/run_all.py data/SA1/sa1-u5 cascade   # low tier, failing items re-run on high (see cascade.py)
 """
 
 import os
 import sys
 import subprocess
 from pathlib import Path
-from config import parse_high_flag
+from config import parse_high_flag, parse_cascade_flag, parse_no_cache_flag, parse_stable_ids_flag
 
 # List of scripts, their expected output file suffixes, and their required input type
 SCRIPTS = [
@@ -29,8 +30,14 @@ SCRIPTS = [
     ("gen_10_test.py", "-test.json", "test_md"),
 ]
 
+# Scripts that mint item IDs and accept --stable-ids
+ID_SCRIPTS = {"gen_2_vm.py", "gen_3_sh.py", "gen_4_sa.py", "gen_8_gw.py", "gen_9_pd.py", "gen_10_test.py"}
+
 def main():
     use_high = parse_high_flag()
+    use_cascade = parse_cascade_flag() and not use_high
+    no_cache = parse_no_cache_flag()
+    stable_ids = parse_stable_ids_flag()
 
     if len(sys.argv) < 2:
         print("Usage: python3 scripts/genai/run_all.py <path-to-unit-folder> [high]")
@@ -83,6 +90,12 @@ def main():
         cmd = [sys.executable, str(script_path), str(input_file)]
         if use_high:
             cmd.append("high")
+        elif use_cascade:
+            cmd.append("cascade")
+        if no_cache:
+            cmd.append("--no-cache")
+        if stable_ids and script_name in ID_SCRIPTS:
+            cmd.append("--stable-ids")
         try:
             subprocess.run(cmd, check=True)
             import time
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+schemas.py — Declarative output schemas for every practice type, compiled to fast validators.
+
+Each generator validates its parsed JSON against the schema for its output type before
+writing, so structurally malformed output (wrong challenge size, missing fields, bad IDs,
+answer index out of range) fails in the generator instead of surfacing later in
+audit_unit.py. The rules mirror the structure sections of GEMINI.md.
+
+A schema is a plain dict:
+    type         "object" | "array" | "string" | "integer" | "boolean" | "number" | "null" | "any" (or a tuple)
+    required     keys that must be present (object)
+    properties   {key: schema} checked when the key is present (object)
+    index_into   (index_key, list_key): obj[index_key] must be a valid index into obj[list_key]
+    member_of    (value_key, list_key): obj[value_key] must be an element of obj[list_key]
+    items        schema for every element (array)
+    len / min_items / max_items    element count bounds (array)
+    unique       elements must be distinct (array of scalars)
+    unique_by    key whose value must be distinct across elements (array of objects)
+    pattern      regex the whole string must match (string)
+    enum / const allowed values
+    non_empty    string must not be blank
+    ref          name of a schema in DEFINITIONS (for recursive trees)
+
+`compile_schema` turns a schema into a closure tree once, at import time; validating a
+document is then a single walk with no dict lookups on the schema. Paths are carried as
+(parent, key) pairs and only rendered to "$.a[0].b" strings when a violation is reported.
+
+Usage:
+    python3 scripts/genai/schemas.py <practice.json> [...]
+
+Example:
+    python3 scripts/genai/schemas.py v2-data/A3A/a3a-u1/a3a-u1-vocab-master.json
+"""
+
+import json
+import re
+import sys
+
+ID8 = {"type": "string", "pattern": r"[A-Za-z0-9]{8}"}
+TEXT = {"type": "string", "non_empty": True}
+STRINGS = {"type": "array", "items": {"type": "string"}}
+
+DEFINITIONS = {
+    "rm_node": {
+        "type": "object",
+        "required": ["id", "text", "emoji"],
+        "properties": {
+            "id": TEXT,
+            "text": {"type": "string"},
+            "emoji": TEXT,
+            "state": {"type": "string"},
+            "children": {"type": "array", "items": {"ref": "rm_node"}, "unique_by": "id"},
+        },
+    },
+    "tn_node": {
+        "type": "object",
+        "required": ["id", "text"],
+        "properties": {
+            "id": TEXT,
+            "text": {"type": "string"},
+            "speaker": {"type": "string"},
+            "answer": {"type": "boolean"},
+            "keywords": {"type": "string"},
+            "highlight": {"type": "string"},
+            "children": {"type": "array", "items": {"ref": "tn_node"}, "unique_by": "id"},
+        },
+    },
+}
+
+SCHEMAS = {
+    "vg": {
+        "type": "object",
+        "required": ["level", "unit_vocabulary"],
+        "properties": {
+            "unit_vocabulary": {
+                "type": "array",
+                "min_items": 1,
+                "items": {
+                    "type": "object",
+                    "required": ["word", "meaning", "page_number", "context_sentence"],
+                    "properties": {
+                        "word": TEXT,
+                        "meaning": TEXT,
+                        # Phrases carry no IPA (omitted or null)
+                        "ipa": {"type": ("string", "null")},
+                        "page_number": {"type": ("string", "integer")},
+                        "context_sentence": {"type": "string"},
+                    },
+                },
+            },
+        },
+    },
+    "vm": {
+        "type": "object",
+        "required": ["level", "title", "challenges"],
+        "properties": {
+            "challenges": {
+                "type": "array",
+                "min_items": 1,
+                "unique_by": "id",
+                "items": {
+                    "type": "object",
+                    "required": ["id", "title", "icon", "questions"],
+                    "properties": {
+                        "questions": {
+                            "type": "array",
+                            "len": 10,
+                            "unique_by": "id",
+                            "items": {
+                                "type": "object",
+                                "required": ["id", "word", "meaning", "type", "prompt", "options", "answer"],
+                                "properties": {
+                                    "id": ID8,
+                                    "word": TEXT,
+                                    "type": {"enum": ["Cloze", "Cn2En", "En2Cn"]},
+                                    "prompt": TEXT,
+                                    "options": {"type": "array", "len": 6, "unique": True, "items": TEXT},
+                                },
+                                "index_into": ("answer", "options"),
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "sh": {
+        "type": "object",
+        "required": ["level", "title", "spelling_words"],
+        "properties": {
+            "spelling_words": {
+                "type": "array",
+                "min_items": 1,
+                "unique_by": "id",
+                "items": {
+                    "type": "object",
+                    "required": ["id", "word", "meaning", "type", "chunks"],
+                    "properties": {
+                        "id": ID8,
+                        "word": TEXT,
+                        "type": {"enum": ["single-syllable", "multi-syllable"]},
+                        "chunks": {
+                            "type": "array",
+                            "min_items": 1,
+                            "items": {
+                                "type": "object",
+                                "required": ["correct", "options"],
+                                "properties": {
+                                    "correct": TEXT,
+                                    "options": {"type": "array", "len": 3, "unique": True, "items": TEXT},
+                                },
+                                "member_of": ("correct", "options"),
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "sa": {
+        "type": "object",
+        "required": ["level", "title", "challenges"],
+        "properties": {
+            "challenges": {
+                "type": "array",
+                "len": 5,
+                "unique_by": "id",
+                "items": {
+                    "type": "object",
+                    "required": ["id", "title", "icon", "data"],
+                    "properties": {
+                        "data": {
+                            "type": "array",
+                            "len": 10,
+                            "unique_by": "id",
+                            "items": {
+                                "type": "object",
+                                "required": ["id", "en", "cn", "noise"],
+                                "properties": {
+                                    "id": ID8,
+                                    "en": TEXT,
+                                    "cn": TEXT,
+                                    "noise": {"type": "array", "min_items": 1, "items": TEXT},
+                                    "accept": STRINGS,
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+            "ipaDict": {"type": "object"},
+        },
+    },
+    "rm": {
+        "type": "object",
+        "required": ["level", "part", "tree"],
+        "properties": {
+            "tree": {
+                "type": "object",
+                "ref": "rm_node",
+                "properties": {"id": {"const": "root"}, "state": {"const": "emoji"}},
+            },
+        },
+    },
+    "tn": {
+        "type": "object",
+        "required": ["level", "part", "sections"],
+        "properties": {
+            "sections": {
+                "type": "array",
+                "min_items": 1,
+                "items": {
+                    "type": "object",
+                    "required": ["section", "tree"],
+                    "properties": {"section": TEXT, "tree": {"ref": "tn_node"}},
+                },
+            },
+        },
+    },
+    "gw": {
+        "type": "object",
+        "required": ["level", "title", "challenges"],
+        "properties": {
+            "challenges": {
+                "type": "array",
+                "len": 2,
+                "unique_by": "id",
+                "items": {
+                    "type": "object",
+                    "required": ["id", "title", "icon", "questions"],
+                    "properties": {
+                        "questions": {
+                            "type": "array",
+                            "len": 10,
+                            "unique_by": "id",
+                            "items": {
+                                "type": "object",
+                                "required": ["id", "type", "category", "prompt", "options", "answer"],
+                                "properties": {
+                                    "id": ID8,
+                                    "type": {"const": "multiple-choice"},
+                                    "category": {"enum": ["purpose", "definition", "formation", "usage", "differentiation"]},
+                                    "prompt": TEXT,
+                                    "options": {"type": "array", "len": 4, "items": TEXT},
+                                },
+                                "index_into": ("answer", "options"),
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "pd": {
+        "type": "object",
+        "required": ["level", "title", "sections"],
+        "properties": {
+            "sections": {
+                "type": "array",
+                "min_items": 1,
+                "items": {
+                    "type": "object",
+                    "required": ["title", "sentences"],
+                    "properties": {
+                        "sentences": {
+                            "type": "array",
+                            "min_items": 1,
+                            "unique_by": "id",
+                            "items": {
+                                "type": "object",
+                                "required": ["id", "en", "options", "answer"],
+                                "properties": {
+                                    "id": {"type": "string", "pattern": r"pd_.{8}"},
+                                    "en": TEXT,
+                                    "options": {"type": "array", "len": 3, "items": TEXT},
+                                    "speaker": {"type": "string"},
+                                    "newline": {"type": "boolean"},
+                                    "highlight": {"type": "string"},
+                                },
+                                "index_into": ("answer", "options"),
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+    "test": {
+        "type": "object",
+        "required": ["level", "title", "sections"],
+        "properties": {
+            "sections": {
+                "type": "array",
+                "min_items": 1,
+                "unique_by": "id",
+                "items": {
+                    "type": "object",
+                    "required": ["id", "title", "type", "questions"],
+                    "properties": {
+                        "id": TEXT,
+                        "type": {"enum": [
+                            "cloze-passage", "cloze-passage-wordbank", "reading-comprehension", "multiple-choice",
+                            "fill-in-the-blank-wordbank", "fill-in-the-blank-firstletter", "definition-matching",
+                            "dialogue-completion", "true-false", "put-words-in-order",
+                        ]},
+                        "wordbank": STRINGS,
+                        "options": STRINGS,
+                        "questions": {
+                            "type": "array",
+                            "min_items": 1,
+                            "unique_by": "id",
+                            "items": {
+                                "type": "object",
+                                "required": ["id", "answer"],
+                                "properties": {"id": ID8, "options": STRINGS},
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+# Output filename suffix -> schema name, for validating files on disk
+SUFFIX_TYPES = {
+    "-vocab-guide.json": "vg",
+    "-vocab-master.json": "vm",
+    "-spelling-hero.json": "sh",
+    "-sentence-architect.json": "sa",
+    "-recall-map.json": "rm",
+    "-text-navigator.json": "tn",
+    "-grammar-wizard.json": "gw",
+    "-test.json": "test",
+}
+
+_PY_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+
+
+class SchemaError(ValueError):
+    """Raised by `validate_or_raise`; `errors` holds every violation as "path: message"."""
+
+    def __init__(self, kind, errors):
+        self.kind = kind
+        self.errors = errors
+        super().__init__(f"{kind} output failed schema validation ({len(errors)} error(s)): " + "; ".join(errors[:5]))
+
+
+def path_keys(path) -> tuple:
+    """Flattens a (parent, key) path chain to its keys: ("challenges", 0, "questions", 3)."""
+    keys = []
+    while isinstance(path, tuple):
+        path, key = path
+        keys.append(key)
+    return tuple(reversed(keys))
+
+
+def format_keys(keys) -> str:
+    """Renders a key tuple as "$.challenges[0].questions[3]"."""
+    return "$" + "".join(f"[{k}]" if isinstance(k, int) else f".{k}" for k in keys)
+
+
+def format_path(path) -> str:
+    """Renders a (parent, key) path chain as "$.challenges[0].questions[3]"."""
+    return format_keys(path_keys(path))
+
+
+def _type_check(names):
+    names = names if isinstance(names, tuple) else (names,)
+    if "any" in names:
+        return None
+    py = tuple(t for n in names for t in (_PY_TYPES[n] if isinstance(_PY_TYPES[n], tuple) else (_PY_TYPES[n],)))
+    # bool is an int subclass; only accept it where "boolean" is asked for
+    reject_bool = "boolean" not in names
+    label = "/".join(names)
+
+    def check(value, path, errors):
+        if not isinstance(value, py) or (reject_bool and isinstance(value, bool)):
+            errors.append((path, f"expected {label}, got {type(value).__name__}"))
+            return False
+        return True
+    return check
+
+
+_LEAF_KEYS = frozenset(["type", "non_empty", "pattern", "enum", "const"])
+
+
+def _leaf_predicate(schema):
+    """
+    Fused `value -> bool` fast path for scalar schemas, or None. Callers run the full
+    validator only when it returns False, so the common valid case is one call.
+    """
+    if not schema or not _LEAF_KEYS.issuperset(schema):
+        return None
+    names = schema.get("type", "any")
+    names = names if isinstance(names, tuple) else (names,)
+    if "any" in names:
+        py, reject_bool = None, False
+    else:
+        py = tuple(t for n in names for t in (_PY_TYPES[n] if isinstance(_PY_TYPES[n], tuple) else (_PY_TYPES[n],)))
+        reject_bool = "boolean" not in names
+    non_empty = schema.get("non_empty", False)
+    regex = re.compile(schema["pattern"]) if "pattern" in schema else None
+    allowed = frozenset(schema["enum"]) if "enum" in schema else None
+    has_const, const = "const" in schema, schema.get("const")
+
+    def ok(v):
+        if py is not None and (not isinstance(v, py) or (reject_bool and v.__class__ is bool)):
+            return False
+        if non_empty and isinstance(v, str) and not v.strip():
+            return False
+        if regex is not None and isinstance(v, str) and not regex.fullmatch(v):
+            return False
+        if allowed is not None and v not in allowed:
+            return False
+        return not has_const or v == const
+    return ok
+
+
+def compile_schema(schema, definitions=None, _compiled=None):
+    """Returns validate(value, path, errors) -> None for `schema`, appending (path, message) pairs.
+    `path` is "$" or a (parent, key) chain (see path_keys / format_path)."""
+    definitions = DEFINITIONS if definitions is None else definitions
+    _compiled = {} if _compiled is None else _compiled
+    checks = []
+
+    ref = schema.get("ref")
+    if ref:
+        if ref not in _compiled:
+            # Placeholder first so recursive references resolve to the same validator
+            slot = []
+            _compiled[ref] = lambda v, p, e: slot[0](v, p, e)
+            slot.append(compile_schema(definitions[ref], definitions, _compiled))
+        checks.append(_compiled[ref])
+
+    type_check = _type_check(schema["type"]) if "type" in schema else None
+
+    if "const" in schema:
+        const = schema["const"]
+        checks.append(lambda v, p, e: v == const or e.append((p, f"expected {const!r}, got {v!r}")))
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        checks.append(lambda v, p, e: v in allowed or e.append((p, f"{v!r} is not one of {sorted(allowed)}")))
+    if "pattern" in schema:
+        regex = re.compile(schema["pattern"])
+        checks.append(lambda v, p, e: not isinstance(v, str) or regex.fullmatch(v)
+                      or e.append((p, f"{v!r} does not match {regex.pattern}")))
+    if schema.get("non_empty"):
+        checks.append(lambda v, p, e: not isinstance(v, str) or v.strip() or e.append((p, "empty string")))
+
+    required = tuple(schema.get("required", ()))
+    if required:
+        def check_required(v, p, e):
+            if isinstance(v, dict):
+                for key in required:
+                    if key not in v:
+                        e.append((p, f"missing '{key}'"))
+        checks.append(check_required)
+
+    props = tuple((k, _leaf_predicate(s), compile_schema(s, definitions, _compiled))
+                  for k, s in schema.get("properties", {}).items())
+    if props:
+        def check_props(v, p, e):
+            if isinstance(v, dict):
+                for key, ok, validate in props:
+                    if key in v and (ok is None or not ok(v[key])):
+                        validate(v[key], (p, key), e)
+        checks.append(check_props)
+
+    if "index_into" in schema:
+        idx_key, list_key = schema["index_into"]
+
+        def check_index(v, p, e):
+            if not isinstance(v, dict) or idx_key not in v or not isinstance(v.get(list_key), list):
+                return
+            idx = v[idx_key]
+            if isinstance(idx, bool) or not isinstance(idx, int) or not 0 <= idx < len(v[list_key]):
+                e.append(((p, idx_key), f"{idx!r} is not an index into {list_key} (0-{len(v[list_key]) - 1})"))
+        checks.append(check_index)
+
+    if "member_of" in schema:
+        val_key, list_key = schema["member_of"]
+
+        def check_member(v, p, e):
+            if isinstance(v, dict) and isinstance(v.get(list_key), list) and val_key in v and v[val_key] not in v[list_key]:
+                e.append(((p, val_key), f"{v[val_key]!r} is not in {list_key}"))
+        checks.append(check_member)
+
+    exact, lo, hi = schema.get("len"), schema.get("min_items"), schema.get("max_items")
+    if exact is not None or lo is not None or hi is not None:
+        def check_len(v, p, e):
+            if not isinstance(v, list):
+                return
+            n = len(v)
+            if exact is not None and n != exact:
+                e.append((p, f"has {n} item(s), expected exactly {exact}"))
+            elif lo is not None and n < lo:
+                e.append((p, f"has {n} item(s), expected at least {lo}"))
+            elif hi is not None and n > hi:
+                e.append((p, f"has {n} item(s), expected at most {hi}"))
+        checks.append(check_len)
+
+    if schema.get("unique"):
+        def check_unique(v, p, e):
+            if isinstance(v, list):
+                try:
+                    if len(set(v)) != len(v):
+                        e.append((p, f"duplicate values {sorted({x for x in v if v.count(x) > 1})}"))
+                except TypeError:
+                    pass
+        checks.append(check_unique)
+
+    if "unique_by" in schema:
+        key = schema["unique_by"]
+
+        def check_unique_by(v, p, e):
+            if not isinstance(v, list):
+                return
+            seen = set()
+            for i, item in enumerate(v):
+                ident = item.get(key) if isinstance(item, dict) else None
+                if ident is None or isinstance(ident, (dict, list)):
+                    continue
+                if ident in seen:
+                    e.append((((p, i), key), f"duplicate {key} {ident!r}"))
+                seen.add(ident)
+        checks.append(check_unique_by)
+
+    if "items" in schema:
+        item_ok = _leaf_predicate(schema["items"])
+        item_validate = compile_schema(schema["items"], definitions, _compiled)
+
+        def check_items(v, p, e):
+            if not isinstance(v, list):
+                return
+            if item_ok is not None:
+                for i, item in enumerate(v):
+                    if not item_ok(item):
+                        item_validate(item, (p, i), e)
+            else:
+                for i, item in enumerate(v):
+                    item_validate(item, (p, i), e)
+        checks.append(check_items)
+
+    checks = tuple(checks)
+
+    def validate(value, path, errors):
+        if type_check is not None and not type_check(value, path, errors):
+            return
+        for check in checks:
+            check(value, path, errors)
+    return validate
+
+
+VALIDATORS = {kind: compile_schema(schema) for kind, schema in SCHEMAS.items()}
+
+
+def violations(kind: str, data) -> list:
+    """Returns the schema violations for `data` as (keys, message) pairs, keys like ("challenges", 0, "questions", 3)."""
+    errors = []
+    VALIDATORS[kind](data, "$", errors)
+    return [(path_keys(path), msg) for path, msg in errors]
+
+
+def validate(kind: str, data) -> list:
+    """Returns the list of schema violations ('path: message') for `data` as output type `kind`."""
+    errors = []
+    VALIDATORS[kind](data, "$", errors)
+    return [f"{format_path(path)}: {msg}" for path, msg in errors]
+
+
+def validate_or_raise(kind: str, data):
+    """Raises SchemaError listing every violation; returns data unchanged when valid."""
+    errors = validate(kind, data)
+    if errors:
+        raise SchemaError(kind, errors)
+    return data
+
+
+def validate_or_exit(kind: str, data, out_path, errors=None):
+    """
+    Generator hook: prints the violations and exits non-zero without writing `out_path`
+    when the model output does not match the schema for `kind`. Pass `errors` when the
+    caller has already validated `data` in its current state (e.g. repair_document).
+    """
+    errors = validate(kind, data) if errors is None else errors
+    if errors:
+        print(f"❌ {kind.upper()} output failed schema validation; not writing {out_path}:", file=sys.stderr)
+        for err in errors[:20]:
+            print(f"  - {err}", file=sys.stderr)
+        if len(errors) > 20:
+            print(f"  ... and {len(errors) - 20} more", file=sys.stderr)
+        sys.exit(1)
+    return data
+
+
+def kind_for_path(path) -> str:
+    """Schema name for a practice JSON filename, or None when it is not a generated type."""
+    name = str(path)
+    if "-passage-decoder-" in name and name.endswith(".json"):
+        return "pd"
+    for suffix, kind in SUFFIX_TYPES.items():
+        if name.endswith(suffix):
+            return kind
+    return None
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 scripts/genai/schemas.py <practice.json> [...]")
+        sys.exit(1)
+    failed = 0
+    for path in sys.argv[1:]:
+        kind = kind_for_path(path)
+        if kind is None:
+            print(f"⏭️  {path}: unknown practice type")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            errors = validate(kind, json.load(f))
+        if errors:
+            failed += 1
+            print(f"❌ {path} ({kind}): {len(errors)} error(s)")
+            for err in errors:
+                print(f"  - {err}")
+        else:
+            print(f"✅ {path} ({kind})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
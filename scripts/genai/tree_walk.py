@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+tree_walk.py — Iterative traversal helpers for recall-map and text-navigator trees.
+
+Both output types nest {"id", "text", ..., "children": [...]} nodes, either as one
+"tree" (recall-map) or one tree per entry of "sections" (text-navigator). Everything
+here uses an explicit stack instead of recursion, so deep or very wide trees cost no
+Python call frames, and lookups by node id go through a prebuilt index instead of a
+fresh walk per id.
+
+Node ids are only unique among siblings (every text-navigator section has its own
+"root"), so the index maps an id to ALL nodes carrying it; path strings
+("<section>/root/ff-1") identify a node uniquely within a document.
+
+Example:
+    for node, parent, depth, index, path in walk_doc(tn, paths=True):
+        ...
+    index = index_by_id(tn)
+    bulk_update(index, {"ff-1": {"emoji": "🐮"}})
+"""
+
+
+def tree_roots(doc) -> list:
+    """
+    [(label, root)] for every tree in a document: one per text-navigator section
+    (labelled with the section name), the recall-map "tree" (label ""), or the
+    document itself when it is a bare node.
+    """
+    if "sections" in doc:
+        return [(sec.get("section", ""), sec["tree"]) for sec in doc["sections"] if "tree" in sec]
+    if "tree" in doc:
+        return [("", doc["tree"])]
+    return [("", doc)]
+
+
+def walk(root, path=None):
+    """
+    Pre-order (node, parent, depth, index, path) for every node under `root`, where
+    depth is 0 for the root and index is the node's position among its siblings.
+    Path strings ("<path>/<id>/<child id>", index instead of a missing id) are only
+    built when `path` is given ("" for no prefix); otherwise path is None.
+    """
+    root_path = None if path is None else (f"{path}/{root.get('id', 0)}" if path else str(root.get("id", 0)))
+    stack = [(root, None, 0, 0, root_path)]
+    while stack:
+        item = stack.pop()
+        yield item
+        node, _, depth, _, node_path = item
+        children = node.get("children")
+        if children:
+            for i in range(len(children) - 1, -1, -1):
+                child = children[i]
+                child_path = None if node_path is None else f"{node_path}/{child.get('id', i)}"
+                stack.append((child, node, depth + 1, i, child_path))
+
+
+def walk_doc(doc, paths=False):
+    """walk() over every tree of a document (see tree_roots), paths prefixed with the section name."""
+    for label, root in tree_roots(doc):
+        yield from walk(root, label if paths else None)
+
+
+def index_by_id(doc) -> dict:
+    """{id: [nodes with that id, in document order]} for every node in the document."""
+    index = {}
+    for node, _, _, _, _ in walk_doc(doc):
+        index.setdefault(node.get("id"), []).append(node)
+    return index
+
+
+def index_by_path(doc) -> dict:
+    """{path string: node} for every node in the document (see walk)."""
+    return {path: node for node, _, _, _, path in walk_doc(doc, paths=True)}
+
+
+def bulk_update(index, updates, merge=None) -> int:
+    """
+    Applies `updates` ({key: patch}) in place to the nodes found under each key in
+    `index` (an index_by_id or index_by_path dict). `merge(node, patch)` defaults to
+    node.update(patch). Returns the number of nodes updated; unknown keys are ignored.
+    """
+    updated = 0
+    for key, patch in updates.items():
+        found = index.get(key)
+        if found is None:
+            continue
+        for node in (found if isinstance(found, list) else (found,)):
+            if merge is None:
+                node.update(patch)
+            else:
+                merge(node, patch)
+            updated += 1
+    return updated
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+tts_batch.py — Batched, deduplicated TTS synthesis for every sentence in the v2-data JSONs.
+
+Collects the spoken sentences from the generated unit JSONs (vocab-guide and vocab-master
+context sentences, sentence-architect `en` lines, passage-decoder sentences), dedupes them
+by normalized text, voice and TTS model across all units, and synthesizes only the clips that are not
+already in the content-addressed audio cache. Calls run concurrently but share one rate
+limiter, so --workers never exceeds the per-minute request budget.
+
+Every clip is trimmed of leading/trailing silence (audio_silence.py). With --batch-size N,
+N sentences are rendered in one call and cut apart locally at the silence gaps; a render
+that does not split into exactly N clips falls back to one call per sentence.
+
+Cache layout (default temp/tts-cache/):
+    <key[:2]>/<key>.wav   24 kHz mono 16-bit WAV, key = sha256(model + voice + normalized text)
+    index.json            key -> {text, voice, model, duration_s, sources}
+
+Usage:
+    python3 scripts/genai/tts_batch.py [PATH ...] [--voice Kore] [--model M] [--workers 4] [--rpm 3] [--batch-size 1]
+                                       [--cache-dir DIR] [--dry-run] [--local] [--high]
+
+Example:
+    python3 scripts/genai/tts_batch.py v2-data/A3A --dry-run
+    python3 scripts/genai/tts_batch.py v2-data --workers 2 --rpm 10 --batch-size 8 high
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from google.genai import types
+from config import get_genai_config, parse_high_flag, create_client, set_client_factory
+from audio_silence import pcm_to_array, trim_silence, split_at_silences, write_wav
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = REPO_ROOT / "v2-data"
+DEFAULT_CACHE_DIR = REPO_ROOT / "temp" / "tts-cache"
+
+TTS_MODEL = "gemini-2.5-flash-preview-tts"
+DEFAULT_VOICE = "Kore"
+SAMPLE_RATE = 24000
+DEFAULT_WORKERS = 4
+# Matches the free-tier budget the JS TTS scripts pace themselves to
+DEFAULT_RPM = 3
+MAX_RETRIES = 3
+
+# Sentences go in their own paragraphs after the instruction; the pause is what split_at_silences cuts on
+TTS_PROMPT = "Read the following sentence aloud clearly and naturally for a young English learner. Do not add anything."
+TTS_BATCH_PROMPT = (
+    "Read each of the following sentences aloud clearly and naturally for a young English learner, "
+    "in order, with a silent pause of about two seconds after every sentence. Do not add anything."
+)
+
+_QUOTE_TABLE = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-"})
+
+
+def _vocab_guide_sentences(data):
+    for item in data.get("unit_vocabulary", []):
+        yield item.get("context_sentence")
+
+
+def _vocab_master_sentences(data):
+    for challenge in data.get("challenges", []):
+        for q in challenge.get("questions", []):
+            yield q.get("context_sentence")
+
+
+def _sentence_architect_sentences(data):
+    for challenge in data.get("challenges", []):
+        for item in challenge.get("data", []):
+            yield item.get("en")
+
+
+def _passage_decoder_sentences(data):
+    for section in data.get("sections", []):
+        for s in section.get("sentences", []):
+            yield s.get("en")
+
+
+# (filename suffix, extractor) for every JSON type that carries spoken sentences
+SENTENCE_SOURCES = [
+    ("-vocab-guide.json", _vocab_guide_sentences),
+    ("-vocab-master.json", _vocab_master_sentences),
+    ("-sentence-architect.json", _sentence_architect_sentences),
+    ("-passage-decoder-s.json", _passage_decoder_sentences),
+]
+
+
+def normalize_text(text: str) -> str:
+    """Canonical spoken form: NFKC, straight quotes, single spaces."""
+    text = unicodedata.normalize("NFKC", text).translate(_QUOTE_TABLE)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def clip_key(text: str, voice: str, model: str = TTS_MODEL) -> str:
+    """
+    Content address of a clip. Case is kept ("US" / "us" and "May" / "may" are read
+    differently), and the model is part of the key so switching models re-synthesizes.
+    """
+    return hashlib.sha256(f"{model}\n{voice}\n{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def clip_path(cache_dir, key: str) -> Path:
+    return Path(cache_dir) / key[:2] / f"{key}.wav"
+
+
+def _extractor_for(path: Path):
+    for suffix, extractor in SENTENCE_SOURCES:
+        if path.name.endswith(suffix):
+            return extractor
+    return None
+
+
+def iter_source_files(paths):
+    for p in paths:
+        p = Path(p)
+        candidates = [p] if p.is_file() else sorted(p.rglob("*.json"))
+        for f in candidates:
+            if _extractor_for(f):
+                yield f
+
+
+def collect_sentences(paths, voice=DEFAULT_VOICE, model=TTS_MODEL):
+    """
+    Returns {key: {"text", "voice", "model", "sources"}} over all sentence-bearing JSONs under paths.
+    The first spelling seen is the one synthesized; every file that uses it is listed in sources.
+    """
+    clips = {}
+    for f in iter_source_files(paths):
+        try:
+            with open(f, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"  ⚠️ Skipping {f}: {e}", file=sys.stderr)
+            continue
+        try:
+            rel = str(f.resolve().relative_to(REPO_ROOT))
+        except ValueError:
+            rel = str(f)
+        for text in _extractor_for(f)(data):
+            if not isinstance(text, str) or not normalize_text(text):
+                continue
+            key = clip_key(text, voice, model)
+            entry = clips.setdefault(key, {"text": normalize_text(text), "voice": voice, "model": model,
+                                           "sources": []})
+            if rel not in entry["sources"]:
+                entry["sources"].append(rel)
+    return clips
+
+
+class RateLimiter:
+    """Spaces call starts at least 60/rpm seconds apart across all threads."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm and rpm > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def synthesize(client, texts, voice: str, model: str = TTS_MODEL) -> bytes:
+    """Returns raw 24 kHz 16-bit mono PCM for one sentence, or for a list of sentences read in order."""
+    if isinstance(texts, str):
+        texts = [texts]
+    contents = "\n\n".join([TTS_PROMPT if len(texts) == 1 else TTS_BATCH_PROMPT, *texts])
+    response = client.models.generate_content(
+        model=model,
+        contents=contents,
+        config=types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=types.SpeechConfig(
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name=voice)
+                )
+            ),
+        ),
+    )
+    pcm = response.candidates[0].content.parts[0].inline_data.data
+    if not pcm:
+        raise ValueError("empty audio response")
+    return pcm
+
+
+def synthesize_clips(client, texts, voice: str, model: str = TTS_MODEL):
+    """
+    Renders a list of sentences and returns one trimmed int16 array per sentence.
+    Multi-sentence renders are cut at their silences; None when the cut count is off.
+    """
+    samples = pcm_to_array(synthesize(client, texts, voice, model))
+    if len(texts) == 1:
+        return [trim_silence(samples, SAMPLE_RATE)]
+    return split_at_silences(samples, SAMPLE_RATE, expected=len(texts))
+
+
+def load_index(cache_dir) -> dict:
+    path = Path(cache_dir) / "index.json"
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+    return {}
+
+
+def save_index(cache_dir, index: dict):
+    path = Path(cache_dir) / "index.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def run_batch(clips: dict, cache_dir, client, workers=DEFAULT_WORKERS, rpm=DEFAULT_RPM, model=TTS_MODEL,
+              batch_size=1):
+    """
+    Synthesizes every clip whose WAV is missing from cache_dir and refreshes index.json.
+    With batch_size > 1, same-voice sentences are rendered batch_size at a time and cut locally.
+    Returns (synthesized_keys, failed_keys).
+    """
+    index = load_index(cache_dir)
+    missing = [k for k in clips if not clip_path(cache_dir, k).exists()]
+    limiter = RateLimiter(rpm)
+
+    def render(keys):
+        voice = clips[keys[0]]["voice"]
+        texts = [clips[k]["text"] for k in keys]
+        for attempt in range(MAX_RETRIES):
+            limiter.wait()
+            try:
+                segments = synthesize_clips(client, texts, voice, model)
+                if segments is None:
+                    return None
+                if not len(segments[0]):
+                    raise ValueError("silent audio response")
+                return segments
+            except Exception as e:
+                print(f"  ⚠️ {texts[0][:40]!r} (+{len(texts) - 1}) (attempt {attempt + 1}/{MAX_RETRIES}): {e}", file=sys.stderr)
+                if attempt == MAX_RETRIES - 1:
+                    raise
+
+    def work(keys):
+        segments = render(keys) if len(keys) > 1 else None
+        if segments is None:
+            if len(keys) > 1:
+                print(f"  ↩️ Batch of {len(keys)} did not split cleanly; synthesizing one by one", file=sys.stderr)
+            segments = [render([k])[0] for k in keys]
+        durations = {}
+        for key, segment in zip(keys, segments):
+            write_wav(clip_path(cache_dir, key), segment, SAMPLE_RATE)
+            durations[key] = len(segment) / SAMPLE_RATE
+        return durations
+
+    by_voice = {}
+    for key in missing:
+        by_voice.setdefault(clips[key]["voice"], []).append(key)
+    size = max(1, batch_size)
+    batches = [keys[i:i + size] for keys in by_voice.values() for i in range(0, len(keys), size)]
+
+    synthesized, failed = [], []
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+            futures = {pool.submit(work, b): b for b in batches}
+            for future in as_completed(futures):
+                try:
+                    durations = future.result()
+                except Exception:
+                    failed.extend(futures[future])
+                    continue
+                for key, duration in durations.items():
+                    synthesized.append(key)
+                    index[key] = {**clips[key], "model": model, "duration_s": round(duration, 3)}
+                    print(f"  ✓ [{len(synthesized)}/{len(missing)}] {clips[key]['text'][:60]}")
+
+    # Keep sources current for clips that were already cached
+    for key, clip in clips.items():
+        if key in index:
+            index[key]["sources"] = sorted(set(index[key].get("sources", [])) | set(clip["sources"]))
+    save_index(cache_dir, index)
+    return synthesized, failed
+
+
+def main(argv=None):
+    use_high = parse_high_flag(argv)
+
+    parser = argparse.ArgumentParser(description="Synthesize missing TTS clips for all v2-data sentences.")
+    parser.add_argument("paths", nargs="*", default=[str(DATA_DIR)], help="Unit JSONs or folders to scan (default: v2-data)")
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help="Prebuilt voice name")
+    parser.add_argument("--model", default=TTS_MODEL, help=f"TTS model (default: {TTS_MODEL})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent TTS calls")
+    parser.add_argument("--rpm", type=float, default=DEFAULT_RPM, help="Shared requests-per-minute limit (0 = unlimited)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Sentences per TTS call, cut apart at silences")
+    parser.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Content-addressed audio cache")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be synthesized")
+    parser.add_argument("--local", action="store_true", help="Use the offline LocalTTSClient stand-in")
+    args = parser.parse_args(argv)
+
+    clips = collect_sentences(args.paths, voice=args.voice, model=args.model)
+    occurrences = sum(len(c["sources"]) for c in clips.values())
+    missing = [k for k in clips if not clip_path(args.cache_dir, k).exists()]
+    print(f"Collected {len(clips)} unique sentence(s) from {occurrences} file occurrence(s); "
+          f"{len(clips) - len(missing)} cached, {len(missing)} to synthesize.")
+    if args.dry_run or not missing:
+        return
+
+    if args.local:
+        from replay_client import LocalTTSClient
+        set_client_factory(lambda key: LocalTTSClient(sample_rate=SAMPLE_RATE))
+        api_key = "local"
+    else:
+        api_key, _ = get_genai_config(use_high)
+    client = create_client(api_key)
+
+    start = time.time()
+    synthesized, failed = run_batch(clips, args.cache_dir, client, workers=args.workers, rpm=args.rpm,
+                                   model=args.model, batch_size=args.batch_size)
+    print(f"Synthesized {len(synthesized)} clip(s) in {time.time() - start:.1f}s into {args.cache_dir}")
+    if failed:
+        print(f"❌ {len(failed)} clip(s) failed:", file=sys.stderr)
+        for key in failed:
+            print(f"  - {clips[key]['text']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
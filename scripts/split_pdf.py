@@ -1,37 +1,411 @@
+#!/usr/bin/env python3
+"""
+split_pdf.py — Split a textbook PDF into per-unit PDFs.
+
+Chunks are given as page-range specs, a manifest file, or a fixed page count per unit.
+Chunks are written in parallel by worker processes that each open the source PDF once
+and only read the pages they need. A chunk is skipped when its output already exists and
+the split manifest in the output directory records the same source hash and pages.
+
+Usage:
+    python3 scripts/split_pdf.py INPUT.pdf -o OUT_DIR --range "c-giu-1=1-2" --range "c-giu-2=3-4,7"
+    python3 scripts/split_pdf.py INPUT.pdf -o OUT_DIR --manifest units.json
+    python3 scripts/split_pdf.py INPUT.pdf -o OUT_DIR --every 2 --prefix c-giu- [--max-units 145]
+    python3 scripts/split_pdf.py INPUT.pdf -o OUT_DIR --detect --prefix c-giu- [--heading-regex REGEX]
+                                 [--dry-run] [--save-manifest units.json] [--page-markers]
+                                 [--workers N] [--force]
+
+Page specs are 1-based and inclusive: "1-2", "5", "3-4,7,9-10".
+A manifest is a JSON object of unit name -> spec string or list of page numbers:
+    {"c-giu-1": "1-2", "c-giu-2": [3, 4]}
+
+--detect derives the units from the PDF text instead: page text is extracted once with
+pypdf and cached in OUT_DIR/.page-text-cache.json (keyed by the source hash). A unit
+starts on each page whose first lines match --heading-regex (default "Unit <n>"; group 1
+is the unit number, and pages listing several unit numbers are treated as a contents page).
+Printed page numbers are read from a standalone number on the first/last lines of each
+page, with gaps filled from the dominant PDF-page offset, and written to
+OUT_DIR/page-map.json. --page-markers also writes {unit}.pages.md per unit: the extracted
+text under "### --- PRINTED PAGE X ---" headings, the convention the genai generators read.
+--dry-run prints the detected manifest without writing PDFs; --save-manifest stores it for
+hand-editing and reuse with --manifest.
+
+Example (the original C-GIU split):
+    python3 scripts/split_pdf.py temp/pdf/giu/GIU.pdf -o temp/pdf/giu --every 2 --prefix c-giu- --max-units 145
+"""
+
+import argparse
+import hashlib
+import json
 import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 from pypdf import PdfReader, PdfWriter
 
-def split_pdf(input_path, output_dir, pages_per_file=2, max_units=145):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-        print(f"Created directory: {output_dir}")
+SPLIT_MANIFEST_NAME = ".split-manifest.json"
+TEXT_CACHE_NAME = ".page-text-cache.json"
+PAGE_MAP_NAME = "page-map.json"
+
+DEFAULT_HEADING_REGEX = r"^\s*unit\s+(\d+)\b"
+# Only the first few non-empty lines of a page are searched for a unit heading
+HEADING_SEARCH_LINES = 5
+# Printed page numbers are looked for in this many non-empty lines at the top and bottom of a page
+PAGE_NUMBER_SEARCH_LINES = 2
+PAGE_NUMBER_RE = re.compile(r"^\s*(?:-\s*)?(\d{1,4})(?:\s*-)?\s*$")
+
+_worker_reader = None
+
+
+def parse_page_spec(spec, total_pages=None):
+    """'1-2,5,7-9' -> [1, 2, 5, 7, 8, 9] (1-based). Raises ValueError on malformed or out-of-range pages."""
+    pages = []
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start_s, end_s = part.split("-", 1)
+            start, end = int(start_s), int(end_s)
+            if end < start:
+                raise ValueError(f"Descending page range '{part}'")
+            pages.extend(range(start, end + 1))
+        else:
+            pages.append(int(part))
+    if not pages:
+        raise ValueError(f"Empty page spec '{spec}'")
+    for p in pages:
+        if p < 1 or (total_pages is not None and p > total_pages):
+            raise ValueError(f"Page {p} out of range (1-{total_pages})")
+    return pages
+
+
+def parse_named_range(text):
+    """'c-giu-1=1-2' -> ('c-giu-1', '1-2')."""
+    if "=" not in text:
+        raise ValueError(f"Expected NAME=PAGES, got '{text}'")
+    name, spec = text.split("=", 1)
+    return name.strip(), spec.strip()
+
+
+def load_manifest(path):
+    """Reads a unit -> spec manifest. Values may be spec strings or lists of page numbers."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} must contain a JSON object of unit name -> pages")
+    return {name: ",".join(str(p) for p in spec) if isinstance(spec, list) else spec for name, spec in data.items()}
+
+
+def fixed_size_specs(total_pages, pages_per_file, prefix, max_units=None):
+    """Consecutive chunks of `pages_per_file` pages named {prefix}{n}, n from 1."""
+    if pages_per_file < 1:
+        raise ValueError(f"pages per file must be at least 1, got {pages_per_file}")
+    specs = {}
+    part_num = 1
+    start = 1
+    while start <= total_pages and (max_units is None or part_num <= max_units):
+        end = min(start + pages_per_file - 1, total_pages)
+        specs[f"{prefix}{part_num}"] = f"{start}-{end}"
+        part_num += 1
+        start = end + 1
+    return specs
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_page_texts(input_path, cache_dir=None, source_sha=None):
+    """
+    Returns the text of every page (index 0 = PDF page 1). When cache_dir is given the texts
+    are cached there keyed by the source hash, so repeated detection runs skip extraction.
+    """
+    source_sha = source_sha or file_sha256(input_path)
+    cache_path = os.path.join(cache_dir, TEXT_CACHE_NAME) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("source_sha256") == source_sha:
+                return cached["pages"]
+        except Exception as e:
+            print(f"Warning: ignoring unreadable text cache {cache_path}: {e}", file=sys.stderr)
 
     reader = PdfReader(input_path)
-    total_pages = len(reader.pages)
-    print(f"Total pages in {input_path}: {total_pages}")
+    texts = []
+    for page in reader.pages:
+        try:
+            texts.append(page.extract_text() or "")
+        except Exception as e:
+            print(f"Warning: text extraction failed on page {len(texts) + 1}: {e}", file=sys.stderr)
+            texts.append("")
+
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"source": os.path.basename(input_path), "source_sha256": source_sha, "pages": texts},
+                      f, ensure_ascii=False)
+    return texts
+
 
-    for part_num in range(1, max_units + 1):
-        start_idx = (part_num - 1) * pages_per_file
-        end_idx = start_idx + pages_per_file
-        if start_idx >= total_pages:
-            print(f"Reached end of document before reaching unit {part_num}")
+def _non_empty_lines(text):
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def detect_printed_page(text):
+    """Printed page number from a standalone number in the last (then first) lines of a page, or None."""
+    lines = _non_empty_lines(text)
+    candidates = lines[::-1][:PAGE_NUMBER_SEARCH_LINES] + lines[:PAGE_NUMBER_SEARCH_LINES]
+    for line in candidates:
+        m = PAGE_NUMBER_RE.match(line)
+        if m:
+            return int(m.group(1))
+    return None
+
+
+def build_page_map(texts):
+    """
+    Printed page number (or None) for every PDF page. Pages without a detectable number, or whose
+    number disagrees with the book's dominant offset, take the number implied by that offset.
+    """
+    detected = [detect_printed_page(t) for t in texts]
+    offsets = Counter(n - i for i, n in enumerate(detected, start=1) if n is not None)
+    if not offsets:
+        return [None] * len(texts)
+    offset, _ = offsets.most_common(1)[0]
+    page_map = []
+    for i, n in enumerate(detected, start=1):
+        inferred = i + offset
+        page_map.append(n if n == inferred else (inferred if inferred >= 1 else None))
+    return page_map
+
+
+def detect_unit_starts(texts, heading_regex=DEFAULT_HEADING_REGEX):
+    """
+    [(unit_number, pdf_page)] for pages whose first lines carry a unit heading.
+    Each unit number is taken at its first occurrence; contents pages (several unit
+    numbers on one page) are ignored.
+    """
+    pattern = re.compile(heading_regex, re.IGNORECASE)
+    starts = []
+    seen = set()
+    for page_no, text in enumerate(texts, start=1):
+        all_units = {m.group(1) for line in _non_empty_lines(text) for m in [pattern.match(line)] if m}
+        if len(all_units) > 1:
+            continue
+        for line in _non_empty_lines(text)[:HEADING_SEARCH_LINES]:
+            m = pattern.match(line)
+            if not m:
+                continue
+            unit = int(m.group(1)) if m.groups() and m.group(1) and m.group(1).isdigit() else len(starts) + 1
+            if unit not in seen:
+                seen.add(unit)
+                starts.append((unit, page_no))
             break
-        
-        end_idx = min(end_idx, total_pages)
-        writer = PdfWriter()
-        
-        for i in range(start_idx, end_idx):
-            writer.add_page(reader.pages[i])
-            
-        output_filename = f"c-giu-{part_num}.pdf"
-        output_path = os.path.join(output_dir, output_filename)
-        
-        with open(output_path, "wb") as out_f:
-            writer.write(out_f)
-            
-        print(f"Saved: {output_path} (Pages {start_idx + 1} to {end_idx})")
+    return starts
+
+
+def detected_specs(texts, prefix, heading_regex=DEFAULT_HEADING_REGEX):
+    """{prefix}{unit}: 'start-end' with each unit running until the page before the next heading."""
+    starts = detect_unit_starts(texts, heading_regex)
+    specs = {}
+    for idx, (unit, start) in enumerate(starts):
+        end = starts[idx + 1][1] - 1 if idx + 1 < len(starts) else len(texts)
+        specs[f"{prefix}{unit}"] = f"{start}-{end}"
+    return specs
+
+
+def printed_label(printed):
+    return str(printed) if printed is not None else "Unnumbered"
+
+
+def write_page_markers(output_dir, specs, texts, page_map):
+    """Writes {unit}.pages.md with each page's text under a '### --- PRINTED PAGE X ---' heading."""
+    for name, spec in specs.items():
+        sections = []
+        for p in parse_page_spec(spec, len(texts)):
+            sections.append(f"### --- PRINTED PAGE {printed_label(page_map[p - 1])} ---\n\n{texts[p - 1].strip()}\n")
+        with open(os.path.join(output_dir, f"{name}.pages.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(sections))
+
+
+def write_page_map(output_dir, specs, page_map):
+    """page-map.json: unit -> [{"pdf_page", "printed_page"}] for every page of the unit."""
+    data = {
+        name: [{"pdf_page": p, "printed_page": page_map[p - 1]} for p in parse_page_spec(spec, len(page_map))]
+        for name, spec in specs.items()
+    }
+    with open(os.path.join(output_dir, PAGE_MAP_NAME), "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _init_worker(input_path):
+    global _worker_reader
+    _worker_reader = PdfReader(input_path)
+
+
+def _write_chunk(name, pages, output_path):
+    writer = PdfWriter()
+    for p in pages:
+        writer.add_page(_worker_reader.pages[p - 1])
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as out_f:
+        writer.write(out_f)
+    os.replace(tmp_path, output_path)
+    return name
+
+
+def _load_split_manifest(output_dir):
+    path = os.path.join(output_dir, SPLIT_MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: could not read {path}, re-splitting everything: {e}", file=sys.stderr)
+    return {}
+
+
+def _save_split_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, SPLIT_MANIFEST_NAME)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def split_by_specs(input_path, output_dir, specs, workers=None, force=False):
+    """
+    Writes one PDF per {unit name: page spec} into output_dir.
+    Returns (written, skipped, failed) lists of unit names.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    total_pages = len(PdfReader(input_path).pages)
+    print(f"Total pages in {input_path}: {total_pages}")
+
+    chunks = {name: parse_page_spec(spec, total_pages) for name, spec in specs.items()}
+    source_sha = file_sha256(input_path)
+    manifest = _load_split_manifest(output_dir)
+
+    pending, skipped = [], []
+    for name, pages in chunks.items():
+        output_path = os.path.join(output_dir, f"{name}.pdf")
+        entry = manifest.get(name, {})
+        if (not force and os.path.exists(output_path)
+                and entry.get("source_sha256") == source_sha and entry.get("pages") == pages):
+            skipped.append(name)
+            continue
+        pending.append((name, pages, output_path))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    print(f"Writing {len(pending)} chunk(s), {len(skipped)} unchanged, with {workers} worker(s)...")
+
+    written, failed = [], []
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(input_path,)) as pool:
+            futures = {pool.submit(_write_chunk, name, pages, path): (name, pages, path) for name, pages, path in pending}
+            for future in as_completed(futures):
+                name, pages, path = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Failed: {name} ({e})", file=sys.stderr)
+                    failed.append(name)
+                    continue
+                manifest[name] = {"source": os.path.basename(input_path), "source_sha256": source_sha, "pages": pages}
+                written.append(name)
+                print(f"Saved: {path} (Pages {pages[0]} to {pages[-1]})" if pages == list(range(pages[0], pages[-1] + 1))
+                      else f"Saved: {path} (Pages {','.join(map(str, pages))})")
+        _save_split_manifest(output_dir, manifest)
+
+    print(f"Done: {len(written)} written, {len(skipped)} skipped, {len(failed)} failed.")
+    return written, skipped, failed
+
+
+def split_pdf(input_path, output_dir, pages_per_file=2, max_units=145, prefix="c-giu-", workers=None, force=False):
+    """Fixed-size split (the original C-GIU behaviour): {prefix}1.pdf, {prefix}2.pdf, ..."""
+    total_pages = len(PdfReader(input_path).pages)
+    specs = fixed_size_specs(total_pages, pages_per_file, prefix, max_units)
+    return split_by_specs(input_path, output_dir, specs, workers=workers, force=force)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split a textbook PDF into per-unit PDFs.")
+    parser.add_argument("input", help="Source PDF")
+    parser.add_argument("-o", "--output-dir", required=True, help="Directory for the unit PDFs")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--range", dest="ranges", action="append", metavar="NAME=PAGES",
+                        help="Unit name and 1-based page spec, e.g. c-giu-1=1-2 (repeatable)")
+    source.add_argument("--manifest", help="JSON file of unit name -> page spec")
+    source.add_argument("--every", type=int, metavar="N", help="Fixed N pages per unit")
+    source.add_argument("--detect", action="store_true", help="Detect units from headings in the page text")
+    parser.add_argument("--prefix", default="unit-", help="Name prefix for --every/--detect (default: unit-)")
+    parser.add_argument("--heading-regex", default=DEFAULT_HEADING_REGEX,
+                        help="Unit heading regex for --detect; group 1 is the unit number")
+    parser.add_argument("--dry-run", action="store_true", help="With --detect, print the units without writing")
+    parser.add_argument("--save-manifest", help="With --detect, save the detected unit -> pages manifest here")
+    parser.add_argument("--page-markers", action="store_true",
+                        help="With --detect, also write {unit}.pages.md with PRINTED PAGE markers")
+    parser.add_argument("--max-units", type=int, default=None, help="Stop after this many units with --every")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Rewrite chunks even if unchanged")
+    args = parser.parse_args(argv)
+    if args.every is not None and args.every < 1:
+        parser.error("--every must be at least 1")
+    if args.max_units is not None and args.max_units < 1:
+        parser.error("--max-units must be at least 1")
+
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} not found.", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        texts = page_map = None
+        if args.every is not None:
+            total_pages = len(PdfReader(args.input).pages)
+            specs = fixed_size_specs(total_pages, args.every, args.prefix, args.max_units)
+        elif args.detect:
+            texts = extract_page_texts(args.input, cache_dir=args.output_dir)
+            specs = detected_specs(texts, args.prefix, args.heading_regex)
+            if args.max_units is not None:
+                specs = dict(list(specs.items())[:args.max_units])
+            if not specs:
+                print(f"Error: no unit headings matched /{args.heading_regex}/ in {args.input}", file=sys.stderr)
+                sys.exit(1)
+            page_map = build_page_map(texts)
+            print(f"Detected {len(specs)} unit(s):")
+            for name, spec in specs.items():
+                first, last = parse_page_spec(spec)[0], parse_page_spec(spec)[-1]
+                print(f"  {name}: PDF pages {spec} (printed {printed_label(page_map[first - 1])}"
+                      f"-{printed_label(page_map[last - 1])})")
+            if args.save_manifest:
+                with open(args.save_manifest, "w", encoding="utf-8") as f:
+                    json.dump(specs, f, ensure_ascii=False, indent=2)
+                print(f"Manifest saved to {args.save_manifest}")
+            if args.dry_run:
+                return
+        elif args.manifest:
+            specs = load_manifest(args.manifest)
+        else:
+            specs = dict(parse_named_range(r) for r in args.ranges)
+        _, _, failed = split_by_specs(args.input, args.output_dir, specs, workers=args.workers, force=args.force)
+        if page_map is not None:
+            write_page_map(args.output_dir, specs, page_map)
+            if args.page_markers:
+                write_page_markers(args.output_dir, specs, texts, page_map)
+                print(f"Wrote {len(specs)} .pages.md file(s) with PRINTED PAGE markers")
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if failed:
+        sys.exit(1)
+
 
 if __name__ == "__main__":
-    input_pdf = "temp/pdf/giu/GIU.pdf"
-    output_folder = "temp/pdf/giu"
-    split_pdf(input_pdf, output_folder, pages_per_file=2, max_units=145)
+    main()
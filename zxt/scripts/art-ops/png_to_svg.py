@@ -7,7 +7,8 @@ with transparent background handling (stripping alpha transparency and white bac
 
 USAGE EXAMPLES:
 ---------------
-1. Batch convert default ZXT selected avatars:
+1. Batch convert default ZXT selected avatars (zxt/temp/images/selected/{male,female,alchemist,cyber}.png
+   -> alongside the PNG and zxt/web/public/pixel_scholar_{name}.svg):
    python3 zxt/scripts/art-ops/png_to_svg.py
 
 2. Convert a single PNG file to SVG (with default 96x96 pixel grid):
@@ -15,20 +16,179 @@ USAGE EXAMPLES:
 
 3. Convert a single PNG file to SVG with a custom grid dimension (e.g. 128x128 grid):
    python3 zxt/scripts/art-ops/png_to_svg.py path/to/input.png path/to/output.svg 128
+
+4. Emit one <path> per colour instead of one <rect> per run, capped at 32 colours:
+   python3 zxt/scripts/art-ops/png_to_svg.py path/to/input.png path/to/output.svg --mode path --colors 32
+
+OUTPUT MODES:
+-------------
+  rect (default)  One <rect> per merged run, each carrying its own fill/opacity.
+  path            All runs of one RGBA colour in a single <path d="M..h..v..h..z ...">,
+                  so each colour's fill/opacity is written once.
+BATCH MODE:
+-----------
+   python3 zxt/scripts/art-ops/png_to_svg.py batch "zxt/temp/images/selected/*.png" \\
+       -o "{dir}/{stem}.svg" -o "zxt/web/public/pixel_scholar_{stem}.svg" [--dim 96] [--mode path] \\
+       [--colors 32] [--workers N] [--link] [--force]
+
+  Inputs are glob patterns (relative to the repo root unless absolute). Each -o is an output
+  template with {stem} (file name without extension), {name} (file name) and {dir} (source
+  directory). Every PNG is converted once, on a process pool, into the first template; the
+  result is copied (or hardlinked with --link) to the others. PNGs whose SHA-256 and options
+  match the last run recorded in zxt/temp/png_to_svg-state.json are skipped unless --force.
+
+--colors N quantizes the visible pixels to at most N colours (Pillow fast octree)
+before encoding; transparency is still decided from the original pixels.
 """
 
 from PIL import Image
+import numpy as np
+import argparse
+import glob
+import hashlib
+import json
 import os
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Pixels with alpha below this, or with r, g and b all above WHITE_CUTOFF, are treated as transparent
+ALPHA_CUTOFF = 30
+WHITE_CUTOFF = 240
+
+OUTPUT_MODES = ("rect", "path")
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+BATCH_STATE_PATH = REPO_ROOT / "zxt" / "temp" / "png_to_svg-state.json"
+
+# Default avatar batch (what `png_to_svg.py` with no arguments converts)
+DEFAULT_PRESETS = ["male", "female", "alchemist", "cyber"]
+DEFAULT_INPUTS = [f"zxt/temp/images/selected/{p}.png" for p in DEFAULT_PRESETS]
+DEFAULT_OUTPUTS = ["{dir}/{stem}.svg", "zxt/web/public/pixel_scholar_{stem}.svg"]
+
+
+def _transparent_mask(pixels):
+    """(h, w) bool mask of the pixels of an RGBA array treated as transparent background."""
+    r, g, b, a = pixels[..., 0], pixels[..., 1], pixels[..., 2], pixels[..., 3]
+    return (a < ALPHA_CUTOFF) | ((r > WHITE_CUTOFF) & (g > WHITE_CUTOFF) & (b > WHITE_CUTOFF))
+
+
+def _pixel_keys(pixels, color_pixels=None):
+    """
+    Packs an (h, w, 4) RGBA array into one int64 colour key per pixel (0xRRGGBBAA),
+    with -1 for pixels treated as transparent background.
+    When `color_pixels` (e.g. a quantized copy) is given, colours come from it while
+    transparency is still decided from `pixels`.
+    """
+    transparent = _transparent_mask(pixels)
+    p = pixels.astype(np.int64)
+    r, g, b, a = p[..., 0], p[..., 1], p[..., 2], p[..., 3]
+    if color_pixels is not None:
+        c = color_pixels.astype(np.int64)
+        r, g, b, a = c[..., 0], c[..., 1], c[..., 2], c[..., 3]
+    keys = (r << 24) | (g << 16) | (b << 8) | a
+    keys[transparent] = -1
+    return keys
+
+
+def _quantize(pixels, colors):
+    """
+    Copy of an (h, w, 4) RGBA array with its visible pixels reduced to at most `colors`
+    palette entries. The palette is built from the visible pixels only, so transparent
+    and white background pixels (left unchanged) take no palette slots.
+    """
+    out = pixels.copy()
+    visible = ~_transparent_mask(pixels)
+    if visible.any():
+        strip = Image.fromarray(np.ascontiguousarray(pixels[visible][np.newaxis]), "RGBA")
+        out[visible] = np.asarray(strip.quantize(colors=colors, method=Image.Quantize.FASTOCTREE).convert("RGBA"))[0]
+    return out
+
+
+def _color_count(value):
+    """argparse type for --colors: Pillow's quantizer accepts 1-256 palette entries."""
+    colors = int(value)
+    if not 1 <= colors <= 256:
+        raise argparse.ArgumentTypeError(f"must be between 1 and 256, got {colors}")
+    return colors
+
+
+def _horizontal_runs(keys):
+    """
+    Run-length encodes every row at once via array diffs.
+    Returns parallel arrays (ys, xs, widths, colour keys) for the opaque runs, in row-major order.
+    """
+    h, w = keys.shape
+    starts = np.ones((h, w), dtype=bool)
+    starts[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    flat_starts = np.flatnonzero(starts)
+    # Column 0 always starts a run, so the next start in flat order also bounds runs at row ends
+    widths = np.diff(np.append(flat_starts, h * w))
+    ys, xs = np.divmod(flat_starts, w)
+    colors = keys.ravel()[flat_starts]
+    opaque = colors >= 0
+    return ys[opaque], xs[opaque], widths[opaque], colors[opaque]
+
+
+def _merge_vertical(ys, xs, widths, colors):
+    """
+    Merges runs with the same x, width and colour on consecutive rows into taller rects.
+    Returns [(x, y, width, height, colour key)] ordered by top-left corner.
+    """
+    if len(ys) == 0:
+        return []
+    # One sortable key per (x, width, colour): 12 bits each for x and width, 33 for the colour
+    shape_keys = (xs << 45) | (widths << 33) | (colors + 1)
+    order = np.lexsort((ys, shape_keys))
+    sorted_keys, sorted_ys = shape_keys[order], ys[order]
+    # A run continues the rect above it when the same shape sits on the previous row
+    continues = np.zeros(len(order), dtype=bool)
+    continues[1:] = (sorted_keys[1:] == sorted_keys[:-1]) & (sorted_ys[1:] == sorted_ys[:-1] + 1)
+    heads = np.flatnonzero(~continues)
+    heights = np.diff(np.append(heads, len(order)))
+    head_runs = order[heads]
+    rect_order = np.lexsort((xs[head_runs], ys[head_runs]))
+    head_runs, heights = head_runs[rect_order], heights[rect_order]
+    return list(zip(xs[head_runs].tolist(), ys[head_runs].tolist(), widths[head_runs].tolist(),
+                    heights.tolist(), colors[head_runs].tolist()))
+
+
+def _fill_attrs(color):
+    r, g, b, a = (color >> 24) & 0xFF, (color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF
+    opacity_str = f' opacity="{a/255.0:.2f}"' if a < 255 else ''
+    return f'fill="#{r:02x}{g:02x}{b:02x}"{opacity_str}'
+
+
+def _rect_elements(rects):
+    fills = {color: _fill_attrs(color) for color in {rect[4] for rect in rects}}
+    return [f'<rect x="{x}" y="{y}" width="{width}" height="{height}" {fills[color]}/>'
+            for x, y, width, height, color in rects]
 
-def convert_png_to_transparent_svg(png_path, svg_path, max_dim=96):
+
+def _path_elements(rects):
+    """One <path> per colour, in order of each colour's first (top-left-most) rect."""
+    segments = {}
+    for x, y, width, height, color in rects:
+        segments.setdefault(color, []).append(f"M{x} {y}h{width}v{height}h-{width}z")
+    return [f'<path d="{"".join(d)}" {_fill_attrs(color)}/>' for color, d in segments.items()]
+
+
+def convert_png_to_transparent_svg(png_path, svg_path, max_dim=96, mode="rect", colors=None):
     """
     Converts a PNG image into a run-length optimized transparent pixel SVG grid.
+    Horizontal runs are found with NumPy array diffs, then identical runs on consecutive
+    rows are merged into taller rects to keep the SVG DOM small.
     
     :param png_path: Absolute or relative path to the source PNG file.
     :param svg_path: Destination path for the output SVG file.
     :param max_dim: Target resolution grid (e.g. 96 for 96x96 pixel grid).
+    :param mode: "rect" (one <rect> per run) or "path" (one <path> per colour).
+    :param colors: Optional cap on distinct colours (palette quantization); None keeps all.
     """
+    if mode not in OUTPUT_MODES:
+        print(f"❌ Error: Unknown output mode '{mode}' (expected one of {', '.join(OUTPUT_MODES)})")
+        return False
     if not os.path.exists(png_path):
         print(f"❌ Error: File not found: {png_path}")
         return False
@@ -41,79 +201,189 @@ def convert_png_to_transparent_svg(png_path, svg_path, max_dim=96):
     new_w, new_h = max(1, int(w * scale)), max(1, int(h * scale))
     img = img.resize((new_w, new_h), Image.Resampling.NEAREST)
     
-    pixels = img.load()
+    pixels = np.asarray(img)
+    color_pixels = _quantize(pixels, colors) if colors else None
+    keys = _pixel_keys(pixels, color_pixels)
+    rects = _merge_vertical(*_horizontal_runs(keys))
     
     # SVG header without canvas fill background (transparent canvas)
-    svg_lines = [
-        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {new_w} {new_h}" width="100%" height="100%" style="image-rendering: pixelated;">'
-    ]
-    
-    # Run-length optimization across horizontal pixel rows
-    for y in range(new_h):
-        run_start = None
-        run_color = None
-        run_len = 0
-        
-        for x in range(new_w):
-            r, g, b, a = pixels[x, y]
-            
-            # Treat transparent alpha (<30) or background white (r,g,b > 240) as transparent
-            if a < 30 or (r > 240 and g > 240 and b > 240):
-                if run_color is not None:
-                    hex_color = f"#{run_color[0]:02x}{run_color[1]:02x}{run_color[2]:02x}"
-                    opacity_str = f' opacity="{run_color[3]/255.0:.2f}"' if run_color[3] < 255 else ''
-                    svg_lines.append(f'<rect x="{run_start}" y="{y}" width="{run_len}" height="1" fill="{hex_color}"{opacity_str}/>')
-                    run_color = None
-                    run_len = 0
-                continue
-            
-            curr_color = (r, g, b, a)
-            if run_color is None:
-                run_start = x
-                run_color = curr_color
-                run_len = 1
-            elif run_color == curr_color:
-                run_len += 1
-            else:
-                hex_color = f"#{run_color[0]:02x}{run_color[1]:02x}{run_color[2]:02x}"
-                opacity_str = f' opacity="{run_color[3]/255.0:.2f}"' if run_color[3] < 255 else ''
-                svg_lines.append(f'<rect x="{run_start}" y="{y}" width="{run_len}" height="1" fill="{hex_color}"{opacity_str}/>')
-                run_start = x
-                run_color = curr_color
-                run_len = 1
-                
-        if run_color is not None:
-            hex_color = f"#{run_color[0]:02x}{run_color[1]:02x}{run_color[2]:02x}"
-            opacity_str = f' opacity="{run_color[3]/255.0:.2f}"' if run_color[3] < 255 else ''
-            svg_lines.append(f'<rect x="{run_start}" y="{y}" width="{run_len}" height="1" fill="{hex_color}"{opacity_str}/>')
-
+    if mode == "path":
+        # Adjacent paths must not anti-alias into hairline seams
+        svg_lines = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {new_w} {new_h}" width="100%" height="100%" shape-rendering="crispEdges" style="image-rendering: pixelated;">'
+        ]
+        elements = _path_elements(rects)
+    else:
+        svg_lines = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {new_w} {new_h}" width="100%" height="100%" style="image-rendering: pixelated;">'
+        ]
+        elements = _rect_elements(rects)
+    svg_lines.extend(elements)
     svg_lines.append('</svg>')
     
     os.makedirs(os.path.dirname(os.path.abspath(svg_path)), exist_ok=True)
     with open(svg_path, "w") as f:
         f.write("\n".join(svg_lines))
-    print(f"✅ Generated transparent pixel SVG: {svg_path}")
+    print(f"✅ Generated transparent pixel SVG: {svg_path} ({len(elements)} {mode} elements)")
     return True
 
-def batch_convert_selected():
-    selected_dir = "/home/timathon/codes/smartedu/english-practices/zxt/temp/images/selected"
-    public_dir = "/home/timathon/codes/smartedu/english-practices/zxt/web/public"
-    presets = ["male", "female", "alchemist", "cyber"]
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _resolve(path):
+    path = Path(path)
+    return path if path.is_absolute() else REPO_ROOT / path
+
+
+def _expand_inputs(patterns):
+    """Expands glob patterns (repo-relative unless absolute) into a sorted, de-duplicated list of PNGs."""
+    found = set()
+    for pattern in patterns:
+        matches = glob.glob(str(_resolve(pattern)), recursive=True)
+        if not matches:
+            print(f"⚠️ No files match: {pattern}")
+        found.update(Path(m) for m in matches if m.lower().endswith(".png"))
+    return sorted(found)
+
+
+def _render_outputs(src, templates):
+    fields = {"stem": src.stem, "name": src.name, "dir": str(src.parent)}
+    return [_resolve(t.format(**fields)) for t in templates]
+
+
+def _state_key(path):
+    """Repo-relative path for files inside the repo, so the state file is portable between checkouts."""
+    try:
+        return str(path.relative_to(REPO_ROOT))
+    except ValueError:
+        return str(path)
+
+
+def _load_state(state_path):
+    if state_path.exists():
+        try:
+            return json.loads(state_path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Could not read {state_path}, converting everything: {e}")
+    return {}
+
+
+def _place_copy(src, dst, link=False):
+    """Copies (or hardlinks) an already written SVG to another destination."""
+    os.makedirs(dst.parent, exist_ok=True)
+    if dst.exists() or dst.is_symlink():
+        if dst.exists() and os.path.samefile(src, dst):
+            return
+        dst.unlink()
+    if link:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            # Cross-device or unsupported filesystem: fall back to a plain copy
+            pass
+    shutil.copy2(src, dst)
+
+
+def _convert_worker(src, dst, max_dim, mode, colors):
+    return convert_png_to_transparent_svg(str(src), str(dst), max_dim=max_dim, mode=mode, colors=colors)
+
+
+def batch_convert(patterns, templates, max_dim=96, mode="rect", colors=None, workers=None, link=False,
+                  force=False, state_path=BATCH_STATE_PATH):
+    """
+    Converts every PNG matching `patterns` once on a process pool, then copies/hardlinks the SVG
+    to every other output template. Returns the number of PNGs that failed.
+    """
+    sources = _expand_inputs(patterns)
+    if not sources:
+        print("❌ No input PNGs found.")
+        return 0
+
+    options = f"dim={max_dim};mode={mode};colors={colors}"
+    state = _load_state(state_path)
+    jobs = []
+    for src in sources:
+        outputs = _render_outputs(src, templates)
+        digest = _sha256(src)
+        unchanged = all(
+            out.exists() and state.get(_state_key(out), {}) == {"sha256": digest, "options": options}
+            for out in outputs
+        )
+        if unchanged and not force:
+            print(f"↷ Unchanged, skipping: {src.name}")
+            continue
+        jobs.append((src, outputs, digest))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    print(f"Converting {len(jobs)} of {len(sources)} PNG(s) with {workers} worker(s)...")
+
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_convert_worker, src, outputs[0], max_dim, mode, colors): (src, outputs, digest)
+                for src, outputs, digest in jobs
+            }
+            for future in as_completed(futures):
+                src, outputs, digest = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"❌ Error converting {src}: {e}")
+                    ok = False
+                if not ok:
+                    failed += 1
+                    continue
+                for extra in outputs[1:]:
+                    _place_copy(outputs[0], extra, link=link)
+                    print(f"  ↳ {'Linked' if link else 'Copied'} -> {extra}")
+                for out in outputs:
+                    state[_state_key(out)] = {"sha256": digest, "options": options}
+
+        os.makedirs(state_path.parent, exist_ok=True)
+        state_path.write_text(json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+
+    print(f"Done: {len(jobs) - failed} converted, {len(sources) - len(jobs)} unchanged, {failed} failed.")
+    return failed
+
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(prog="png_to_svg.py batch",
+                                     description="Convert PNGs matching globs into SVGs on a process pool.")
+    parser.add_argument("inputs", nargs="+", help="Input glob patterns (repo-relative unless absolute)")
+    parser.add_argument("-o", "--output", dest="outputs", action="append", required=True,
+                        help="Output template using {stem}, {name}, {dir}; repeat for extra destinations")
+    parser.add_argument("--dim", type=int, default=96, help="Pixel grid size (default: 96)")
+    parser.add_argument("--mode", choices=OUTPUT_MODES, default="rect", help="Output element mode")
+    parser.add_argument("--colors", type=_color_count, default=None, help="Quantize to at most N colours (1-256)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--link", action="store_true", help="Hardlink extra destinations instead of copying")
+    parser.add_argument("--force", action="store_true", help="Convert even if the source hash is unchanged")
+    args = parser.parse_args(argv)
+    failed = batch_convert(args.inputs, args.outputs, max_dim=args.dim, mode=args.mode, colors=args.colors,
+                           workers=args.workers, link=args.link, force=args.force)
+    sys.exit(1 if failed else 0)
 
-    for p in presets:
-        png_p = os.path.join(selected_dir, f"{p}.png")
-        if os.path.exists(png_p):
-            temp_svg = os.path.join(selected_dir, f"{p}.svg")
-            public_svg = os.path.join(public_dir, f"pixel_scholar_{p}.svg")
-            convert_png_to_transparent_svg(png_p, temp_svg, max_dim=96)
-            convert_png_to_transparent_svg(png_p, public_svg, max_dim=96)
 
 if __name__ == "__main__":
-    if len(sys.argv) >= 3:
-        src = sys.argv[1]
-        dst = sys.argv[2]
-        dim = int(sys.argv[3]) if len(sys.argv) > 3 else 96
-        convert_png_to_transparent_svg(src, dst, max_dim=dim)
+    if len(sys.argv) >= 2 and sys.argv[1] == "batch":
+        batch_main(sys.argv[2:])
+    elif len(sys.argv) >= 3:
+        parser = argparse.ArgumentParser(description="Convert a pixel-art PNG into a transparent SVG grid.")
+        parser.add_argument("src", help="Input PNG")
+        parser.add_argument("dst", help="Output SVG")
+        parser.add_argument("dim", type=int, nargs="?", default=96, help="Pixel grid size (default: 96)")
+        parser.add_argument("--mode", choices=OUTPUT_MODES, default="rect", help="Output element mode")
+        parser.add_argument("--colors", type=_color_count, default=None, help="Quantize to at most N colours (1-256)")
+        args = parser.parse_args()
+        ok = convert_png_to_transparent_svg(args.src, args.dst, max_dim=args.dim, mode=args.mode, colors=args.colors)
+        sys.exit(0 if ok else 1)
     else:
         print("Batch converting default ZXT selected avatars...")
-        batch_convert_selected()
+        batch_main(DEFAULT_INPUTS + sum((["-o", t] for t in DEFAULT_OUTPUTS), []))
@@ -4,35 +4,262 @@ ZXT Poetry Master Grid Image Splitter & WebP Converter
 
 Usage:
   python3 zxt/scripts/crop_poem_grid.py <master_image_file> <poem_id>
+  python3 zxt/scripts/crop_poem_grid.py <master_grid_dir> [--workers N] [--force]
 
 Example:
   python3 zxt/scripts/crop_poem_grid.py temp/master_grids/p1_master.png 1
+  python3 zxt/scripts/crop_poem_grid.py zxt/data/blg/images --workers 8
 
 Splits a 2x2 storyboard image into 4 individual line WebP assets:
   Top-Left (Panel 1)     -> zxt/web/public/assets/blg/poems/p1_l1.webp
   Top-Right (Panel 2)    -> zxt/web/public/assets/blg/poems/p1_l2.webp
   Bottom-Left (Panel 3)  -> zxt/web/public/assets/blg/poems/p1_l3.webp
   Bottom-Right (Panel 4) -> zxt/web/public/assets/blg/poems/p1_l4.webp
+
+Panel borders (dark frame lines and flat paper gutters) are detected per quadrant
+from NumPy row/column intensity projections, so only the actual frame is trimmed.
+If detection fails (or NumPy is unavailable) the fixed 8% inset is used instead.
+
+Each panel is also written at other sizes/formats from the same decode (see
+VARIANT_SIZES / VARIANT_FORMATS), e.g. p1_l1_200.webp, p1_l1.avif, p1_l1_800.avif;
+the 400 px WebP keeps the original name. Sizes larger than the trimmed panel are
+skipped rather than upscaled. Every variant's dimensions and byte size are recorded
+in cropped/manifest.json, keyed by the poem JSON `image` path:
+  {"/assets/blg/poems/p1_l1.webp": {"poem_id": 1, "line": 1, "variants": [
+      {"src": "/assets/blg/poems/p1_l1_200.webp", "format": "webp", "width": 200, "height": 200, "bytes": 9876}, ...]}}
+
+Batch mode processes every p{poem_id}_master.png in a directory across CPU cores.
+Grids whose four outputs are all newer than the master image are skipped (unless
+--force), and poem-image-prompts.json is rewritten once at the end.
 """
 
 import sys
 import os
+import re
 import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 try:
-    from PIL import Image
+    from PIL import Image, features
 except ImportError:
     print("Pillow not found. Installing via system or pip...")
     os.system("pip install Pillow")
-    from PIL import Image
+    from PIL import Image, features
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DEFAULT_OUTPUT_DIR = "zxt/data/blg/images/cropped"
+PROMPT_FILE = "zxt/data/blg/poem-image-prompts.json"
+MASTER_NAME_RE = re.compile(r"^p(\d+)_master\.png$", re.IGNORECASE)
+PANEL_COUNT = 4
+MANIFEST_NAME = "manifest.json"
+# Public path prefix used by the poem JSON `image` fields
+ASSET_URL_PREFIX = "/assets/blg/poems/"
+
+# Responsive outputs: the canonical size keeps the unsuffixed filename
+CANONICAL_SIZE = 400
+VARIANT_SIZES = (200, 400, 800)
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 85}),
+    "avif": ("AVIF", {"quality": 60, "speed": 8}),
+}
+
+# Fixed inner margin (8% of each quadrant side) used when border detection fails
+FALLBACK_INSET_RATIO = 0.08
+# Never trim more than this fraction of a quadrant side from one edge
+MAX_BORDER_RATIO = 0.12
+# Frame lines thicker than this fraction of the side are treated as painting, not border
+MAX_LINE_RATIO = 0.03
+# A projection row/column is "dark" when its mean is this far below the quadrant's median
+DARK_DELTA = 40.0
+# A projection row/column is a flat gutter when its intensity std-dev is below this
+FLAT_STD = 6.0
+# A gutter must end in an abrupt edge: std-dev within EDGE_WINDOW px of its end reaching
+# EDGE_STD and EDGE_CONTRAST times the gutter's own std-dev
+EDGE_WINDOW = 3
+EDGE_STD = 15.0
+EDGE_CONTRAST = 4.0
+# Extra safety trim past the detected border (fraction of side, at least 2 px)
+PAD_RATIO = 0.01
+
+
+def panel_output_paths(poem_id: int, output_dir: str = DEFAULT_OUTPUT_DIR):
+    return [os.path.join(output_dir, f"p{poem_id}_l{line_idx}.webp") for line_idx in range(1, PANEL_COUNT + 1)]
+
+
+def variant_filename(poem_id: int, line_idx: int, size: int, ext: str) -> str:
+    suffix = "" if size == CANONICAL_SIZE else f"_{size}"
+    return f"p{poem_id}_l{line_idx}{suffix}.{ext}"
+
+
+def available_formats():
+    """VARIANT_FORMATS filtered to what this Pillow build can encode (AVIF needs Pillow >= 11.3 or a plugin)."""
+    return {ext: opts for ext, opts in VARIANT_FORMATS.items() if ext == "webp" or features.check(ext)}
+
+
+def load_manifest(output_dir: str = DEFAULT_OUTPUT_DIR) -> dict:
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"  ⚠ Note: Could not read {path}, rebuilding it: {e}")
+    return {}
+
+
+def update_manifest(entries: dict, output_dir: str = DEFAULT_OUTPUT_DIR):
+    """Merges per-panel entries into cropped/manifest.json with a single rewrite."""
+    if not entries:
+        return
+    manifest = load_manifest(output_dir)
+    manifest.update(entries)
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    ordered = dict(sorted(manifest.items(), key=lambda kv: (kv[1].get("poem_id", 0), kv[1].get("line", 0))))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ordered, f, ensure_ascii=False, indent=2)
+    print(f"  ✓ Updated {len(entries)} panel entr{'y' if len(entries) == 1 else 'ies'} in {path}")
+
+
+def outputs_up_to_date(master_path: str, poem_id: int, output_dir: str = DEFAULT_OUTPUT_DIR,
+                       manifest: dict = None) -> bool:
+    """True when every panel and every manifest-listed variant exists and is newer than the master grid."""
+    master_mtime = os.path.getmtime(master_path)
+    manifest = load_manifest(output_dir) if manifest is None else manifest
+    expected = list(panel_output_paths(poem_id, output_dir))
+    for line_idx in range(1, PANEL_COUNT + 1):
+        entry = manifest.get(f"{ASSET_URL_PREFIX}p{poem_id}_l{line_idx}.webp")
+        if entry is None:
+            return False
+        expected += [os.path.join(output_dir, os.path.basename(v["src"])) for v in entry["variants"]]
+    for out_path in expected:
+        if not os.path.exists(out_path) or os.path.getmtime(out_path) < master_mtime:
+            return False
+    return True
+
+
+def _edge_inset(means, stds, median: float) -> int:
+    """
+    Number of border rows at the start of a 1-D projection (edge -> centre).
+    Alternately skips thin dark frame lines and flat gutters. A flat run only counts
+    as a gutter when the painting starts abruptly after it; a gradual fade (or a run
+    reaching the MAX_BORDER_RATIO limit) is blank paper inside the painting and is kept.
+    """
+    limit = int(len(means) * MAX_BORDER_RATIO)
+    max_line = max(1, int(len(means) * MAX_LINE_RATIO))
+    i = 0
+    while i < limit:
+        start = i
+        dark = np.flatnonzero(means[i:i + max_line + 1] >= median - DARK_DELTA)
+        line_len = dark[0] if dark.size else max_line + 1
+        if 0 < line_len <= max_line:
+            i += line_len
+        not_flat = np.flatnonzero(stds[i:limit] >= FLAT_STD)
+        if not_flat.size and not_flat[0] > 0:
+            run_end = i + not_flat[0]
+            edge = stds[run_end:run_end + EDGE_WINDOW].max()
+            if edge >= max(EDGE_STD, EDGE_CONTRAST * float(np.median(stds[i:run_end]))):
+                i = run_end
+        if i == start:
+            break
+    return int(min(i, limit))
+
+
+def detect_panel_box(gray, box):
+    """
+    Content box (left, upper, right, lower) inside quadrant `box` of the grayscale array,
+    found from row/column intensity projections. Returns None when detection is not usable.
+    """
+    l, u, r, b = box
+    q = gray[u:b, l:r]
+    qh, qw = q.shape
+    if qh < 50 or qw < 50:
+        return None
+    # Project over the middle 80% of the other axis so neighbouring edges don't leak in
+    mid_rows = q[:, qw // 10: qw - qw // 10]
+    mid_cols = q[qh // 10: qh - qh // 10, :]
+    row_mean, row_std = mid_rows.mean(axis=1), mid_rows.std(axis=1)
+    col_mean, col_std = mid_cols.mean(axis=0), mid_cols.std(axis=0)
+    median = float(np.median(q))
 
+    top = _edge_inset(row_mean, row_std, median)
+    bottom = _edge_inset(row_mean[::-1], row_std[::-1], median)
+    left = _edge_inset(col_mean, col_std, median)
+    right = _edge_inset(col_mean[::-1], col_std[::-1], median)
 
-def crop_2x2_master_grid(master_path: str, poem_id: int, output_dir: str = "zxt/data/blg/images/cropped"):
+    pad_h = max(2, int(qh * PAD_RATIO))
+    pad_w = max(2, int(qw * PAD_RATIO))
+    crop_l, crop_u = l + left + pad_w, u + top + pad_h
+    crop_r, crop_b = r - right - pad_w, b - bottom - pad_h
+    if crop_r - crop_l < qw * 0.6 or crop_b - crop_u < qh * 0.6:
+        return None
+
+    # Keep a centred square so the 1:1 resize does not distort the panel
+    side = min(crop_r - crop_l, crop_b - crop_u)
+    cx, cy = (crop_l + crop_r) // 2, (crop_u + crop_b) // 2
+    return (cx - side // 2, cy - side // 2, cx - side // 2 + side, cy - side // 2 + side)
+
+
+def fixed_inset_box(box, inset_ratio: float = FALLBACK_INSET_RATIO):
+    l, u, r, b = box
+    qw, qh = r - l, b - u
+    return (int(l + qw * inset_ratio), int(u + qh * inset_ratio),
+            int(r - qw * inset_ratio), int(b - qh * inset_ratio))
+
+
+def update_prompt_status(poem_ids, prompt_file: str = PROMPT_FILE):
+    """Marks the given poems as 'cropped' in poem-image-prompts.json with a single rewrite."""
+    poem_ids = set(poem_ids)
+    if not poem_ids or not os.path.exists(prompt_file):
+        return
+    try:
+        with open(prompt_file, "r", encoding="utf-8") as f:
+            prompts_data = json.load(f)
+        for item in prompts_data:
+            if item.get("poem_id") in poem_ids:
+                item["status"] = "cropped"
+        with open(prompt_file, "w", encoding="utf-8") as f:
+            json.dump(prompts_data, f, ensure_ascii=False, indent=2)
+        ids = ", ".join(f"#{i}" for i in sorted(poem_ids))
+        print(f"  ✓ Updated status for Poem {ids} to 'cropped' in {prompt_file}")
+    except Exception as e:
+        print(f"  ⚠ Note: Could not update status in prompt file: {e}")
+
+
+def save_panel_variants(panel, poem_id: int, line_idx: int, output_dir: str, formats: dict) -> dict:
+    """Writes every size/format variant of one trimmed panel. Returns its manifest entry."""
+    side = min(panel.size)
+    sizes = [size for size in VARIANT_SIZES if size <= side or size == CANONICAL_SIZE]
+    variants = []
+    for size in sizes:
+        resized = panel.resize((size, size), Image.Resampling.LANCZOS)
+        for ext, (pil_format, save_options) in formats.items():
+            filename = variant_filename(poem_id, line_idx, size, ext)
+            out_path = os.path.join(output_dir, filename)
+            resized.save(out_path, pil_format, **save_options)
+            variants.append({
+                "src": ASSET_URL_PREFIX + filename,
+                "format": ext,
+                "width": size,
+                "height": size,
+                "bytes": os.path.getsize(out_path),
+            })
+    return {"poem_id": poem_id, "line": line_idx, "variants": variants}
+
+
+def crop_2x2_master_grid(master_path: str, poem_id: int, output_dir: str = DEFAULT_OUTPUT_DIR,
+                         update_status: bool = True) -> dict:
+    """Crops one master grid into panel variants. Returns {image path: manifest entry} for its 4 panels."""
     if not os.path.exists(master_path):
         print(f"Error: Master grid image not found at '{master_path}'")
         sys.exit(1)
 
     os.makedirs(output_dir, exist_ok=True)
     img = Image.open(master_path)
+    # Decode once; every crop, projection and variant below works from this bitmap
+    img.load()
     w, h = img.size
 
     half_w, half_h = w // 2, h // 2
@@ -47,51 +274,108 @@ def crop_2x2_master_grid(master_path: str, poem_id: int, output_dir: str = "zxt/
 
     print(f"Processing Master Grid: {master_path} ({w}x{h} px) for Poem #{poem_id}...")
 
-    # Aggressive inner margin trimming offset (8% slice of each quadrant) to eliminate outer black border lines completely
-    inset_ratio = 0.08
+    gray = np.asarray(img.convert("L"), dtype=np.float32) if np is not None else None
+    formats = available_formats()
+    if len(formats) < len(VARIANT_FORMATS):
+        missing = ", ".join(sorted(set(VARIANT_FORMATS) - set(formats)))
+        print(f"  ⚠ Note: Pillow cannot encode {missing}; writing {', '.join(formats)} only")
+    entries = {}
 
-    for line_idx, (l, u, r, b) in enumerate(quadrants, start=1):
-        qw = r - l
-        qh = b - u
-        
-        # Calculate inset box without outer black frames
-        crop_l = int(l + qw * inset_ratio)
-        crop_u = int(u + qh * inset_ratio)
-        crop_r = int(r - qw * inset_ratio)
-        crop_b = int(b - qh * inset_ratio)
+    for line_idx, quadrant in enumerate(quadrants, start=1):
+        # Trim the detected frame; fall back to the aggressive 8% inset when detection is not usable
+        crop_box = detect_panel_box(gray, quadrant) if gray is not None else None
+        method = "detected border"
+        if crop_box is None:
+            crop_box = fixed_inset_box(quadrant)
+            method = f"fixed {FALLBACK_INSET_RATIO:.0%} inset"
+        crop_l, crop_u, crop_r, crop_b = crop_box
 
         cropped = img.crop((crop_l, crop_u, crop_r, crop_b))
-        # Resize trimmed panel to standard 1:1 square WebP target (400x400 px)
-        resized = cropped.resize((400, 400), Image.Resampling.LANCZOS)
-        out_filename = f"p{poem_id}_l{line_idx}.webp"
-        out_path = os.path.join(output_dir, out_filename)
-        
-        resized.save(out_path, "WEBP", quality=85)
-        print(f"  ✓ Trimmed & Cropped Line #{line_idx} -> {out_path}")
-
-    # Update status in poem-image-prompts.json
-    prompt_file = "zxt/data/blg/poem-image-prompts.json"
-    if os.path.exists(prompt_file):
-        try:
-            with open(prompt_file, "r", encoding="utf-8") as f:
-                prompts_data = json.load(f)
-            for item in prompts_data:
-                if item.get("poem_id") == poem_id:
-                    item["status"] = "cropped"
-            with open(prompt_file, "w", encoding="utf-8") as f:
-                json.dump(prompts_data, f, ensure_ascii=False, indent=2)
-            print(f"  ✓ Updated status for Poem #{poem_id} to 'cropped' in {prompt_file}")
-        except Exception as e:
-            print(f"  ⚠ Note: Could not update status in prompt file: {e}")
+        # Resize trimmed panel to standard 1:1 square targets (canonical 400x400 px WebP plus variants)
+        entry = save_panel_variants(cropped, poem_id, line_idx, output_dir, formats)
+        entries[f"{ASSET_URL_PREFIX}p{poem_id}_l{line_idx}.webp"] = entry
+        out_path = os.path.join(output_dir, f"p{poem_id}_l{line_idx}.webp")
+        print(f"  ✓ Trimmed & Cropped Line #{line_idx} ({method}) -> {out_path} (+{len(entry['variants']) - 1} variants)")
+
+    if update_status:
+        update_manifest(entries, output_dir)
+        update_prompt_status([poem_id])
 
     print("Success: All 4 panels cropped and saved to WebP.")
+    return entries
+
+
+def _crop_worker(master_path: str, poem_id: int, output_dir: str):
+    return poem_id, crop_2x2_master_grid(master_path, poem_id, output_dir, update_status=False)
+
+
+def find_master_grids(master_dir: str):
+    """Returns [(poem_id, path)] for every p{id}_master.png in master_dir, sorted by poem id."""
+    grids = []
+    for name in os.listdir(master_dir):
+        m = MASTER_NAME_RE.match(name)
+        if m:
+            grids.append((int(m.group(1)), os.path.join(master_dir, name)))
+    return sorted(grids)
+
+
+def crop_master_grid_dir(master_dir: str, output_dir: str = DEFAULT_OUTPUT_DIR, workers: int = None,
+                         force: bool = False):
+    """Crops every master grid in master_dir on a process pool. Returns (cropped_ids, failed_ids)."""
+    grids = find_master_grids(master_dir)
+    if not grids:
+        print(f"No p{{id}}_master.png files found in '{master_dir}'")
+        return [], []
+
+    manifest = load_manifest(output_dir)
+    pending = []
+    for poem_id, master_path in grids:
+        if not force and outputs_up_to_date(master_path, poem_id, output_dir, manifest):
+            print(f"  ↷ Skipping Poem #{poem_id} (outputs newer than {os.path.basename(master_path)})")
+            continue
+        pending.append((poem_id, master_path))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pending) or 1))
+    print(f"Cropping {len(pending)} of {len(grids)} master grid(s) with {workers} worker(s)...")
+    os.makedirs(output_dir, exist_ok=True)
+
+    cropped, failed = [], []
+    entries = {}
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_crop_worker, path, poem_id, output_dir): poem_id for poem_id, path in pending}
+            for future in as_completed(futures):
+                poem_id = futures[future]
+                try:
+                    done_id, poem_entries = future.result()
+                    cropped.append(done_id)
+                    entries.update(poem_entries)
+                except (Exception, SystemExit) as e:
+                    # SystemExit from a worker (missing file) is reported, not propagated
+                    print(f"  ⚠ Poem #{poem_id} failed: {e}")
+                    failed.append(poem_id)
+
+    update_manifest(entries, output_dir)
+    update_prompt_status(cropped)
+    print(f"Done: {len(cropped)} cropped, {len(grids) - len(pending)} skipped, {len(failed)} failed.")
+    return sorted(cropped), sorted(failed)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
+    parser = argparse.ArgumentParser(description="Split 2x2 poem master grids into per-line WebP panels.")
+    parser.add_argument("master", help="Master grid image, or a directory of p{id}_master.png files")
+    parser.add_argument("poem_id", type=int, nargs="?", help="Poem ID (required for a single image)")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR, help="Directory for the cropped WebP panels")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes in batch mode (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-crop grids even if outputs are up to date")
+    args = parser.parse_args()
+
+    if os.path.isdir(args.master):
+        _, failed_ids = crop_master_grid_dir(args.master, args.output_dir, workers=args.workers, force=args.force)
+        sys.exit(1 if failed_ids else 0)
+
+    if args.poem_id is None:
         print("Usage: python3 zxt/scripts/crop_poem_grid.py <master_image_path> <poem_id>")
         sys.exit(1)
 
-    master_image = sys.argv[1]
-    p_id = int(sys.argv[2])
-    crop_2x2_master_grid(master_image, p_id)
+    crop_2x2_master_grid(args.master, args.poem_id, args.output_dir)
@@ -4,7 +4,8 @@ gen_poem_jsons.py — Generate separate JSON files for each poem listed in zxt/p
 using Gemini API, according to zxt/data/blg/schema-guide.md.
 
 Usage:
-    python3 zxt/scripts/gen_poem_jsons.py [--id ID] [--start START] [--end END] [--high] [--force] [--use-existing]
+    python3 zxt/scripts/gen_poem_jsons.py [--id ID] [--start START] [--end END] [--high] [--force] [--use-existing] [--no-cache]
+                                          [--workers N] [--resume]
 
 Options:
     --id ID          Process only a single poem ID (1-75)
@@ -12,10 +13,15 @@ Options:
     --high           Use Gemini 3.6 Flash (default: Gemini 3.5 Flash Lite)
     --force          Overwrite existing JSON files in zxt/data/blg/poems/
     --use-existing   If poem is already in poems-75.json, use that instead of calling API
+    --no-cache       Send the full schema guide with every poem instead of a cached prefix
+    --workers N      Generate up to N poems concurrently (default: 4)
+    --resume         Skip poems the status journal records as succeeded, even with --force,
+                     so a rerun over the same --start/--end range only picks up failures
 
 API token and model config loaded from scripts/genai.
 Output directory: zxt/data/blg/poems/
 Filename format: {id}-{title}.json
+Status journal: zxt/data/blg/poems/.gen-status.json (updated after every poem)
 """
 
 import os
@@ -24,6 +30,9 @@ import json
 import re
 import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
 from pathlib import Path
 
 # Add repo root and scripts/genai to sys.path
@@ -32,30 +41,30 @@ GENAI_DIR = REPO_ROOT / "scripts" / "genai"
 if str(GENAI_DIR) not in sys.path:
     sys.path.insert(0, str(GENAI_DIR))
 
-from google import genai
 from google.genai import types
-from config import get_genai_config, parse_high_flag
+from config import get_genai_config, parse_high_flag, parse_no_cache_flag, create_client
+from prompt_cache import cached_contents, recover_missing_cache, log_usage
 
 POEMS_MD_PATH = REPO_ROOT / "zxt" / "plan" / "poems.md"
 SCHEMA_GUIDE_PATH = REPO_ROOT / "zxt" / "data" / "blg" / "schema-guide.md"
 POEMS_75_PATH = REPO_ROOT / "zxt" / "data" / "blg" / "poems-75.json"
 OUTPUT_DIR = REPO_ROOT / "zxt" / "data" / "blg" / "poems"
+STATUS_PATH = OUTPUT_DIR / ".gen-status.json"
 
-PROMPT_TEMPLATE = """\
-You are an expert Classical Chinese Poetry curriculum analyst and exercise designer for 百莲阁 (BaiLianGe).
-Generate a complete, fully detailed JSON object for the following poem, strictly adhering to the schema guide below.
+DEFAULT_WORKERS = 4
 
-POEM INFO:
-ID: {id}
-Title: 《{title}》
-Author Info: {author_info}
+# Stable prefix shared by every poem (cached once via prompt_cache); <ID>, <ID3> and <TITLE>
+# are placeholders resolved by the per-poem suffix below.
+PROMPT_PREFIX_TEMPLATE = """\
+You are an expert Classical Chinese Poetry curriculum analyst and exercise designer for 百莲阁 (BaiLianGe).
+Generate a complete, fully detailed JSON object for the poem given at the end, strictly adhering to the schema guide below.
 
 SCHEMA GUIDE:
 {schema_guide}
 
 REQUIREMENTS:
-1. "id": {id} (integer)
-2. "title": "{title}"
+1. "id": <ID> (integer)
+2. "title": "<TITLE>"
 3. "dynasty": Extract dynasty (e.g. "唐", "宋", "汉", "清", "明", "南朝").
 4. "author": Extract author name (e.g. "白居易", "李白", "汉乐府", "卢钺", "范成大").
 5. "theme": Theme label with Chinese and English in parentheses, e.g. "童趣 (Childhood Innocence)", "山水田园 (Landscape & Countryside)".
@@ -65,57 +74,68 @@ REQUIREMENTS:
    - "pinyin": Full pinyin with standard tone marks (e.g., "xiǎo wá chēng xiǎo tǐng").
    - "cn": Chinese vernacular translation of this line.
    - "en": English translation of this line.
-   - "image": "/assets/blg/poems/p{id}_l1.webp" for line 1, "/assets/blg/poems/p{id}_l2.webp" for line 2, etc.
+   - "image": "/assets/blg/poems/p<ID>_l1.webp" for line 1, "/assets/blg/poems/p<ID>_l2.webp" for line 2, etc.
 8. "questions": Array of high-quality exercise questions following these exact types and formats:
    a. "LineAssembly" (1 question per line, line_index 0..N-1):
-      - id: "q_blg_{id_3d}_1", "q_blg_{id_3d}_2", ...
+      - id: "q_blg_<ID3>_1", "q_blg_<ID3>_2", ...
       - type: "LineAssembly"
       - line_index: 0, 1, ...
-      - prompt: "请将字块拼接成《{title}》的第X句诗："
+      - prompt: "请将字块拼接成《<TITLE>》的第X句诗："
       - answer: exact text of that line
       - distractor_chars: array of 3 plausible distractor Chinese characters not in that line.
    b. "VerseCloze" (3-4 fill-in-the-blank questions):
-      - id: "q_blg_{id_3d}_X"
+      - id: "q_blg_<ID3>_X"
       - type: "VerseCloze"
       - prompt: line with "_____" filling key word or phrase
       - options: 6 choices array (option at index 0 is correct answer)
       - answer: 0
       - explanation: Chinese explanation of the context and meaning.
    c. "PinyinMatch" (2 questions on key character pronunciation/meaning):
-      - id: "q_blg_{id_3d}_X"
+      - id: "q_blg_<ID3>_X"
       - type: "PinyinMatch"
       - prompt: question asking about pronunciation or meaning of a specific character in context
       - options: 4 choices array (index 0 is correct)
       - answer: 0
       - explanation: Chinese explanation.
    d. "TextToCn" (2 questions on translating line to Chinese meaning):
-      - id: "q_blg_{id_3d}_X"
+      - id: "q_blg_<ID3>_X"
       - type: "TextToCn"
       - prompt: "诗句“...”的意思是："
       - options: 4 choices array (index 0 is correct)
       - answer: 0
       - explanation: Chinese explanation.
    e. "CulturalContext" (2 questions on dynasty, author background, theme, or literary significance):
-      - id: "q_blg_{id_3d}_X"
+      - id: "q_blg_<ID3>_X"
       - type: "CulturalContext"
       - prompt: question on author/dynasty/theme
       - options: 4 choices array (index 0 is correct)
       - answer: 0
       - explanation: Chinese explanation.
    f. "ImageOrdering" (1 question sorting images):
-      - id: "q_blg_{id_3d}_img_order"
+      - id: "q_blg_<ID3>_img_order"
       - type: "ImageOrdering"
-      - prompt: "请按诗句顺序排列《{title}》的插图："
-      - images: array of image paths ["/assets/blg/poems/p{id}_l1.webp", ...]
+      - prompt: "请按诗句顺序排列《<TITLE>》的插图："
+      - images: array of image paths ["/assets/blg/poems/p<ID>_l1.webp", ...]
    g. "ImageToLine" (1 question per line):
-      - id: "q_blg_{id_3d}_img2line_1", "q_blg_{id_3d}_img2line_2", ...
+      - id: "q_blg_<ID3>_img2line_1", "q_blg_<ID3>_img2line_2", ...
       - type: "ImageToLine"
-      - prompt: "观察下面的图片，选择对应的《{title}》诗句："
-      - image: "/assets/blg/poems/p{id}_l1.webp", ...
+      - prompt: "观察下面的图片，选择对应的《<TITLE>》诗句："
+      - image: "/assets/blg/poems/p<ID>_l1.webp", ...
       - options: 4 poem line options (correct line at index answer)
       - answer: correct option index (0-3)
       - explanation: Chinese explanation.
 
+PLACEHOLDERS:
+In the requirements above, <ID> is the poem ID (integer), <ID3> is the poem ID zero-padded to 3 digits, and <TITLE> is the poem title.
+"""
+
+PROMPT_SUFFIX_TEMPLATE = """\
+POEM INFO:
+ID: {id}
+ID3: {id_3d}
+Title: 《{title}》
+Author Info: {author_info}
+
 OUTPUT FORMAT:
 Output ONLY valid JSON representing the poem object. Do not include markdown code block syntax (like ```json), commentary, or extra text.
 """
@@ -159,25 +179,64 @@ def load_existing_poems_map():
     return {}
 
 
-def generate_poem_json(client, model_name, poem, schema_guide):
-    prompt = PROMPT_TEMPLATE.format(
+class StatusJournal:
+    """
+    Per-poem generation status, persisted after every update so an interrupted
+    run can be resumed. Entries: {"<id>": {"status": "ok"|"failed", "file", "model", "error", "updated_at"}}.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if path.exists():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Warning: Failed to parse {path}, starting a new journal: {e}", file=sys.stderr)
+
+    def succeeded(self, poem_id: int) -> bool:
+        return self.entries.get(str(poem_id), {}).get("status") == "ok"
+
+    def record(self, poem_id: int, status: str, filename: str, model_name: str, error: str = ""):
+        with self._lock:
+            self.entries[str(poem_id)] = {
+                "status": status,
+                "file": filename,
+                "model": model_name,
+                "error": error,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def generate_poem_json(client, model_name, poem, schema_guide, use_cache=True):
+    prefix = PROMPT_PREFIX_TEMPLATE.format(schema_guide=schema_guide)
+    suffix = PROMPT_SUFFIX_TEMPLATE.format(
         id=poem["id"],
         title=poem["title"],
         author_info=poem["author_info"],
-        id_3d=f"{poem['id']:03d}",
-        schema_guide=schema_guide
+        id_3d=f"{poem['id']:03d}"
     )
+    contents, cache_name = cached_contents(client, model_name, prefix, suffix,
+                                           display_name="blg-poem-schema-guide", use_cache=use_cache)
 
     for attempt in range(5):
         try:
             response = client.models.generate_content(
                 model=model_name,
-                contents=prompt,
+                contents=contents,
                 config=types.GenerateContentConfig(
                     temperature=0.2,
-                    response_mime_type="application/json"
+                    response_mime_type="application/json",
+                    cached_content=cache_name
                 )
             )
+            log_usage(response)
             raw_text = response.text.strip()
             # Strip accidental markdown triple backticks if present
             if raw_text.startswith("```"):
@@ -186,6 +245,11 @@ def generate_poem_json(client, model_name, poem, schema_guide):
             parsed = json.loads(raw_text)
             return parsed
         except Exception as e:
+            recovered = recover_missing_cache(e, client, model_name, prefix, suffix, cache_name,
+                                              display_name="blg-poem-schema-guide")
+            if recovered:
+                contents, cache_name = recovered
+                continue
             print(f"Error calling Gemini API for poem {poem['id']} (attempt {attempt + 1}/5): {e}", file=sys.stderr)
             if attempt == 4:
                 raise e
@@ -194,6 +258,7 @@ def generate_poem_json(client, model_name, poem, schema_guide):
 
 def main():
     use_high = parse_high_flag()
+    no_cache = parse_no_cache_flag()
 
     parser = argparse.ArgumentParser(description="Generate individual poem JSON files using Gemini API.")
     parser.add_argument("--id", type=int, help="Process a single poem ID (1-75)")
@@ -201,6 +266,8 @@ def main():
     parser.add_argument("--end", type=int, help="End poem ID range")
     parser.add_argument("--force", action="store_true", help="Overwrite existing files in output directory")
     parser.add_argument("--use-existing", action="store_true", help="Use data from poems-75.json if available")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of poems to generate concurrently")
+    parser.add_argument("--resume", action="store_true", help="Skip poems the status journal marks as succeeded")
     args = parser.parse_args()
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -222,12 +289,10 @@ def main():
         return
 
     api_key, model_name = get_genai_config(use_high)
-    client = genai.Client(api_key=api_key)
-
-    print(f"Processing {len(target_poems)} poem(s) using model: {model_name}...")
-    print(f"Output directory: {OUTPUT_DIR}")
+    client = create_client(api_key)
 
-    success_count = 0
+    journal = StatusJournal(STATUS_PATH)
+    pending = []
     for p in target_poems:
         poem_id = p["id"]
         title = p["title"]
@@ -235,25 +300,61 @@ def main():
         filename = f"{poem_id}-{title}.json"
         out_path = OUTPUT_DIR / filename
 
+        if args.resume and journal.succeeded(poem_id) and out_path.exists():
+            print(f"Skipping poem #{poem_id} 《{title}》 (succeeded in a previous run)")
+            continue
         if out_path.exists() and not args.force:
             print(f"Skipping poem #{poem_id} 《{title}》 (already exists: {filename})")
             continue
+        pending.append(p)
 
-        print(f"Generating poem #{poem_id} 《{title}》...", end=" ", flush=True)
+    if not pending:
+        print("Nothing to generate.")
+        return
 
+    workers = max(1, min(args.workers, len(pending)))
+    print(f"Processing {len(pending)} poem(s) using model: {model_name} with {workers} worker(s)...")
+    print(f"Output directory: {OUTPUT_DIR}")
+
+    def process(p):
+        poem_id = p["id"]
+        filename = f"{poem_id}-{p['title']}.json"
         if args.use_existing and poem_id in existing_map:
             poem_data = existing_map[poem_id]
-            print("(Using existing data from poems-75.json)", end=" ")
+            source = "existing data from poems-75.json"
         else:
-            poem_data = generate_poem_json(client, model_name, p, schema_guide)
-
-        with open(out_path, "w", encoding="utf-8") as f:
+            poem_data = generate_poem_json(client, model_name, p, schema_guide, use_cache=not no_cache)
+            source = "generated"
+        with open(OUTPUT_DIR / filename, "w", encoding="utf-8") as f:
             json.dump(poem_data, f, ensure_ascii=False, indent=2)
+        return filename, source
 
-        print(f"Saved -> {filename}")
-        success_count += 1
+    success_count = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process, p): p for p in pending}
+        for future in as_completed(futures):
+            p = futures[future]
+            poem_id = p["id"]
+            filename = f"{poem_id}-{p['title']}.json"
+            try:
+                _, source = future.result()
+            except Exception as e:
+                # One poem failing must not abort the rest of the batch
+                journal.record(poem_id, "failed", filename, model_name, error=str(e))
+                failed.append(poem_id)
+                print(f"❌ Poem #{poem_id} 《{p['title']}》 failed: {e}", file=sys.stderr)
+                continue
+            journal.record(poem_id, "ok", filename, model_name)
+            success_count += 1
+            print(f"✓ Poem #{poem_id} 《{p['title']}》 ({source}) -> {filename}")
 
     print(f"\nDone! Successfully processed {success_count} poem JSON file(s).")
+    if failed:
+        ids = ", ".join(str(i) for i in sorted(failed))
+        print(f"⚠️ {len(failed)} poem(s) failed: {ids}. Rerun the same range with --resume to retry only these.",
+              file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -2,7 +2,7 @@
 /**
  * ZXT Poem Image R2 Uploader
  * 
- * Uploads all cropped WebP images from zxt/data/blg/images/cropped/
+ * Uploads all cropped WebP/AVIF images (and manifest.json) from zxt/data/blg/images/cropped/
  * to Cloudflare R2 bucket `embroid-001` with key structure: zxt/blg/${filename}
  * 
  * Usage: node zxt/scripts/upload_poem_images_r2.js
@@ -25,6 +25,11 @@ const s3Client = new S3Client({
 const BUCKET_NAME = 'embroid-001';
 const CROPPED_DIR = path.resolve(__dirname, '../data/blg/images/cropped');
 const R2_PREFIX = 'zxt/blg';
+const CONTENT_TYPES = {
+  '.webp': 'image/webp',
+  '.avif': 'image/avif',
+  '.json': 'application/json',
+};
 
 async function uploadImagesToR2() {
   if (!fs.existsSync(CROPPED_DIR)) {
@@ -32,9 +37,9 @@ async function uploadImagesToR2() {
     process.exit(1);
   }
 
-  const files = fs.readdirSync(CROPPED_DIR).filter(f => f.endsWith('.webp'));
+  const files = fs.readdirSync(CROPPED_DIR).filter(f => CONTENT_TYPES[path.extname(f)]);
   if (files.length === 0) {
-    console.log(`⚠️ No .webp files found in ${CROPPED_DIR}`);
+    console.log(`⚠️ No .webp/.avif files found in ${CROPPED_DIR}`);
     return;
   }
 
@@ -52,7 +57,7 @@ async function uploadImagesToR2() {
         Bucket: BUCKET_NAME,
         Key: r2Key,
         Body: fs.readFileSync(filePath),
-        ContentType: 'image/webp',
+        ContentType: CONTENT_TYPES[path.extname(filename)],
       }));
       console.log(`  ✓ Uploaded: ${r2Key}`);
       successCount++;